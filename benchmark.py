@@ -0,0 +1,219 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from build_profiler import format_bytes
+from build_progress import timing_key
+from nuitka_core import app_data_dir
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Used when no workloads file is configured
+DEFAULT_WORKLOADS = [{"name": "no arguments", "args": [], "stdin": ""}]
+
+# Options that do not change the produced binary, left out of profile labels
+LABEL_IGNORED_PREFIXES = ("--output-dir=", "--jobs=", "--show-memory", "--remove-output", "--windows-console-mode=")
+
+history_lock = threading.Lock()
+
+
+def load_workloads(path):
+    # A list of {"name", "args", "stdin"}, or {"startup": {...}, "workloads": [...]}
+    if not path:
+        return DEFAULT_WORKLOADS, None
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return data, None
+    return data.get("workloads", DEFAULT_WORKLOADS), data.get("startup")
+
+
+def find_binary(command):
+    # The executable Nuitka produced for a command, None for --module builds or when it is missing
+    if "--module" in command:
+        return None
+    output_dir = next(arg.split("=", 1)[1] for arg in command if arg.startswith("--output-dir="))
+    stem = os.path.splitext(os.path.basename(command[-1]))[0]
+    output_filename = next((arg.split("=", 1)[1] for arg in command if arg.startswith("--output-filename=")), None)
+    suffixes = [".exe"] if sys.platform == "win32" else [".bin", ""]
+
+    names = [output_filename] if output_filename else []
+    names += [stem + suffix for suffix in suffixes]
+    candidates = []
+    if "--standalone" in command and "--onefile" not in command:
+        candidates += [os.path.join(output_dir, stem + ".dist", name) for name in names]
+    candidates += [os.path.join(output_dir, name) for name in names]
+    for candidate in candidates:
+        if os.path.isfile(candidate) and os.access(candidate, os.X_OK):
+            return candidate
+    return None
+
+
+def profile_label(command):
+    flags = [arg for arg in command[3:-1] if not arg.startswith(LABEL_IGNORED_PREFIXES)]
+    return " ".join(flags) or "(default options)"
+
+
+def exit_code(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def run_once(argv, stdin_data="", timeout=60, cwd=None):
+    # Wall time, time to the first byte of output and peak RSS of one run
+    start = time.perf_counter()
+    process = subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, cwd=cwd)
+    timer = threading.Timer(timeout, process.kill)
+    timer.start()
+
+    def feed_stdin():
+        try:
+            if stdin_data:
+                process.stdin.write(stdin_data.encode())
+            process.stdin.close()
+        except OSError:
+            pass
+
+    threading.Thread(target=feed_stdin, daemon=True).start()
+
+    peak_rss = [0]
+    if psutil is not None and not hasattr(os, "wait4"):
+        # Windows: the peak working set can only be read while the process exists
+        def sample():
+            try:
+                ps_process = psutil.Process(process.pid)
+                while process.poll() is None:
+                    info = ps_process.memory_info()
+                    peak_rss[0] = max(peak_rss[0], getattr(info, "peak_wset", info.rss))
+                    time.sleep(0.01)
+            except psutil.Error:
+                pass
+        threading.Thread(target=sample, daemon=True).start()
+
+    first = process.stdout.read(1)
+    first_output = time.perf_counter() - start if first else None
+    process.stdout.read()
+
+    if hasattr(os, "wait4"):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = exit_code(status)
+        # ru_maxrss is in KB on Linux and in bytes on macOS
+        peak_rss[0] = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+    else:
+        process.wait()
+    wall = time.perf_counter() - start
+    timer.cancel()
+    return {"wall": wall, "first_output": first_output, "peak_rss": peak_rss[0] or None, "returncode": process.returncode}
+
+
+def summarize(values):
+    values = sorted(value for value in values if value is not None)
+    if not values:
+        return None
+    p95_index = min(len(values) - 1, int(round(0.95 * (len(values) - 1))))
+    return {
+        "median": statistics.median(values),
+        "p95": values[p95_index],
+        "stddev": statistics.stdev(values) if len(values) > 1 else 0.0,
+        "min": values[0],
+        "runs": len(values),
+    }
+
+
+def measure(argv, workload, warmup, repeats, timeout, cwd):
+    for _ in range(warmup):
+        run_once(argv + workload.get("args", []), workload.get("stdin", ""), timeout, cwd)
+    runs = [run_once(argv + workload.get("args", []), workload.get("stdin", ""), timeout, cwd) for _ in range(repeats)]
+    return {
+        "wall": summarize(run["wall"] for run in runs),
+        "first_output": summarize(run["first_output"] for run in runs),
+        "peak_rss": max((run["peak_rss"] or 0) for run in runs) or None,
+        "failures": sum(1 for run in runs if run["returncode"] != 0),
+    }
+
+
+def run_benchmark(command, tool_options, on_line):
+    # Compares the built executable with "python script.py" on the configured workloads and stores the results
+    binary = find_binary(command)
+    if binary is None:
+        on_line("Benchmark skipped: no executable was found for this build.\n")
+        return None
+
+    workloads, startup = load_workloads(tool_options.get("benchmark_workloads"))
+    warmup = int(tool_options.get("benchmark_warmup") or 1)
+    repeats = max(int(tool_options.get("benchmark_repeats") or 5), 1)
+    timeout = float(tool_options.get("benchmark_timeout") or 60)
+    script = command[-1]
+    cwd = os.path.dirname(script)
+    targets = (("compiled", [binary]), ("cpython", [command[0], script]))
+
+    on_line(f"Benchmarking {binary} against CPython ({len(workloads)} workload(s), {warmup} warmup and {repeats} measured runs each)...\n")
+    results = {"workloads": {}, "startup": {}}
+    for workload in workloads:
+        name = workload.get("name", " ".join(workload.get("args", [])))
+        results["workloads"][name] = {target: measure(argv, workload, warmup, repeats, timeout, cwd) for target, argv in targets}
+        on_line(format_workload(name, results["workloads"][name]))
+
+    # Startup latency: a dedicated quick workload when configured, otherwise time to first output
+    for target, argv in targets:
+        if startup:
+            measured = measure(argv, startup, warmup, repeats, timeout, cwd)["wall"]
+        else:
+            first = next(iter(results["workloads"].values()), {}).get(target, {})
+            measured = first.get("first_output")
+        results["startup"][target] = measured
+    if results["startup"]["compiled"] and results["startup"]["cpython"]:
+        on_line(f"  startup: compiled {results['startup']['compiled']['median'] * 1000:.1f} ms, "
+                f"CPython {results['startup']['cpython']['median'] * 1000:.1f} ms\n")
+
+    save_result(command, binary, results)
+    return results
+
+
+def format_workload(name, result):
+    compiled, cpython = result["compiled"]["wall"], result["cpython"]["wall"]
+    line = (f"  {name}: compiled median {compiled['median'] * 1000:.1f} ms (p95 {compiled['p95'] * 1000:.1f}, sd {compiled['stddev'] * 1000:.1f}), "
+            f"CPython median {cpython['median'] * 1000:.1f} ms")
+    if compiled["median"] > 0:
+        line += f", {cpython['median'] / compiled['median']:.2f}x"
+    if result["compiled"]["peak_rss"] and result["cpython"]["peak_rss"]:
+        line += f", peak RSS {format_bytes(result['compiled']['peak_rss'])} vs {format_bytes(result['cpython']['peak_rss'])}"
+    if result["compiled"]["failures"]:
+        line += f", {result['compiled']['failures']} failed run(s)"
+    return line + "\n"
+
+
+def results_path():
+    return os.path.join(app_data_dir(), "benchmarks.json")
+
+
+def load_results():
+    try:
+        with open(results_path(), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_result(command, binary, results):
+    # One entry per settings profile, the latest run replaces the previous one
+    with history_lock:
+        stored = load_results()
+        stored[timing_key(command)] = {
+            "label": profile_label(command),
+            "script": command[-1],
+            "binary": binary,
+            "binary_size": os.path.getsize(binary),
+            "time": time.time(),
+            "results": results,
+        }
+        with open(results_path(), 'w') as f:
+            json.dump(stored, f, indent=4)
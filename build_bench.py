@@ -0,0 +1,366 @@
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import time
+from collections import deque
+
+from benchmark import find_binary
+from build_cache import dir_size
+from build_profiler import format_bytes, profiling_available
+from build_progress import BuildProgress
+from nuitka_core import NUITKA_NOT_FOUND, app_data_dir, default_options, default_tool_options, run_build, settings_command
+from onefile import dist_dir_for
+
+# Allowed growth in percent before a metric counts as a regression, "bench --time-threshold=..." etc. override them
+DEFAULT_THRESHOLDS = {"time": 10.0, "memory": 15.0, "size": 5.0}
+# Smaller differences are noise, whatever the percentage (seconds, bytes, bytes)
+NOISE_FLOORS = {"time": 0.5, "memory": 16 * 1024 * 1024, "size": 4096}
+# Runs kept in build-bench-history.json
+MAX_RECORDED_RUNS = 200
+# Output lines shown when a fixture fails to build
+FAILURE_TAIL_LINES = 20
+
+MODULE_TEMPLATE = '''# Generated build benchmark fixture, module {index}
+import json
+import math
+
+
+class Shape{index}:
+    def __init__(self, size):
+        self.size = size
+
+    def area(self):
+        return math.pi * self.size ** 2
+
+    def describe(self):
+        return json.dumps({{"shape": {index}, "area": round(self.area(), 3)}})
+
+
+def fibonacci_{index}(count):
+    values = [0, 1]
+    while len(values) < count:
+        values.append(values[-1] + values[-2])
+    return values[:count]
+
+
+def histogram_{index}(words):
+    counts = {{}}
+    for word in words:
+        counts[word] = counts.get(word, 0) + 1
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+
+
+def run():
+    shapes = [Shape{index}(size) for size in range(1, 6)]
+    total = sum(shape.area() for shape in shapes) + sum(fibonacci_{index}(20))
+    return total, histogram_{index}("a b a c b a".split())[0], shapes[-1].describe()
+'''
+
+HELLO_SOURCE = 'print("Hello from the build benchmark")\n'
+
+
+def main_source(imports, modules):
+    lines = ["# Generated build benchmark fixture"] + imports + ["", ""]
+    lines.append("results = [module.run() for module in (" + ", ".join(modules) + ",)]")
+    lines.append('print(len(results), "modules ran")')
+    return "\n".join(lines) + "\n"
+
+
+def hello_sources():
+    return {"main.py": HELLO_SOURCE}
+
+
+def module_sources(count=12):
+    # A script with count local modules next to it
+    modules = [f"module_{index:02d}" for index in range(count)]
+    sources = {f"{module}.py": MODULE_TEMPLATE.format(index=index) for index, module in enumerate(modules)}
+    sources["main.py"] = main_source([f"import {module}" for module in modules], modules)
+    return sources
+
+
+def package_sources(packages=4, modules=8):
+    # An application package with packages sub-packages of modules modules each
+    sources = {os.path.join("app", "__init__.py"): ""}
+    imports, names = [], []
+    for package in range(packages):
+        sources[os.path.join("app", f"package_{package}", "__init__.py")] = ""
+        for module in range(modules):
+            index = package * modules + module
+            sources[os.path.join("app", f"package_{package}", f"module_{module}.py")] = MODULE_TEMPLATE.format(index=index)
+            imports.append(f"from app.package_{package} import module_{module} as module_{index:02d}")
+            names.append(f"module_{index:02d}")
+    sources["main.py"] = main_source(imports, names)
+    return sources
+
+
+# (name, description, sources, Nuitka options), from the smallest build to the largest
+FIXTURES = [
+    ("hello", "single print script", hello_sources, {}),
+    ("modules", "script with 12 local modules", module_sources, {"--follow-imports": True}),
+    ("packages", "app with 4 packages of 8 modules", package_sources, {"--follow-imports": True}),
+    ("standalone", "single script as a standalone .dist folder", hello_sources, {"--standalone": True}),
+]
+FIXTURE_NAMES = [name for name, description, sources, options in FIXTURES]
+
+
+def write_fixture(directory, sources):
+    # The same sources on every run, so only Nuitka, Python and the machine can change the results
+    shutil.rmtree(directory, ignore_errors=True)
+    for relative_path, source in sources.items():
+        path = os.path.join(directory, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(source)
+    return os.path.join(directory, "main.py")
+
+
+def bench_tool_options(work_dir):
+    # Every build compiles from scratch: no build cache, no compiler cache, nothing that benchmarks or analyzes afterwards
+    tool_options = default_tool_options()
+    tool_options.update({
+        "cache_enabled": False,
+        "ccache_enabled": False,
+        "history_enabled": False,
+        "benchmark_enabled": False,
+        "dist_analysis_enabled": False,
+        "remote_workers": "",
+        "profile_enabled": profiling_available(),
+        "profile_interval": "0.2",
+        "profile_dir": os.path.join(work_dir, "profiles"),
+    })
+    return tool_options
+
+
+def artifact_size(command):
+    # Size of the .dist folder of standalone builds, of the executable otherwise
+    dist_dir = dist_dir_for(command)
+    if "--standalone" in command and "--onefile" not in command and os.path.isdir(dist_dir):
+        return dir_size(dist_dir)
+    binary = find_binary(command)
+    return os.path.getsize(binary) if binary else None
+
+
+def median(values):
+    values = [value for value in values if value is not None]
+    return statistics.median(values) if values else None
+
+
+def build_fixture(fixture, work_dir, on_line):
+    # One clean build of a fixture the way confirm_compilation runs it: settings -> command -> run_build
+    name, description, sources, options = fixture
+    fixture_dir = os.path.join(work_dir, name)
+    settings = {
+        "file_path": write_fixture(os.path.join(fixture_dir, "src"), sources()),
+        "output_dir": os.path.join(fixture_dir, "build"),
+        "options": dict(default_options(), **dict(options, **{"--disable-ccache": True})),
+        "tool_options": bench_tool_options(work_dir),
+    }
+    shutil.rmtree(settings["output_dir"], ignore_errors=True)
+    os.makedirs(settings["output_dir"])
+    command = settings_command(settings)
+    progress = BuildProgress(command)
+    profilers = []
+    started = time.perf_counter()
+    returncode = run_build(command, settings["tool_options"], on_line, progress, on_profiler=profilers.append)
+    run = {
+        "returncode": returncode,
+        "wall": time.perf_counter() - started,
+        "phases": dict(progress.durations),
+        "peak_rss": (profilers[0].summary()["peak_rss"] or None) if profilers else None,
+    }
+    if returncode == 0:
+        run["size"] = artifact_size(command)
+    return run
+
+
+def bench_fixture(fixture, work_dir, repeats=1, on_line=None):
+    # Medians of repeats clean builds, {"returncode": ...} alone when a build fails
+    tail = deque(maxlen=FAILURE_TAIL_LINES)
+
+    def feed(line):
+        tail.append(line)
+        if on_line:
+            on_line(line)
+
+    runs = []
+    for repeat in range(repeats):
+        run = build_fixture(fixture, work_dir, feed)
+        if run["returncode"] != 0:
+            return {"returncode": run["returncode"], "output": "".join(tail)}
+        runs.append(run)
+    phases = [phase for run in runs for phase in run["phases"] if phase]
+    return {
+        "returncode": 0,
+        "runs": len(runs),
+        "wall": median(run["wall"] for run in runs),
+        "phases": {phase: median(run["phases"].get(phase) for run in runs) for phase in dict.fromkeys(phases)},
+        "peak_rss": median(run["peak_rss"] for run in runs),
+        "size": runs[-1]["size"],
+    }
+
+
+def environment():
+    from option_schema import nuitka_version
+
+    return {
+        "python": platform.python_version(),
+        "nuitka": nuitka_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def baseline_path():
+    return os.path.join(app_data_dir(), "build-baseline.json")
+
+
+def load_baseline(path):
+    # None when there is no baseline yet, ValueError naming the file when it cannot be used
+    try:
+        with open(path, 'r') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Cannot read the baseline {path}: {e}")
+    if not isinstance(baseline, dict) or not isinstance(baseline.get("fixtures"), dict):
+        raise ValueError(f"Cannot read the baseline {path}: no \"fixtures\" results in it")
+    return baseline
+
+
+def save_results(path, results):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=4)
+
+
+def record_run(results):
+    # Appends the run to build-bench-history.json, to follow build times across Nuitka versions and machines
+    path = os.path.join(app_data_dir(), "build-bench-history.json")
+    try:
+        with open(path, 'r') as f:
+            runs = json.load(f)
+    except (OSError, ValueError):
+        runs = []
+    runs.append(results)
+    with open(path, 'w') as f:
+        json.dump(runs[-MAX_RECORDED_RUNS:], f, indent=1)
+    return path
+
+
+def fixture_metrics(metrics):
+    # (metric, kind, value) of one fixture's results
+    rows = [("wall", "time", metrics.get("wall"))]
+    rows += [(f"phase {phase}", "time", value) for phase, value in metrics.get("phases", {}).items()]
+    rows += [("peak memory", "memory", metrics.get("peak_rss")), ("size", "size", metrics.get("size"))]
+    return rows
+
+
+def compare_results(results, baseline, thresholds=None):
+    # (fixture, metric, kind, baseline value, current value, change in percent, significant, regressed) per metric both runs have,
+    # significant when the change is beyond the threshold and the noise floor in either direction
+    thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+    rows = []
+    for name, metrics in results["fixtures"].items():
+        if metrics["returncode"] != 0:
+            rows.append((name, "build", None, None, None, None, True, True))
+            continue
+        base = baseline["fixtures"].get(name)
+        if base is None or base["returncode"] != 0:
+            continue
+        base_values = {metric: value for metric, kind, value in fixture_metrics(base)}
+        for metric, kind, value in fixture_metrics(metrics):
+            previous = base_values.get(metric)
+            if value is None or not previous:
+                continue
+            change = (value - previous) * 100.0 / previous
+            significant = abs(change) > thresholds[kind] and abs(value - previous) > NOISE_FLOORS[kind]
+            rows.append((name, metric, kind, previous, value, change, significant, significant and change > 0))
+    return rows
+
+
+def format_value(kind, value):
+    return f"{value:.2f}s" if kind == "time" else format_bytes(value)
+
+
+def format_results(results):
+    text = ""
+    for name, metrics in results["fixtures"].items():
+        if metrics["returncode"] != 0:
+            text += f"  {name}: build failed (exit {metrics['returncode']})\n"
+            continue
+        parts = [f"{metric} {format_value(kind, value)}" for metric, kind, value in fixture_metrics(metrics) if value is not None]
+        text += f"  {name}: " + ", ".join(parts) + "\n"
+    return text
+
+
+def format_comparison(rows, results, baseline):
+    text = f"Compared with the baseline of {time.strftime('%Y-%m-%d %H:%M', time.localtime(baseline['time']))}"
+    changed = [f"{key} {baseline['environment'].get(key)} -> {value}" for key, value in results["environment"].items()
+               if baseline["environment"].get(key) != value]
+    text += " (" + ", ".join(changed) + "):\n" if changed else ":\n"
+    for name, metric, kind, previous, value, change, significant, regressed in rows:
+        if kind is None:
+            text += f"  {name}: build failed  REGRESSION\n"
+        elif significant or not metric.startswith("phase "):
+            # Phases only when they moved noticeably, to keep nightly logs short
+            verdict = "  REGRESSION" if regressed else "  improved" if significant else ""
+            text += f"  {name} {metric}: {format_value(kind, previous)} -> {format_value(kind, value)} ({change:+.1f}%){verdict}\n"
+    regressions = sum(1 for row in rows if row[-1])
+    text += f"{regressions} regression(s).\n" if regressions else "No regressions.\n"
+    return text
+
+
+def run_bench(fixture_names=None, repeats=1, baseline=None, save_baseline=False, thresholds=None, work_dir=None, verbose=False, out=None):
+    # Headless suite for nightly jobs: 0 when every fixture builds within the thresholds, 1 on a regression or failed build
+    out = out or sys.stdout
+    unknown = [name for name in fixture_names or [] if name not in FIXTURE_NAMES]
+    if unknown:
+        out.write(f"Unknown fixture(s) {', '.join(unknown)}, available: {', '.join(FIXTURE_NAMES)}\n")
+        return 2
+    fixtures = [fixture for fixture in FIXTURES if not fixture_names or fixture[0] in fixture_names]
+    work_dir = work_dir or os.path.join(app_data_dir(), "bench")
+    baseline = baseline or baseline_path()
+    # Read before building, a broken baseline should not cost a full benchmark run to find out
+    try:
+        previous = load_baseline(baseline)
+    except ValueError as e:
+        if not save_baseline:
+            out.write(f"{e}\nFix or delete it, or replace it with --save-baseline.\n")
+            return 2
+        out.write(f"{e}\nIt is replaced by this run.\n")
+        previous = None
+    results = {"time": time.time(), "environment": environment(), "repeats": repeats, "fixtures": {}}
+    if not profiling_available():
+        out.write("Peak memory is not measured, it needs the psutil package on this platform (pip install psutil).\n")
+
+    for fixture in fixtures:
+        name, description = fixture[:2]
+        out.write(f"Building {name} ({description}), {repeats} run(s)...\n")
+        try:
+            metrics = bench_fixture(fixture, work_dir, repeats, out.write if verbose else None)
+        except FileNotFoundError:
+            out.write(NUITKA_NOT_FOUND)
+            return 1
+        results["fixtures"][name] = metrics
+        if metrics["returncode"] != 0 and not verbose:
+            out.write(metrics["output"])
+    out.write("Results:\n" + format_results(results))
+    record_run(results)
+
+    failed = any(metrics["returncode"] != 0 for metrics in results["fixtures"].values())
+    if previous is not None and not save_baseline:
+        rows = compare_results(results, previous, thresholds)
+        out.write(format_comparison(rows, results, previous))
+        return 1 if any(row[-1] for row in rows) else 0
+    if failed:
+        out.write("Not saving a baseline with failed builds.\n")
+        return 1
+    if previous is not None:
+        # Keep the fixtures this run skipped
+        results["fixtures"] = dict(previous["fixtures"], **results["fixtures"])
+    save_results(baseline, results)
+    out.write(f"Baseline saved to {baseline}\n")
+    return 0
@@ -0,0 +1,280 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+from import_graph import find_module, imported_modules
+from nuitka_core import BuildRunner, app_data_dir
+
+# Command line arguments that do not change the produced artifact
+KEY_IGNORED_PREFIXES = ("--output-dir=", "--jobs=")
+# Nuitka intermediates that are never cached
+IGNORED_SUFFIXES = (".build", ".onefile-build")
+
+stats_lock = threading.Lock()
+
+
+def nuitka_version():
+    try:
+        from importlib.metadata import version
+        return version("nuitka")
+    except Exception:
+        return "unknown"
+
+
+def source_dependencies(file_path):
+    # Transitive local imports of the entry script, plus the location of everything else it imports
+    script_dir = os.path.dirname(os.path.abspath(file_path))
+    search_path = [script_dir] + [p for p in sys.path if p]
+    local, external = {}, {}
+    pending = [(os.path.abspath(file_path), None)]
+
+    while pending:
+        path, package = pending.pop()
+        if path in local:
+            continue
+        local[path] = True
+        try:
+            names = imported_modules(path, package)
+        except (OSError, SyntaxError, ValueError):
+            continue
+        for name in names:
+            spec = find_module(name, search_path)
+            if spec is None or not spec.origin or not os.path.isfile(spec.origin):
+                continue
+            origin = os.path.abspath(spec.origin)
+            if origin.startswith(script_dir + os.sep) and origin.endswith(".py"):
+                child_package = name if spec.submodule_search_locations else name.rpartition(".")[0]
+                pending.append((origin, child_package))
+            else:
+                top = name.split(".")[0]
+                external.setdefault(top, origin)
+    return sorted(local), external
+
+
+def hash_file(file_path, digest):
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+
+class BuildCache:
+    def __init__(self, cache_dir=None, max_size_mb=2048):
+        self.cache_dir = cache_dir or os.path.join(app_data_dir(), "build-cache")
+        self.max_size = int(max_size_mb) * 1024 * 1024
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, command, file_path):
+        digest = hashlib.sha256()
+        digest.update(sys.version.encode())
+        digest.update(nuitka_version().encode())
+
+        for arg in command[:-1]:
+            if not arg.startswith(KEY_IGNORED_PREFIXES):
+                digest.update(arg.encode() + b"\0")
+        digest.update(os.path.basename(file_path).encode() + b"\0")
+
+        local, external = source_dependencies(file_path)
+        script_dir = os.path.dirname(os.path.abspath(file_path))
+        for path in local:
+            digest.update(os.path.relpath(path, script_dir).encode() + b"\0")
+            hash_file(path, digest)
+        # Installed packages are identified by location and modification time, hashing them would take longer than a build
+        for name, origin in sorted(external.items()):
+            stat = os.stat(origin)
+            digest.update(f"{name}:{origin}:{stat.st_size}:{stat.st_mtime_ns}\0".encode())
+        return digest.hexdigest()
+
+    def entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def lookup(self, key):
+        meta_path = os.path.join(self.entry_dir(key), "meta.json")
+        if not os.path.isfile(meta_path):
+            return None
+        with open(meta_path, 'r') as f:
+            return json.load(f)
+
+    def snapshot(self, output_dir):
+        # Modification times of the top level output entries, used to find what a build produced
+        entries = {}
+        for entry in os.scandir(output_dir):
+            entries[entry.name] = entry.stat().st_mtime_ns
+        return entries
+
+    def store(self, key, output_dir, before, duration):
+        produced = [name for name, mtime in self.snapshot(output_dir).items()
+                    if before.get(name) != mtime and not name.endswith(IGNORED_SUFFIXES)]
+        if not produced:
+            return None
+
+        entry_dir = self.entry_dir(key)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        artifacts_dir = os.path.join(entry_dir, "artifacts")
+        os.makedirs(artifacts_dir)
+        for name in produced:
+            source = os.path.join(output_dir, name)
+            if os.path.isdir(source):
+                shutil.copytree(source, os.path.join(artifacts_dir, name), symlinks=True)
+            else:
+                shutil.copy2(source, os.path.join(artifacts_dir, name))
+
+        meta = {"entries": produced, "size": dir_size(artifacts_dir), "duration": duration,
+                "created": time.time(), "last_used": time.time()}
+        self.write_meta(key, meta)
+        self.evict()
+        return meta
+
+    def restore(self, key, output_dir):
+        meta = self.lookup(key)
+        artifacts_dir = os.path.join(self.entry_dir(key), "artifacts")
+        for name in meta["entries"]:
+            source = os.path.join(artifacts_dir, name)
+            target = os.path.join(output_dir, name)
+            if os.path.isdir(target) and not os.path.islink(target):
+                shutil.rmtree(target)
+            elif os.path.lexists(target):
+                os.remove(target)
+            if os.path.isdir(source):
+                shutil.copytree(source, target, symlinks=True)
+            else:
+                shutil.copy2(source, target)
+        meta["last_used"] = time.time()
+        self.write_meta(key, meta)
+        return meta
+
+    def write_meta(self, key, meta):
+        # Replaced in one step, queued builds may read it at the same time
+        import tempfile
+        handle, temporary_path = tempfile.mkstemp(prefix="meta.", suffix=".tmp", dir=self.entry_dir(key))
+        try:
+            with os.fdopen(handle, 'w') as f:
+                json.dump(meta, f, indent=4)
+            os.replace(temporary_path, os.path.join(self.entry_dir(key), "meta.json"))
+        except OSError:
+            os.remove(temporary_path)
+            raise
+
+    def entries(self):
+        entries = []
+        for shard in os.scandir(self.cache_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    meta = self.lookup(entry.name)
+                except (OSError, ValueError):
+                    # Unreadable entries are skipped, restoring them fails and drops them
+                    continue
+                if meta is not None:
+                    entries.append((entry.name, meta))
+        return entries
+
+    def evict(self):
+        # Drop the least recently used entries until the cache fits its size limit
+        entries = sorted(self.entries(), key=lambda item: item[1]["last_used"])
+        total = sum(meta["size"] for key, meta in entries)
+        evicted = 0
+        while entries and total > self.max_size:
+            key, meta = entries.pop(0)
+            shutil.rmtree(self.entry_dir(key), ignore_errors=True)
+            total -= meta["size"]
+            evicted += 1
+        return evicted
+
+    def record(self, hit, saved=0.0):
+        with stats_lock:
+            stats = self.stats()
+            stats["hits" if hit else "misses"] += 1
+            stats["time_saved"] += saved
+            try:
+                with open(os.path.join(self.cache_dir, "stats.json"), 'w') as f:
+                    json.dump(stats, f, indent=4)
+            except OSError:
+                # Statistics are informational, the build result does not depend on them
+                pass
+            return stats
+
+    def stats(self):
+        stats = {"hits": 0, "misses": 0, "time_saved": 0.0}
+        try:
+            with open(os.path.join(self.cache_dir, "stats.json"), 'r') as f:
+                stats.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        return stats
+
+
+def dir_size(path):
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            file_path = os.path.join(root, name)
+            if not os.path.islink(file_path):
+                total += os.path.getsize(file_path)
+    return total
+
+
+def format_stats(stats):
+    lookups = stats["hits"] + stats["misses"]
+    rate = stats["hits"] * 100.0 / lookups if lookups else 0.0
+    return f"hits {stats['hits']}, misses {stats['misses']}, {rate:.0f}% hit rate, {stats['time_saved']:.0f}s saved"
+
+
+def cached_build(command, tool_options, on_line, runner=None):
+    # Run a Nuitka command through the build cache when it is enabled, returns the exit code
+    runner = runner or BuildRunner(command)
+    if not tool_options.get("cache_enabled") or "--run" in command:
+        return runner.run(on_line)
+
+    file_path = command[-1]
+    output_dir = next(arg.split("=", 1)[1] for arg in command if arg.startswith("--output-dir="))
+    try:
+        max_size_mb = int(tool_options.get("cache_max_size_mb") or 2048)
+    except ValueError:
+        on_line(f"Invalid build cache size limit {tool_options['cache_max_size_mb']!r}, using 2048 MB.\n")
+        max_size_mb = 2048
+
+    start = time.time()
+    try:
+        cache = BuildCache(tool_options.get("cache_dir") or None, max_size_mb)
+        key = cache.key(command, file_path)
+    except (OSError, ValueError) as e:
+        # A cache that cannot be used must not cost the build, it runs as if caching was off
+        on_line(f"Build cache unavailable: {e}\n")
+        return runner.run(on_line)
+    try:
+        hit = cache.lookup(key) is not None
+    except (OSError, ValueError) as e:
+        on_line(f"Build cache entry unreadable, dropping it: {e}\n")
+        shutil.rmtree(cache.entry_dir(key), ignore_errors=True)
+        return runner.run(on_line)
+    if hit:
+        try:
+            meta = cache.restore(key, output_dir)
+            elapsed = time.time() - start
+            stats = cache.record(True, max(meta["duration"] - elapsed, 0.0))
+            on_line(f"Build cache hit: restored {', '.join(meta['entries'])} in {elapsed:.1f}s ({format_stats(stats)}).\n")
+            return 0
+        except (OSError, ValueError) as e:
+            # A broken entry is dropped and the build runs as if it was never cached
+            on_line(f"Build cache restore failed: {e}\n")
+            shutil.rmtree(cache.entry_dir(key), ignore_errors=True)
+            start = time.time()
+
+    before = cache.snapshot(output_dir)
+    returncode = runner.run(on_line)
+    stats = cache.record(False)
+    if returncode == 0:
+        try:
+            meta = cache.store(key, output_dir, before, time.time() - start)
+        except (OSError, ValueError) as e:
+            on_line(f"Build cache store failed: {e}\n")
+            shutil.rmtree(cache.entry_dir(key), ignore_errors=True)
+            return returncode
+        stored = f"stored {len(meta['entries'])} item(s), " if meta else ""
+        on_line(f"Build cache miss: {stored}{format_stats(stats)}.\n")
+    return returncode
@@ -0,0 +1,220 @@
+import contextlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from build_progress import timing_key
+from nuitka_core import app_data_dir
+
+# "Nuitka:WARNING: ...", "Nuitka-Plugins:INFO: ...", "Nuitka-Scons:ERROR: ..."
+NUITKA_PATTERN = re.compile(r"^(Nuitka(?:-[\w-]+)?):(INFO|WARNING|ERROR|FATAL)?:?\s?(.*)$")
+# C compiler and linker diagnostics, "file.c:12:3: warning: ..." and the like
+COMPILER_PATTERN = re.compile(r"\b(warning|error|fatal error)\b\s*(?:C\d+)?:", re.IGNORECASE)
+LEVELS = ("info", "warning", "error", "output")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    script TEXT NOT NULL,
+    command TEXT NOT NULL,
+    settings_hash TEXT NOT NULL,
+    started REAL NOT NULL,
+    finished REAL NOT NULL,
+    returncode INTEGER,
+    status TEXT NOT NULL,
+    phases TEXT NOT NULL,
+    warnings INTEGER NOT NULL,
+    errors INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    build_id INTEGER NOT NULL REFERENCES builds(id) ON DELETE CASCADE,
+    line INTEGER NOT NULL,
+    level TEXT NOT NULL,
+    source TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_build ON messages(build_id, level);
+CREATE INDEX IF NOT EXISTS builds_started ON builds(started);
+CREATE INDEX IF NOT EXISTS builds_settings ON builds(settings_hash);
+"""
+
+# External content FTS5 index over messages.text, kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(source, text, content='messages', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS messages_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts(rowid, source, text) VALUES (new.id, new.source, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, source, text) VALUES ('delete', old.id, old.source, old.text);
+END;
+"""
+
+write_lock = threading.Lock()
+
+
+def classify(line):
+    # (level, source, text) of one output line
+    text = line.rstrip("\r\n")
+    match = NUITKA_PATTERN.match(text)
+    if match:
+        level = (match.group(2) or "INFO").lower()
+        return "error" if level == "fatal" else level, match.group(1), match.group(3)
+    match = COMPILER_PATTERN.search(text)
+    if match:
+        return "warning" if match.group(1).lower() == "warning" else "error", "compiler", text
+    return "output", "", text
+
+
+def fts_query(query):
+    # Every word must match, each one quoted so "numpy.core" or "--lto" are not read as FTS syntax
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+class BuildHistory:
+    # SQLite store of every build's command, status, phase timings and classified output
+    def __init__(self, path=None):
+        self.path = path or os.path.join(app_data_dir(), "builds.sqlite3")
+        with self.connect() as connection:
+            connection.executescript(SCHEMA)
+            try:
+                connection.executescript(FTS_SCHEMA)
+                self.fts = True
+            except sqlite3.OperationalError:
+                # SQLite built without FTS5, searches fall back to LIKE
+                self.fts = False
+
+    @contextlib.contextmanager
+    def connect(self):
+        # One short-lived connection per operation, so builds on other threads can write at the same time
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def record(self, command, started, finished, returncode, status, phases, lines, max_builds=None):
+        messages = [(index,) + classify(line) for index, line in enumerate(lines, 1)]
+        warnings = sum(1 for message in messages if message[1] == "warning")
+        errors = sum(1 for message in messages if message[1] == "error")
+        with write_lock, self.connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO builds (script, command, settings_hash, started, finished, returncode, status, phases, warnings, errors) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (command[-1], json.dumps(command), timing_key(command), started, finished, returncode, status,
+                 json.dumps(phases), warnings, errors))
+            build_id = cursor.lastrowid
+            connection.executemany("INSERT INTO messages (build_id, line, level, source, text) VALUES (?, ?, ?, ?, ?)",
+                                   [(build_id,) + message for message in messages])
+            if max_builds:
+                connection.execute("DELETE FROM builds WHERE id NOT IN (SELECT id FROM builds ORDER BY started DESC LIMIT ?)", (max_builds,))
+        return build_id
+
+    def builds(self, limit=500):
+        with self.connect() as connection:
+            return [dict(row) for row in connection.execute("SELECT * FROM builds ORDER BY started DESC LIMIT ?", (limit,))]
+
+    def build(self, build_id):
+        with self.connect() as connection:
+            row = connection.execute("SELECT * FROM builds WHERE id = ?", (build_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"No build with id {build_id}")
+        build = dict(row)
+        build["command"] = json.loads(build["command"])
+        build["phases"] = json.loads(build["phases"])
+        return build
+
+    def messages(self, build_id, levels=("warning", "error")):
+        with self.connect() as connection:
+            return [dict(row) for row in connection.execute(
+                f"SELECT * FROM messages WHERE build_id = ? AND level IN ({', '.join('?' * len(levels))}) ORDER BY line",
+                (build_id,) + tuple(levels))]
+
+    def search(self, query, level=None, limit=200):
+        # Matching lines of all stored builds, newest build first
+        if not query.strip():
+            return []
+        level_filter = " AND messages.level = ?" if level else ""
+        with self.connect() as connection:
+            if self.fts:
+                sql = ("SELECT messages.*, builds.script, builds.started FROM messages_fts "
+                       "JOIN messages ON messages.id = messages_fts.rowid JOIN builds ON builds.id = messages.build_id "
+                       f"WHERE messages_fts MATCH ?{level_filter} ORDER BY builds.started DESC, messages.line LIMIT ?")
+                parameters = [fts_query(query)]
+            else:
+                terms = query.split()
+                sql = ("SELECT messages.*, builds.script, builds.started FROM messages JOIN builds ON builds.id = messages.build_id WHERE "
+                       + " AND ".join("(messages.source || ' ' || messages.text) LIKE ? ESCAPE '\\'" for _ in terms)
+                       + f"{level_filter} ORDER BY builds.started DESC, messages.line LIMIT ?")
+                parameters = ["%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%" for term in terms]
+            parameters += ([level] if level else []) + [limit]
+            return [dict(row) for row in connection.execute(sql, parameters)]
+
+    def compare(self, first_id, second_id):
+        # Phase timings side by side and the warnings/errors only one of the two builds has
+        first, second = self.build(first_id), self.build(second_id)
+        phases = list(first["phases"]) + [name for name in second["phases"] if name not in first["phases"]]
+        first_messages = {(message["level"], message["text"]) for message in self.messages(first_id)}
+        second_messages = {(message["level"], message["text"]) for message in self.messages(second_id)}
+        return {
+            "builds": (first, second),
+            "phases": [(name, first["phases"].get(name), second["phases"].get(name)) for name in phases],
+            "only_first": sorted(first_messages - second_messages),
+            "only_second": sorted(second_messages - first_messages),
+            "common": len(first_messages & second_messages),
+        }
+
+
+class BuildRecorder:
+    # Collects one build's output and stores it when the build is done
+    def __init__(self, command, tool_options):
+        self.command = command
+        self.enabled = bool(tool_options.get("history_enabled"))
+        try:
+            self.max_builds = int(tool_options.get("history_max_builds") or 0)
+        except ValueError:
+            # Unlimited, like an empty setting
+            self.max_builds = 0
+        self.started = time.time()
+        self.lines = []
+
+    def feed(self, line):
+        if self.enabled:
+            self.lines.append(line)
+
+    def finish(self, returncode, phases=None, cancelled=False):
+        if not self.enabled:
+            return None
+        status = "cancelled" if cancelled else "succeeded" if returncode == 0 else "failed"
+        try:
+            return BuildHistory().record(self.command, self.started, time.time(), returncode, status, phases or {}, self.lines, self.max_builds)
+        except sqlite3.Error:
+            return None
+
+
+def format_build(build):
+    return (f"#{build['id']} {time.strftime('%Y-%m-%d %H:%M', time.localtime(build['started']))} "
+            f"{os.path.basename(build['script'])} {build['status']} in {build['finished'] - build['started']:.1f}s, "
+            f"{build['warnings']} warning(s), {build['errors']} error(s)")
+
+
+def format_comparison(comparison):
+    first, second = comparison["builds"]
+    text = f"A: {format_build(first)}\nB: {format_build(second)}\n\nPhase timings:\n"
+    for name, first_duration, second_duration in comparison["phases"]:
+        a = f"{first_duration:.1f}s" if first_duration is not None else "-"
+        b = f"{second_duration:.1f}s" if second_duration is not None else "-"
+        delta = f" ({second_duration - first_duration:+.1f}s)" if first_duration is not None and second_duration is not None else ""
+        text += f"  {name:<14} {a:>9} {b:>9}{delta}\n"
+    for key, label in (("only_first", "Only in A"), ("only_second", "Only in B")):
+        text += f"\n{label} ({len(comparison[key])}):\n"
+        text += "".join(f"  [{level}] {message}\n" for level, message in comparison[key])
+    text += f"\n{comparison['common']} warning(s)/error(s) in both builds.\n"
+    return text
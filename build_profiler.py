@@ -0,0 +1,191 @@
+import csv
+import json
+import os
+import threading
+import time
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Process names counted as C compiler children of the Nuitka backend
+COMPILER_NAMES = ("gcc", "g++", "cc", "cc1", "cc1plus", "clang", "clang++", "ccache", "cl.exe", "link.exe", "ld", "as", "collect2", "zig")
+
+SAMPLE_FIELDS = ["t", "phase", "cpu_percent", "rss", "read_bytes", "write_bytes", "processes", "compilers"]
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def profiling_available():
+    return psutil is not None or os.path.isdir("/proc/self")
+
+
+def is_compiler(name):
+    return name.lower() in COMPILER_NAMES or name.lower().endswith(("-gcc", "-g++"))
+
+
+def psutil_tree(pid):
+    # (pid, name, cpu seconds, rss, read bytes, write bytes) for a process and all its children
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return []
+    tree = []
+    for process in processes:
+        try:
+            with process.oneshot():
+                cpu = process.cpu_times()
+                io = process.io_counters() if hasattr(process, "io_counters") else None
+                tree.append((process.pid, process.name(), cpu.user + cpu.system, process.memory_info().rss,
+                             io.read_bytes if io else 0, io.write_bytes if io else 0))
+        except psutil.Error:
+            continue
+    return tree
+
+
+def proc_stat(pid):
+    with open(f"/proc/{pid}/stat", 'r') as f:
+        data = f.read()
+    # The command name is in parentheses and may contain spaces
+    name = data[data.index("(") + 1:data.rindex(")")]
+    fields = data[data.rindex(")") + 2:].split()
+    ppid = int(fields[1])
+    cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    rss = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+    return name, ppid, cpu, rss
+
+
+def proc_io(pid):
+    try:
+        with open(f"/proc/{pid}/io", 'r') as f:
+            values = dict(line.split(": ") for line in f.read().splitlines())
+        return int(values["read_bytes"]), int(values["write_bytes"])
+    except (OSError, KeyError, ValueError):
+        return 0, 0
+
+
+def proc_tree(pid):
+    # Linux fallback without psutil, children are found through the parent pid of every process
+    stats = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                stats[int(entry)] = proc_stat(entry)
+            except (OSError, ValueError, IndexError):
+                continue
+    if pid not in stats:
+        return []
+
+    children = {}
+    for child, (name, ppid, cpu, rss) in stats.items():
+        children.setdefault(ppid, []).append(child)
+
+    tree = []
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        name, ppid, cpu, rss = stats[current]
+        tree.append((current, name, cpu, rss) + proc_io(current))
+        pending.extend(children.get(current, []))
+    return tree
+
+
+class ResourceProfiler:
+    # Samples CPU, RSS, I/O and child processes of a build's whole process tree
+    def __init__(self, interval=0.5, phase_getter=None):
+        self.interval = interval
+        self.phase_getter = phase_getter
+        self.samples = []
+        self.pid = None
+        self.started = None
+        self.cpu_seen = {}
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self, process):
+        # Called with the Popen object as soon as the build process exists
+        self.pid = process.pid
+        self.started = time.time()
+        self.thread = threading.Thread(target=self.sample_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+        return self.samples
+
+    def sample_loop(self):
+        last_time = time.time()
+        while not self.stop_event.wait(self.interval):
+            now = time.time()
+            self.sample(now, now - last_time)
+            last_time = now
+
+    def sample(self, now, elapsed):
+        tree = psutil_tree(self.pid) if psutil is not None else proc_tree(self.pid)
+        if not tree:
+            return
+
+        # CPU time is tracked per pid, so children that exit between samples do not produce negative deltas
+        cpu_delta = 0.0
+        for pid, name, cpu, rss, read_bytes, write_bytes in tree:
+            cpu_delta += max(cpu - self.cpu_seen.get(pid, 0.0), 0.0)
+            self.cpu_seen[pid] = cpu
+
+        self.samples.append({
+            "t": round(now - self.started, 3),
+            "phase": self.phase_getter() if self.phase_getter else "",
+            "cpu_percent": round(cpu_delta * 100.0 / elapsed, 1) if elapsed > 0 else 0.0,
+            "rss": sum(item[3] for item in tree),
+            "read_bytes": sum(item[4] for item in tree),
+            "write_bytes": sum(item[5] for item in tree),
+            "processes": len(tree) - 1,
+            "compilers": sum(1 for item in tree if is_compiler(item[1])),
+        })
+
+    def summary(self):
+        summary = {"samples": len(self.samples), "peak_rss": 0, "average_cpu_percent": 0.0, "peak_processes": 0, "phases": {}}
+        if not self.samples:
+            return summary
+        summary["peak_rss"] = max(sample["rss"] for sample in self.samples)
+        summary["average_cpu_percent"] = round(sum(sample["cpu_percent"] for sample in self.samples) / len(self.samples), 1)
+        summary["peak_processes"] = max(sample["processes"] for sample in self.samples)
+        for sample in self.samples:
+            phase = summary["phases"].setdefault(sample["phase"], {"samples": 0, "cpu_percent": 0.0, "peak_rss": 0})
+            phase["samples"] += 1
+            phase["cpu_percent"] += sample["cpu_percent"]
+            phase["peak_rss"] = max(phase["peak_rss"], sample["rss"])
+        for phase in summary["phases"].values():
+            phase["cpu_percent"] = round(phase["cpu_percent"] / phase["samples"], 1)
+            phase["seconds"] = round(phase["samples"] * self.interval, 1)
+        return summary
+
+    def save(self, base_path, command=None):
+        # Writes <base_path>.json (summary and samples) and <base_path>.csv (samples), returns both paths
+        json_path, csv_path = base_path + ".json", base_path + ".csv"
+        with open(json_path, 'w') as f:
+            json.dump({"command": command, "interval": self.interval, "summary": self.summary(), "samples": self.samples}, f, indent=4)
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SAMPLE_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.samples)
+        return json_path, csv_path
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024.0
+
+
+def format_summary(summary):
+    text = (f"Resource profile: peak RSS {format_bytes(summary['peak_rss'])}, average CPU {summary['average_cpu_percent']:.0f}%, "
+            f"up to {summary['peak_processes']} child processes.\n")
+    for name, phase in summary["phases"].items():
+        if name:
+            text += f"  {name}: {phase['seconds']:.1f}s, CPU {phase['cpu_percent']:.0f}%, peak RSS {format_bytes(phase['peak_rss'])}\n"
+    return text
@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from nuitka_core import app_data_dir
+
+# Nuitka build phases in order: (name, label, line that starts the phase, default share of the build time)
+PHASES = [
+    ("startup", "Starting", None, 0.03),
+    ("optimization", "Optimizing modules", re.compile(r"Starting Python compilation"), 0.35),
+    ("generation", "Generating C code", re.compile(r"Completed Python level compilation|Generating source code for C backend"), 0.07),
+    ("compilation", "Compiling C files", re.compile(r"Running C compilation via Scons|Backend C compiler:"), 0.45),
+    ("linking", "Linking", re.compile(r"Backend linking program"), 0.07),
+    ("packaging", "Packaging", re.compile(r"Nuitka-Onefile:|Creating single file|Copying .*(?:DLL|dll|extension module)|Including .* DLLs?"), 0.03),
+]
+PHASE_NAMES = [name for name, label, pattern, weight in PHASES]
+
+# Work items counted inside a phase
+MODULE_PATTERN = re.compile(r"module '([\w.]+)'|Optimizing module '?([\w.]+)")
+C_FILE_PATTERN = re.compile(r"\s-c\s+\S+\.c\b|\S+\.c\s*$")
+C_FILES_TOTAL_PATTERN = re.compile(r"(?:Compiled|compiling) (\d+) C files")
+FINISHED_PATTERN = re.compile(r"Successfully created|Compilation successful\.")
+
+# Runs kept per settings for the averages
+HISTORY_SIZE = 10
+
+history_lock = threading.Lock()
+
+
+def timing_key(command):
+    # Same options and entry script share a timing history, the output folder does not matter
+    digest = hashlib.sha256()
+    for arg in command[1:]:
+        if not arg.startswith("--output-dir="):
+            digest.update(arg.encode() + b"\0")
+    return digest.hexdigest()[:16]
+
+
+def history_path():
+    return os.path.join(app_data_dir(), "timings.json")
+
+
+def load_history(key):
+    try:
+        with open(history_path(), 'r') as f:
+            return json.load(f).get(key, [])
+    except (OSError, ValueError):
+        return []
+
+
+def save_history(key, run):
+    with history_lock:
+        try:
+            with open(history_path(), 'r') as f:
+                history = json.load(f)
+        except (OSError, ValueError):
+            history = {}
+        history[key] = (history.get(key, []) + [run])[-HISTORY_SIZE:]
+        # Replaced in one step, other processes may read it while this one writes; an unwritable app data
+        # folder only costs the next build its ETA
+        import tempfile
+        try:
+            path = history_path()
+            handle, temporary_path = tempfile.mkstemp(prefix="timings.", suffix=".tmp", dir=os.path.dirname(path))
+            try:
+                with os.fdopen(handle, 'w') as f:
+                    json.dump(history, f, indent=4)
+                os.replace(temporary_path, path)
+            except OSError:
+                os.remove(temporary_path)
+                raise
+        except OSError:
+            pass
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+class BuildProgress:
+    # Tracks which Nuitka phase a build is in and estimates progress and ETA from previous runs of the same settings
+    def __init__(self, command, clock=time.time):
+        self.clock = clock
+        self.key = timing_key(command)
+        self.history = load_history(self.key)
+        self.expected = self.average_history()
+        self.started = clock()
+        self.phase = 0
+        self.phase_started = self.started
+        self.durations = {}
+        self.items = {name: 0 for name in PHASE_NAMES}
+        self.items_total = {}
+        self.cached = False
+        self.finished = False
+
+    def average_history(self):
+        # Average duration and item count of each phase over the stored runs
+        expected = {}
+        for name in PHASE_NAMES:
+            runs = [run[name] for run in self.history if name in run]
+            if runs:
+                expected[name] = {
+                    "duration": sum(run["duration"] for run in runs) / len(runs),
+                    "items": sum(run["items"] for run in runs) / len(runs),
+                }
+        return expected
+
+    def feed(self, line):
+        if line.startswith("Build cache hit"):
+            self.cached = True
+            self.finished = True
+            return
+
+        if FINISHED_PATTERN.search(line):
+            self.finished = True
+
+        for index in range(len(PHASES) - 1, self.phase, -1):
+            pattern = PHASES[index][2]
+            if pattern.search(line):
+                self.enter_phase(index)
+                break
+
+        name = PHASE_NAMES[self.phase]
+        if name == "optimization" and MODULE_PATTERN.search(line):
+            self.items[name] += 1
+        elif name == "compilation":
+            match = C_FILES_TOTAL_PATTERN.search(line)
+            if match:
+                self.items_total[name] = int(match.group(1))
+            elif C_FILE_PATTERN.search(line):
+                self.items[name] += 1
+
+    def phase_name(self):
+        return PHASE_NAMES[self.phase]
+
+    def enter_phase(self, index):
+        now = self.clock()
+        self.durations[PHASE_NAMES[self.phase]] = now - self.phase_started
+        self.phase = index
+        self.phase_started = now
+
+    def finish(self, success):
+        # Store the phase timings of a completed, non-cached build
+        now = self.clock()
+        self.durations[PHASE_NAMES[self.phase]] = now - self.phase_started
+        self.finished = True
+        if success and not self.cached:
+            run = {name: {"duration": duration, "items": self.items_total.get(name, self.items[name])}
+                   for name, duration in self.durations.items()}
+            save_history(self.key, run)
+
+    def phase_fraction(self):
+        # How far the current phase is, from work items when the count is known, otherwise from its usual duration
+        name = PHASE_NAMES[self.phase]
+        elapsed = self.clock() - self.phase_started
+        expected = self.expected.get(name)
+        total_items = self.items_total.get(name) or (expected["items"] if expected else 0)
+        if total_items and self.items[name]:
+            return min(self.items[name] / total_items, 0.99)
+        if expected and expected["duration"] > 0:
+            return min(elapsed / expected["duration"], 0.95)
+        # No history: approach the end of the phase asymptotically
+        return 1 - 1 / (1 + elapsed / 30.0)
+
+    def phase_weights(self):
+        if self.expected:
+            return {name: self.expected[name]["duration"] if name in self.expected else 0.0 for name in PHASE_NAMES}
+        return {name: weight for name, label, pattern, weight in PHASES}
+
+    def fraction(self):
+        if self.finished:
+            return 1.0
+        weights = self.phase_weights()
+        total = sum(weights.values()) or 1.0
+        done = sum(weights[name] for name in PHASE_NAMES[:self.phase])
+        done += weights[PHASE_NAMES[self.phase]] * self.phase_fraction()
+        return min(done / total, 0.99)
+
+    def eta(self):
+        # Seconds left, only known once this build has history
+        if self.finished or not self.expected:
+            return None
+        weights = self.phase_weights()
+        current = weights[PHASE_NAMES[self.phase]]
+        remaining = max(current - (self.clock() - self.phase_started), current * (1 - self.phase_fraction()))
+        return remaining + sum(weights[name] for name in PHASE_NAMES[self.phase + 1:])
+
+    def status(self):
+        if self.cached:
+            return "Restored from build cache"
+        if self.finished:
+            return "Finished"
+        name, label = PHASES[self.phase][:2]
+        status = label
+        total_items = self.items_total.get(name) or int(self.expected.get(name, {}).get("items", 0))
+        if self.items[name]:
+            status += f" ({self.items[name]}/{total_items})" if total_items else f" ({self.items[name]})"
+        eta = self.eta()
+        if eta is not None:
+            status += f", ETA {format_duration(eta)}"
+        return status
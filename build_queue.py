@@ -0,0 +1,133 @@
+import os
+import queue
+import threading
+import time
+
+from build_progress import BuildProgress
+from nuitka_core import NUITKA_NOT_FOUND, run_build
+
+
+def with_jobs(command, jobs):
+    # Replace (or add) the --jobs value of a "python -m nuitka ..." command
+    command = [arg for arg in command if not arg.startswith("--jobs=")]
+    return command[:3] + [f"--jobs={jobs}"] + command[3:]
+
+
+class BuildJob:
+    def __init__(self, name, command, tool_options=None):
+        self.name = name
+        self.command = command
+        self.tool_options = tool_options or {}
+        self.status = "queued"  # queued, running, succeeded, failed, cancelled
+        self.returncode = None
+        self.started = None
+        self.finished = None
+        self.lines = 0
+        self.progress = None
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+class BuildQueue:
+    def __init__(self, max_workers=2, cpu_count=None, events=None):
+        self.max_workers = max(1, int(max_workers))
+        self.cpu_count = cpu_count or os.cpu_count() or 1
+        # Events are (kind, job, data) tuples: "start", "line" and "finish"
+        self.events = events if events is not None else queue.Queue()
+        self.jobs = []
+        self.pending = queue.Queue()
+        self.workers = []
+        self.started = None
+        self.stopped = False
+
+    def add(self, job):
+        self.jobs.append(job)
+        self.pending.put(job)
+        return job
+
+    def jobs_per_build(self):
+        # Split the cores between the builds that will actually run at once
+        concurrent = max(1, min(self.max_workers, len(self.jobs)))
+        return max(1, self.cpu_count // concurrent)
+
+    def start(self):
+        self.started = time.time()
+        self.stopped = False
+        for _ in range(min(self.max_workers, len(self.jobs)) or 1):
+            worker = threading.Thread(target=self.worker_loop, daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self):
+        # Running builds finish, queued ones are cancelled
+        self.stopped = True
+        while True:
+            try:
+                job = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            job.status = "cancelled"
+            self.events.put(("finish", job, None))
+
+    def worker_loop(self):
+        while not self.stopped:
+            try:
+                job = self.pending.get_nowait()
+            except queue.Empty:
+                return
+            self.run_job(job)
+
+    def run_job(self, job):
+        job.status = "running"
+        job.started = time.time()
+        command = with_jobs(job.command, self.jobs_per_build())
+        job.progress = BuildProgress(command)
+        self.events.put(("start", job, command))
+        # Whatever happens, the job finishes: run_builds, run_sweep and the batch window wait for every "finish"
+        try:
+            job.returncode = run_build(command, job.tool_options, lambda line: self.on_line(job, line), job.progress)
+        except FileNotFoundError:
+            self.on_line(job, NUITKA_NOT_FOUND)
+            job.returncode = -1
+        except Exception as e:
+            self.on_line(job, f"Compilation failed: {e}\n")
+            job.returncode = -1
+        finally:
+            if job.returncode is None:
+                job.returncode = -1
+            job.finished = time.time()
+            job.status = "succeeded" if job.returncode == 0 else "failed"
+            self.events.put(("finish", job, job.returncode))
+
+    def on_line(self, job, line):
+        job.lines += 1
+        self.events.put(("line", job, line))
+
+    def counts(self):
+        counts = {"queued": 0, "running": 0, "succeeded": 0, "failed": 0, "cancelled": 0}
+        for job in self.jobs:
+            counts[job.status] += 1
+        return counts
+
+    def throughput(self):
+        # Finished builds per minute since the queue was started
+        done = [job for job in self.jobs if job.finished is not None]
+        if not done or self.started is None:
+            return 0.0
+        elapsed = max(time.time() - self.started, 1e-6)
+        return len(done) * 60.0 / elapsed
+
+    def eta(self):
+        # Seconds until the queue is drained, from the average finished build
+        done = [job.duration for job in self.jobs if job.finished is not None]
+        if not done:
+            return None
+        average = sum(done) / len(done)
+        running = [job for job in self.jobs if job.status == "running"]
+        queued = sum(1 for job in self.jobs if job.status == "queued")
+        remaining = sum(max(average - job.duration, 0.0) for job in running) + queued * average
+        return remaining / self.max_workers
@@ -0,0 +1,176 @@
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from nuitka_core import app_data_dir
+
+# Summary lines printed by Nuitka's Scons backend
+NUITKA_RESULT_PATTERN = re.compile(r"Cached C files \(using (\w+)\) with result '([^']+)': (\d+)")
+NUITKA_COMPILED_PATTERN = re.compile(r"Compiled (\d+) C files using (\w+)")
+
+# ccache --print-stats counters
+HIT_COUNTERS = ("direct_cache_hit", "preprocessed_cache_hit")
+MISS_COUNTERS = ("cache_miss",)
+
+# Builds kept in the dashboard history
+HISTORY_SIZE = 50
+
+history_lock = threading.Lock()
+
+
+def detect_ccache(configured=""):
+    # Configured binary, then PATH, then the copy Nuitka downloads on Windows
+    if configured:
+        return configured if os.path.isfile(configured) else None
+    for name in ("ccache", "clcache"):
+        path = shutil.which(name)
+        if path:
+            return path
+    if sys.platform == "win32" and os.environ.get("LOCALAPPDATA"):
+        pattern = os.path.join(os.environ["LOCALAPPDATA"], "Nuitka", "Nuitka", "Cache", "downloads", "ccache", "*", "*", "ccache.exe")
+        found = sorted(glob.glob(pattern))
+        if found:
+            return found[-1]
+    return None
+
+
+def is_clcache(binary):
+    return os.path.basename(binary).lower().startswith("clcache")
+
+
+def ccache_env(tool_options, binary, base_env=None):
+    # Environment for the Nuitka process, Nuitka picks the binary up from NUITKA_CCACHE_BINARY/NUITKA_CLCACHE_BINARY
+    env = dict(base_env if base_env is not None else os.environ)
+    if not binary:
+        return env
+    env["NUITKA_CLCACHE_BINARY" if is_clcache(binary) else "NUITKA_CCACHE_BINARY"] = binary
+    if tool_options.get("ccache_dir"):
+        env["CLCACHE_DIR" if is_clcache(binary) else "CCACHE_DIR"] = tool_options["ccache_dir"]
+    if tool_options.get("ccache_max_size"):
+        env["CCACHE_MAXSIZE"] = tool_options["ccache_max_size"]
+    return env
+
+
+def read_stats(binary, env):
+    # Counter name -> value from "ccache --print-stats" (ccache 4), None when unavailable
+    if not binary or is_clcache(binary):
+        return None
+    try:
+        output = subprocess.run([binary, "--print-stats"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                env=env, universal_newlines=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    stats = {}
+    for line in output.splitlines():
+        name, _, value = line.partition("\t")
+        if value.strip().isdigit():
+            stats[name] = int(value)
+    return stats or None
+
+
+def history_path():
+    return os.path.join(app_data_dir(), "ccache-history.json")
+
+
+def load_history():
+    try:
+        with open(history_path(), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"builds": [], "seconds_per_file": None}
+
+
+def save_history(entry, seconds_per_file):
+    with history_lock:
+        history = load_history()
+        history["builds"] = (history["builds"] + [entry])[-HISTORY_SIZE:]
+        if seconds_per_file is not None:
+            previous = history.get("seconds_per_file")
+            # Moving average, a single unusual build should not swing the estimate
+            history["seconds_per_file"] = seconds_per_file if previous is None else previous * 0.7 + seconds_per_file * 0.3
+        with open(history_path(), 'w') as f:
+            json.dump(history, f, indent=4)
+
+
+class CompilerCacheMonitor:
+    # Sets up ccache for one build and reports its hit rate afterwards
+    def __init__(self, tool_options):
+        self.tool_options = tool_options
+        self.enabled = bool(tool_options.get("ccache_enabled"))
+        self.binary = detect_ccache(tool_options.get("ccache_binary", "")) if self.enabled else None
+        self.before = None
+        self.results = {}
+        self.compiled = None
+
+    def env(self, base_env=None):
+        if not self.binary:
+            return None
+        return ccache_env(self.tool_options, self.binary, base_env)
+
+    def start(self):
+        if self.binary:
+            self.before = read_stats(self.binary, self.env())
+
+    def feed(self, line):
+        match = NUITKA_RESULT_PATTERN.search(line)
+        if match:
+            self.results[match.group(2)] = int(match.group(3))
+            return
+        match = NUITKA_COMPILED_PATTERN.search(line)
+        if match:
+            self.compiled = int(match.group(1))
+
+    def counts(self):
+        # (hits, misses) from Nuitka's own summary of this build, or from the ccache counters (shared by concurrent builds)
+        if self.results:
+            hits = sum(value for result, value in self.results.items() if "hit" in result)
+            misses = sum(value for result, value in self.results.items() if "hit" not in result)
+            return hits, misses
+        after = read_stats(self.binary, self.env()) if self.before is not None else None
+        if after is not None:
+            hits = sum(after.get(name, 0) - self.before.get(name, 0) for name in HIT_COUNTERS)
+            misses = sum(after.get(name, 0) - self.before.get(name, 0) for name in MISS_COUNTERS)
+            return hits, misses
+        return None
+
+    def finish(self, project, compile_seconds=None):
+        # Returns the report line for the output pane, or None when nothing was compiled through the cache
+        if not self.enabled:
+            return None
+        if not self.binary:
+            return "Compiler cache: ccache was not found, install it or set ccache_binary to speed up rebuilds.\n"
+        counts = self.counts()
+        if counts is None or sum(counts) == 0:
+            return None
+
+        hits, misses = counts
+        history = load_history()
+        seconds_per_file = compile_seconds / misses if compile_seconds and misses else None
+        estimate = seconds_per_file or history.get("seconds_per_file")
+        saved = hits * estimate if estimate else None
+        save_history({"time": time.time(), "project": project, "hits": hits, "misses": misses, "saved": saved}, seconds_per_file)
+
+        rate = hits * 100.0 / (hits + misses)
+        report = f"Compiler cache: {hits} hits, {misses} misses ({rate:.0f}% hit rate)"
+        if saved is not None:
+            report += f", about {saved:.0f}s of C compilation saved"
+        return report + ".\n"
+
+
+def cache_summary(tool_options):
+    # Raw "ccache -s" output for the dashboard
+    binary = detect_ccache(tool_options.get("ccache_binary", ""))
+    if not binary:
+        return "ccache was not found."
+    command = [binary, "-s"]
+    try:
+        return subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              env=ccache_env(tool_options, binary), universal_newlines=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError) as e:
+        return f"Could not run {' '.join(command)}: {e}"
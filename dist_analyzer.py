@@ -0,0 +1,423 @@
+import concurrent.futures
+import hashlib
+import json
+import os
+import struct
+import sys
+import threading
+import time
+
+from build_cache import hash_file
+from build_profiler import format_bytes
+from nuitka_core import app_data_dir
+from onefile import payload_group
+
+# Anti-bloat modes that keep rarely needed packages out of the program
+BLOAT_OPTIONS = {
+    "setuptools": "--noinclude-setuptools-mode=nofollow",
+    "pkg_resources": "--noinclude-setuptools-mode=nofollow",
+    "pytest": "--noinclude-pytest-mode=nofollow",
+    "_pytest": "--noinclude-pytest-mode=nofollow",
+    "unittest": "--noinclude-unittest-mode=nofollow",
+    "pydoc_data": "--noinclude-pydoc-mode=nofollow",
+    "IPython": "--noinclude-IPython-mode=nofollow",
+    "dask": "--noinclude-dask-mode=nofollow",
+    "numba": "--noinclude-numba-mode=nofollow",
+}
+# Folders of test suites and files only needed to build or type check a package, never at run time
+TEST_DIRS = ("tests", "test", "testing")
+BUILD_ONLY_SUFFIXES = (".h", ".hpp", ".c", ".cpp", ".pyx", ".pxd", ".pyi", ".a", ".lib")
+# Suggestions reclaiming less than this are not shown
+MIN_SUGGESTION_SIZE = 100 * 1024
+# Packages at least this large get a --nofollow-import-to suggestion
+LARGE_PACKAGE_SIZE = 5 * 1024 * 1024
+
+# Names used for sizes not owned by one package
+MAIN_PACKAGE = "(program)"
+RUNTIME_PACKAGE = "(python runtime)"
+SHARED_PACKAGE = "(shared by packages)"
+UNUSED_PACKAGE = "(not linked)"
+
+ELF_MAGIC = b"\x7fELF"
+MACHO_MAGIC = b"\xcf\xfa\xed\xfe"
+# Mach-O load commands naming a library the binary links against
+MACHO_DYLIB_COMMANDS = (0xc, 0x80000018, 0x8000001f)
+
+snapshots_lock = threading.Lock()
+
+
+def elf_needed(f, header):
+    # DT_NEEDED entries of an ELF executable or shared library
+    is64 = header[4] == 2
+    endian = "<" if header[5] == 1 else ">"
+    if is64:
+        section_offset = struct.unpack_from(endian + "Q", header, 0x28)[0]
+        entry_size, count = struct.unpack_from(endian + "HH", header, 0x3A)
+        section_format, dynamic_format = endian + "IIQQQQIIQQ", endian + "qQ"
+    else:
+        section_offset = struct.unpack_from(endian + "I", header, 0x20)[0]
+        entry_size, count = struct.unpack_from(endian + "HH", header, 0x2E)
+        section_format, dynamic_format = endian + "IIIIIIIIII", endian + "iI"
+    f.seek(section_offset)
+    table = f.read(entry_size * count)
+    sections = [struct.unpack_from(section_format, table, index * entry_size) for index in range(count)
+                if (index + 1) * entry_size <= len(table)]
+    dynamic = next((section for section in sections if section[1] == 6), None)
+    if dynamic is None or dynamic[6] >= len(sections):
+        return []
+    strings_section = sections[dynamic[6]]
+    f.seek(strings_section[4])
+    strings = f.read(strings_section[5])
+    f.seek(dynamic[4])
+    data = f.read(dynamic[5])
+    needed = []
+    entry_length = struct.calcsize(dynamic_format)
+    for offset in range(0, len(data) - entry_length + 1, entry_length):
+        tag, value = struct.unpack_from(dynamic_format, data, offset)
+        if tag == 0:
+            break
+        if tag == 1 and value < len(strings):
+            needed.append(strings[value:strings.index(b"\0", value)].decode("utf-8", "replace"))
+    return needed
+
+
+def pe_imports(f, header):
+    # Names of the DLLs in a PE executable's or DLL's import directory
+    f.seek(struct.unpack_from("<I", header, 0x3C)[0])
+    signature = f.read(24)
+    if signature[:4] != b"PE\0\0":
+        return None
+    section_count, optional_size = struct.unpack_from("<H", signature, 6)[0], struct.unpack_from("<H", signature, 20)[0]
+    optional = f.read(optional_size)
+    directories = 112 if struct.unpack_from("<H", optional, 0)[0] == 0x20b else 96
+    if len(optional) < directories + 16:
+        return []
+    import_rva = struct.unpack_from("<I", optional, directories + 8)[0]
+    sections = [struct.unpack_from("<8sIIII", f.read(40)) for _ in range(section_count)]
+
+    def file_offset(rva):
+        for name, virtual_size, virtual_address, raw_size, raw_pointer in sections:
+            if virtual_address <= rva < virtual_address + max(virtual_size, raw_size):
+                return rva - virtual_address + raw_pointer
+        return None
+
+    imports = []
+    offset = file_offset(import_rva) if import_rva else None
+    while offset is not None:
+        f.seek(offset)
+        descriptor = f.read(20)
+        if len(descriptor) < 20 or descriptor == b"\0" * 20:
+            break
+        name_offset = file_offset(struct.unpack_from("<I", descriptor, 12)[0])
+        if name_offset is not None:
+            f.seek(name_offset)
+            imports.append(f.read(256).split(b"\0", 1)[0].decode("ascii", "replace"))
+        offset += 20
+    return imports
+
+
+def macho_dylibs(f, header):
+    # Libraries a thin 64-bit Mach-O binary loads
+    command_count = struct.unpack_from("<I", header, 16)[0]
+    f.seek(32)
+    dylibs = []
+    for _ in range(command_count):
+        command = f.read(8)
+        if len(command) < 8:
+            break
+        kind, size = struct.unpack("<II", command)
+        body = f.read(size - 8)
+        if kind in MACHO_DYLIB_COMMANDS:
+            name_offset = struct.unpack_from("<I", body, 0)[0] - 8
+            dylibs.append(os.path.basename(body[name_offset:].split(b"\0", 1)[0].decode("utf-8", "replace")))
+    return dylibs
+
+
+def linked_libraries(path):
+    # Base names of the shared libraries a binary links against, None for files that are not binaries
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(64)
+            if header[:4] == ELF_MAGIC and len(header) >= 64:
+                return elf_needed(f, header)
+            if header[:2] == b"MZ" and len(header) >= 64:
+                return pe_imports(f, header)
+            if header[:4] == MACHO_MAGIC:
+                return macho_dylibs(f, header)
+    except (OSError, struct.error, ValueError):
+        pass
+    return None
+
+
+def library_key(name):
+    # Windows and macOS resolve library names case-insensitively
+    return name if sys.platform.startswith("linux") else name.lower()
+
+
+def scan_file(dist_dir, relative_path):
+    path = os.path.join(dist_dir, relative_path)
+    digest = hashlib.sha256()
+    hash_file(path, digest)
+    return {
+        "path": relative_path,
+        "size": os.path.getsize(path),
+        "hash": digest.hexdigest(),
+        "links": linked_libraries(path),
+    }
+
+
+def scan_dist(dist_dir, workers=None):
+    # Hashes every file of a .dist folder in parallel (hashlib and file reads release the GIL)
+    relative_paths = []
+    for root, dirs, files in os.walk(dist_dir):
+        for name in files:
+            file_path = os.path.join(root, name)
+            if not os.path.islink(file_path):
+                relative_paths.append(os.path.relpath(file_path, dist_dir))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(lambda relative_path: scan_file(dist_dir, relative_path), relative_paths))
+
+
+def package_of(relative_path, kind):
+    # Package a file belongs to by its place in the .dist folder, None for top level shared libraries
+    parts = relative_path.replace(os.sep, "/").split("/")
+    if len(parts) > 1:
+        top = parts[0][:-len(".libs")] if parts[0].endswith(".libs") else parts[0]
+        return top.lstrip(".") or parts[0]
+    if kind == "extension module":
+        return parts[0].split(".", 1)[0]
+    if kind == "shared library":
+        return None
+    return MAIN_PACKAGE
+
+
+def attribute_libraries(files):
+    # Top level shared libraries belong to the packages whose binaries link against them, followed through library chains
+    by_name = {}
+    for entry in files:
+        by_name.setdefault(library_key(os.path.basename(entry["path"])), []).append(entry)
+    users = {}
+    for entry in files:
+        for name in entry["links"] or ():
+            for library in by_name.get(library_key(name), ()):
+                if library is not entry:
+                    users.setdefault(library["path"], []).append(entry)
+
+    floating = [entry for entry in files if entry["package"] is None]
+    for _ in range(len(floating) + 1):
+        changed = False
+        for entry in floating:
+            owners = {user["package"] for user in users.get(entry["path"], ())} - {None}
+            packages = owners - {MAIN_PACKAGE, RUNTIME_PACKAGE, SHARED_PACKAGE}
+            if not owners:
+                continue
+            if owners & {MAIN_PACKAGE, RUNTIME_PACKAGE}:
+                package = RUNTIME_PACKAGE
+            elif len(packages) == 1:
+                package = packages.pop()
+            else:
+                package = SHARED_PACKAGE
+            if package != entry["package"]:
+                entry["package"] = package
+                changed = True
+        if not changed:
+            break
+    for entry in floating:
+        if entry["package"] is None:
+            entry["package"] = UNUSED_PACKAGE
+    return users
+
+
+def analyze_dist(dist_dir, workers=None):
+    # Where the megabytes of a standalone build are: per package, duplicates, shared libraries nothing links against
+    files = scan_dist(dist_dir, workers)
+    for entry in files:
+        entry["kind"] = payload_group(entry["path"])[1]
+        if entry["links"] is not None and entry["kind"] == "file":
+            entry["kind"] = "executable"
+        entry["package"] = package_of(entry["path"], entry["kind"])
+    users = attribute_libraries(files)
+
+    packages = {}
+    for entry in files:
+        package = packages.setdefault(entry["package"], {"name": entry["package"], "size": 0, "files": 0})
+        package["size"] += entry["size"]
+        package["files"] += 1
+
+    by_hash = {}
+    for entry in files:
+        by_hash.setdefault(entry["hash"], []).append(entry)
+    duplicates = [{"size": copies[0]["size"], "paths": sorted(copy["path"] for copy in copies),
+                   "wasted": copies[0]["size"] * (len(copies) - 1)}
+                  for copies in by_hash.values() if len(copies) > 1 and copies[0]["size"] > 0]
+
+    # Shared libraries no binary links against, they may still be loaded at run time with dlopen/ctypes/LoadLibrary
+    # Without any parsed binary (an unknown format) nothing can be called unused
+    parsed = any(entry["links"] for entry in files)
+    unused = [entry for entry in files if parsed and entry["kind"] == "shared library" and entry["path"] not in users]
+
+    analysis = {
+        "dist_dir": os.path.abspath(dist_dir),
+        "time": time.time(),
+        "total_size": sum(entry["size"] for entry in files),
+        "files": sorted(files, key=lambda entry: entry["size"], reverse=True),
+        "packages": sorted(packages.values(), key=lambda package: package["size"], reverse=True),
+        "duplicates": sorted(duplicates, key=lambda duplicate: duplicate["wasted"], reverse=True),
+        "unused_libraries": [{"path": entry["path"], "size": entry["size"]} for entry in sorted(unused, key=lambda entry: entry["size"], reverse=True)],
+    }
+    analysis["suggestions"] = suggest_exclusions(analysis)
+    analysis["diff"] = diff_snapshots(store_snapshot(analysis), snapshot(analysis))
+    return analysis
+
+
+def suggest_exclusions(analysis):
+    # (option, bytes it would reclaim, why), largest first
+    suggestions = {}
+
+    def suggest(option, size, reason):
+        if size >= MIN_SUGGESTION_SIZE and option not in suggestions:
+            suggestions[option] = (option, size, reason)
+
+    sizes = {package["name"]: package["size"] for package in analysis["packages"]}
+    bloat = {}
+    for package, option in BLOAT_OPTIONS.items():
+        if package in sizes:
+            bloat.setdefault(option, []).append(package)
+    for option, packages in bloat.items():
+        suggest(option, sum(sizes[package] for package in packages), f"{', '.join(packages)} is rarely needed at run time")
+
+    test_dirs = {}
+    build_only = {}
+    for entry in analysis["files"]:
+        parts = entry["path"].replace(os.sep, "/").split("/")
+        for index, part in enumerate(parts[:-1]):
+            if part in TEST_DIRS and index > 0:
+                key = "/".join(parts[:index + 1])
+                test_dirs[key] = test_dirs.get(key, 0) + entry["size"]
+                break
+        if len(parts) > 1 and entry["path"].endswith(BUILD_ONLY_SUFFIXES):
+            key = (parts[0], os.path.splitext(entry["path"])[1])
+            build_only[key] = build_only.get(key, 0) + entry["size"]
+    for folder, size in test_dirs.items():
+        suggest(f"--noinclude-data-files={folder}/*", size, "test suite data")
+    for (folder, suffix), size in build_only.items():
+        suggest(f"--noinclude-data-files={folder}/*{suffix}", size, f"{suffix} files are only used to build or type check")
+
+    for library in analysis["unused_libraries"]:
+        suggest(f"--noinclude-dlls={library['path'].replace(os.sep, '/')}", library["size"],
+                "no binary links against it, check that nothing loads it at run time")
+    for duplicate in analysis["duplicates"]:
+        if all(payload_group(path)[1] == "shared library" for path in duplicate["paths"]):
+            for path in duplicate["paths"][1:]:
+                suggest(f"--noinclude-dlls={path.replace(os.sep, '/')}", duplicate["size"],
+                        f"identical to {duplicate['paths'][0]}, if the package finds the other copy")
+
+    for package in analysis["packages"]:
+        if package["size"] >= LARGE_PACKAGE_SIZE and not package["name"].startswith("(") and package["name"] not in BLOAT_OPTIONS:
+            suggest(f"--nofollow-import-to={package['name']}", package["size"],
+                    "if it is only imported optionally, Build -> Analyze Imports shows who imports it")
+    return sorted(suggestions.values(), key=lambda suggestion: suggestion[1], reverse=True)
+
+
+def snapshot(analysis):
+    return {
+        "time": analysis["time"],
+        "files": {entry["path"]: [entry["size"], entry["hash"], entry["package"]] for entry in analysis["files"]},
+    }
+
+
+def snapshots_path():
+    return os.path.join(app_data_dir(), "dist-analysis.json")
+
+
+def load_snapshots():
+    try:
+        with open(snapshots_path(), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def store_snapshot(analysis):
+    # Remembers this analysis and returns the last analyzed build of the folder; when nothing changed since, the one before it
+    current = snapshot(analysis)
+    with snapshots_lock:
+        snapshots = load_snapshots()
+        stored = snapshots.get(analysis["dist_dir"], {})
+        if stored.get("current") and stored["current"]["files"] != current["files"]:
+            stored = {"previous": stored["current"], "current": current}
+        else:
+            stored["current"] = current
+        snapshots[analysis["dist_dir"]] = stored
+        with open(snapshots_path(), 'w') as f:
+            json.dump(snapshots, f)
+    return stored.get("previous")
+
+
+def diff_snapshots(previous, current):
+    # Size changes between two builds of the same .dist folder, per package and per file
+    if previous is None:
+        return None
+    old, new = previous["files"], current["files"]
+    packages = {}
+    for files, index in ((old, 0), (new, 1)):
+        for path, (size, digest, package) in files.items():
+            packages.setdefault(package, [0, 0])[index] += size
+    return {
+        "previous": previous["time"],
+        "total_delta": sum(entry[0] for entry in new.values()) - sum(entry[0] for entry in old.values()),
+        "packages": sorted(((name, sizes[0], sizes[1]) for name, sizes in packages.items() if sizes[0] != sizes[1]),
+                           key=lambda package: abs(package[2] - package[1]), reverse=True),
+        "added": sorted(((path, new[path][0]) for path in new if path not in old), key=lambda item: item[1], reverse=True),
+        "removed": sorted(((path, old[path][0]) for path in old if path not in new), key=lambda item: item[1], reverse=True),
+        "changed": sorted(((path, old[path][0], new[path][0]) for path in new if path in old and old[path][1] != new[path][1]),
+                          key=lambda item: abs(item[2] - item[1]), reverse=True),
+    }
+
+
+def format_delta(size):
+    return ("+" if size >= 0 else "-") + format_bytes(abs(size))
+
+
+def format_analysis(analysis, limit=15):
+    total = analysis["total_size"]
+    text = f"{analysis['dist_dir']}: {format_bytes(total)} in {len(analysis['files'])} files\n"
+
+    text += "\nSize per package:\n"
+    for package in analysis["packages"][:limit]:
+        share = package["size"] * 100.0 / total if total else 0.0
+        text += f"  {format_bytes(package['size']):>10} {share:5.1f}%  {package['name']} ({package['files']} file(s))\n"
+
+    text += "\nLargest files:\n"
+    for entry in analysis["files"][:limit]:
+        text += f"  {format_bytes(entry['size']):>10}  {entry['path']} ({entry['kind']}, {entry['package']})\n"
+
+    duplicates = analysis["duplicates"]
+    text += f"\nDuplicate files ({len(duplicates)}, {format_bytes(sum(duplicate['wasted'] for duplicate in duplicates))} wasted):\n"
+    for duplicate in duplicates[:limit]:
+        text += f"  {format_bytes(duplicate['size']):>10} x{len(duplicate['paths'])}  {', '.join(duplicate['paths'])}\n"
+
+    unused = analysis["unused_libraries"]
+    text += f"\nShared libraries no binary links against ({len(unused)}, {format_bytes(sum(library['size'] for library in unused))}):\n"
+    for library in unused[:limit]:
+        text += f"  {format_bytes(library['size']):>10}  {library['path']}\n"
+
+    diff = analysis["diff"]
+    if diff is None:
+        text += "\nNo earlier build of this folder was analyzed, the next analysis shows what changed.\n"
+    else:
+        text += (f"\nSince the build analyzed {time.strftime('%Y-%m-%d %H:%M', time.localtime(diff['previous']))}: "
+                 f"{format_delta(diff['total_delta'])}, {len(diff['added'])} added, {len(diff['removed'])} removed, "
+                 f"{len(diff['changed'])} changed\n")
+        for name, old_size, new_size in diff["packages"][:limit]:
+            text += f"  {format_delta(new_size - old_size):>11}  {name} ({format_bytes(old_size)} -> {format_bytes(new_size)})\n"
+        for path, size in diff["added"][:5]:
+            text += f"  added    {format_bytes(size):>10}  {path}\n"
+        for path, size in diff["removed"][:5]:
+            text += f"  removed  {format_bytes(size):>10}  {path}\n"
+
+    suggestions = analysis["suggestions"]
+    text += f"\nExclusion options that would reclaim space ({len(suggestions)}):\n"
+    for option, size, reason in suggestions[:limit]:
+        text += f"  {format_bytes(size):>10}  {option}  ({reason})\n"
+    return text
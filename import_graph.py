@@ -0,0 +1,275 @@
+import ast
+import json
+import os
+import sys
+import sysconfig
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from importlib.machinery import PathFinder
+
+from nuitka_core import app_data_dir
+
+# Below this many uncached files parsing in this process is faster than starting worker processes
+PARALLEL_THRESHOLD = 64
+
+# Calls whose first (string) argument names a module imported at run time
+DYNAMIC_IMPORT_CALLS = ("import_module", "__import__")
+
+STDLIB_DIRS = tuple(os.path.normcase(os.path.abspath(path)) for path in
+                    {sysconfig.get_paths()["stdlib"], sysconfig.get_paths()["platstdlib"]})
+
+cache_lock = threading.Lock()
+
+
+def parse_imports(file_path):
+    # Raw import records of one source file: (level, module, names, dynamic)
+    with open(file_path, 'rb') as f:
+        tree = ast.parse(f.read(), filename=file_path)
+
+    records = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            records.extend((0, alias.name, [], False) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            records.append((node.level, node.module or "", [alias.name for alias in node.names if alias.name != "*"], False))
+        elif isinstance(node, ast.Call) and node.args:
+            func = node.func
+            name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", None)
+            # ast.Str before Python 3.8, ast.Constant after
+            value = getattr(node.args[0], "value", getattr(node.args[0], "s", None))
+            if name in DYNAMIC_IMPORT_CALLS and isinstance(value, str):
+                records.append((0, value, [], True))
+    return records
+
+
+def scan_file(file_path):
+    # Top level so it can run in a worker process
+    try:
+        return file_path, parse_imports(file_path)
+    except (OSError, SyntaxError, ValueError):
+        return file_path, []
+
+
+def resolve_records(records, package=None):
+    # Absolute module names from raw import records, the dynamic ones are returned separately
+    names, dynamic = set(), set()
+    for level, module, aliases, is_dynamic in records:
+        if level:
+            parts = package.split(".") if package else []
+            parts = parts[:len(parts) - level + 1]
+            base = ".".join(parts + ([module] if module else []))
+        else:
+            base = module
+        if not base:
+            continue
+        (dynamic if is_dynamic else names).add(base)
+        names.update(f"{base}.{alias}" for alias in aliases)
+    return names, dynamic
+
+
+def imported_modules(file_path, package=None):
+    # Absolute names of the modules imported by one source file
+    return resolve_records(parse_imports(file_path), package)[0]
+
+
+def find_module(name, search_path):
+    # Locate a module without importing it (or its parent packages)
+    spec = None
+    path = search_path
+    for part in name.split("."):
+        spec = PathFinder.find_spec(part, path)
+        if spec is None:
+            return None
+        path = spec.submodule_search_locations
+        if path is None and part != name.split(".")[-1]:
+            return None
+    return spec
+
+
+class ScanCache:
+    # Raw import records per file, reused while the file's mtime and size are unchanged
+    def __init__(self, path=None):
+        self.path = path or os.path.join(app_data_dir(), "import-cache.json")
+        self.dirty = False
+        try:
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, file_path):
+        entry = self.entries.get(file_path)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            # Deleted since it was cached
+            return None
+        if entry[0] != stat.st_mtime_ns or entry[1] != stat.st_size:
+            return None
+        return [tuple(record) for record in entry[2]]
+
+    def put(self, file_path, records):
+        stat = os.stat(file_path)
+        self.entries[file_path] = [stat.st_mtime_ns, stat.st_size, records]
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        with cache_lock:
+            try:
+                with open(self.path, 'w') as f:
+                    json.dump(self.entries, f)
+            except OSError:
+                # The next scan parses the files again
+                return
+        self.dirty = False
+
+
+class ModuleNode:
+    def __init__(self, name, path, kind):
+        self.name = name
+        self.path = path
+        self.kind = kind  # entry, local, third-party, stdlib, builtin, missing
+        self.size = os.path.getsize(path) if path and os.path.isfile(path) else 0
+        self.imports = set()
+        self.dynamic_imports = set()
+        self.children = []  # first reached through this module, forms the dependency tree
+        self.parent = None
+        self.total_size = self.size  # size of this module and its subtree, set by ImportGraph.scan
+
+
+class ImportGraph:
+    def __init__(self, entry_path, follow_stdlib=False, max_workers=None, cache=None):
+        self.entry_path = os.path.abspath(entry_path)
+        self.script_dir = os.path.dirname(self.entry_path)
+        self.search_path = [self.script_dir] + [p for p in sys.path if p and os.path.abspath(p) != self.script_dir]
+        self.follow_stdlib = follow_stdlib
+        self.max_workers = max_workers
+        self.cache = cache or ScanCache()
+        self.nodes = {}
+        self.root = None
+        self.parsed_files = 0
+        self.cached_files = 0
+
+    def classify(self, spec):
+        if spec.origin in (None, "built-in", "frozen"):
+            return "builtin"
+        origin = os.path.normcase(os.path.abspath(spec.origin))
+        if origin.startswith(os.path.normcase(self.script_dir) + os.sep):
+            return "local"
+        if origin.startswith(STDLIB_DIRS) and "site-packages" not in origin and "dist-packages" not in origin:
+            return "stdlib"
+        return "third-party"
+
+    def scan(self):
+        # Breadth first: every level of not yet seen modules is parsed in one (parallel) batch
+        self.root = ModuleNode("__main__", self.entry_path, "entry")
+        self.nodes["__main__"] = self.root
+        level = [(self.root, None)]
+        while level:
+            records = self.parse_all([node.path for node, package in level])
+            next_level = []
+            for node, package in level:
+                names, dynamic = resolve_records(records.get(node.path, []), package)
+                node.imports = names
+                node.dynamic_imports = dynamic
+                for name in sorted(names | dynamic):
+                    for child in self.add_module(name, node):
+                        if self.should_follow(child):
+                            is_package = os.path.basename(child.path).startswith("__init__.")
+                            next_level.append((child, child.name if is_package else child.name.rpartition(".")[0]))
+            level = next_level
+        self.cache.save()
+        self.compute_sizes()
+        return self
+
+    def compute_sizes(self):
+        # Children are always added after their parent, so reversed insertion order is a valid post-order
+        for node in self.nodes.values():
+            node.total_size = node.size
+        for node in reversed(list(self.nodes.values())):
+            if node.parent is not None:
+                node.parent.total_size += node.total_size
+
+    def add_module(self, name, parent):
+        # Returns the nodes created for name and its not yet seen parent packages
+        if name in self.nodes:
+            return []
+        added = []
+        # Parent packages are part of the graph too, "import a.b.c" runs a/__init__ and a/b/__init__
+        if "." in name and name.rpartition(".")[0] not in self.nodes:
+            added = self.add_module(name.rpartition(".")[0], parent)
+        try:
+            spec = find_module(name, self.search_path)
+        except (ImportError, ValueError):
+            spec = None
+        if spec is None:
+            # "from package import name" may import an attribute rather than a module
+            if "." in name and name.rpartition(".")[0] in self.nodes:
+                return added
+            node = ModuleNode(name, None, "missing")
+        else:
+            path = spec.origin if spec.origin and os.path.isfile(spec.origin) else None
+            node = ModuleNode(name, path, self.classify(spec))
+        self.nodes[name] = node
+        # Attach to the closest package already in the tree so the hierarchy stays readable
+        owner = self.nodes.get(name.rpartition(".")[0]) if "." in name else None
+        node.parent = owner if owner is not None and owner.kind != "missing" else parent
+        node.parent.children.append(node)
+        return added + [node]
+
+    def should_follow(self, node):
+        if not node.path or not node.path.endswith(".py"):
+            return False
+        return node.kind in ("local", "third-party") or (node.kind == "stdlib" and self.follow_stdlib)
+
+    def parse_all(self, paths):
+        records, pending = {}, []
+        for path in paths:
+            cached = self.cache.get(path)
+            if cached is None:
+                pending.append(path)
+            else:
+                records[path] = cached
+                self.cached_files += 1
+
+        results = None
+        if len(pending) >= PARALLEL_THRESHOLD:
+            try:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                    results = list(executor.map(scan_file, pending, chunksize=16))
+            except (OSError, RuntimeError):
+                results = None
+        if results is None:
+            results = [scan_file(path) for path in pending]
+
+        for path, file_records in results:
+            records[path] = file_records
+            self.cache.put(path, file_records)
+            self.parsed_files += 1
+        return records
+
+    def heaviest(self, limit=20):
+        # Top level third-party packages by the size reachable only through them
+        packages = [node for node in self.nodes.values() if node.kind == "third-party" and "." not in node.name]
+        return sorted(packages, key=lambda node: node.total_size, reverse=True)[:limit]
+
+    def dynamic_imports(self):
+        # Modules only imported through importlib.import_module()/__import__, Nuitka cannot see those
+        static = set()
+        dynamic = set()
+        for node in self.nodes.values():
+            static.update(node.imports)
+            dynamic.update(node.dynamic_imports)
+        return sorted(name for name in dynamic - static if name in self.nodes and self.nodes[name].kind != "missing")
+
+
+def import_options(excluded, included):
+    # Values for the --nofollow-import-to and --include-module options
+    return {
+        "--nofollow-import-to": ",".join(sorted(excluded)),
+        "--include-module": ",".join(sorted(included)),
+    }
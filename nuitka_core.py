@@ -0,0 +1,686 @@
+import os
+import sys
+import threading
+import time
+
+# Options model shared by the GUI and the headless build mode, this module never imports tkinter
+OPTIONS_DATA = [
+    ("General Options", [
+        ("--show-memory", "bool", "Output memory information"),
+        ("--remove-output", "bool", "Remove output directory before compilation"),
+        ("--enable-plugin=tk-inter", "bool", "Enable Tkinter plugin (recommended for Tkinter applications)"),
+    ]),
+    ("Basic Options", [
+        ("--output-filename", "str", "Specify output filename"),
+        ("--module", "bool", "Create an extension module"),
+        ("--standalone", "bool", "Create a standalone executable"),
+        ("--onefile", "bool", "Create a onefile executable"),
+    ]),
+    ("Onefile Options", [
+        ("--onefile-tempdir-spec", "str", "Extraction folder, a fixed one like {CACHE_DIR}/name/version unpacks once and reuses it"),
+        ("--onefile-no-compression", "bool", "Store the payload uncompressed (bigger file, faster unpacking)"),
+    ]),
+    ("Control Options", [
+        ("--jobs", "int", "Specify number of parallel jobs"),
+        ("--lto", "str", "Use link time optimizations (no/auto/yes)"),
+        ("--disable-ccache", "bool", "Do not attempt to use ccache (gcc, clang, etc.) or clcache (MSVC)"),
+        ("--python-flag", "str", "Python flags to use"),
+        ("--python-debug", "bool", "Use debug version of Python"),
+        ("--experimental", "str", "Use experimental features"),
+    ]),
+    ("Import Options", [
+        ("--nofollow-import-to", "list", "Do not follow to these modules (comma separated)"),
+        ("--include-module", "list", "Always include these modules (comma separated)"),
+    ]),
+    ("Optimization Options", [
+        ("--run", "bool", "Run immediately"),
+        ("--debugger", "bool", "Run in debugger"),
+        ("--trace-execution", "bool", "Trace execution"),
+        ("--profile", "bool", "Profile execution"),
+        ("--unstripped", "bool", "Keep debug info in result"),
+        ("--static-libpython", "bool", "Use static link library for Python"),
+    ]),
+    ("Windows Specific", [
+        ("--windows-console-mode", "str", "Set console mode (disable/attach/force)"),
+        ("--windows-icon-from-ico", "path", "Use this icon file"),
+        ("--windows-uac-admin", "bool", "Request Windows User Account Control elevation"),
+        ("--windows-uac-uiaccess", "bool", "Request Windows User Account Control UI Access"),
+    ]),
+]
+
+OPTION_TYPES = {option: option_type for category, options in OPTIONS_DATA for option, option_type, description in options}
+
+# Settings of Py Nuitka GUI itself, saved with the project under "tool_options" but never passed to Nuitka
+TOOL_OPTIONS_DATA = [
+    ("Build Cache", [
+        ("cache_enabled", "bool", "Restore the previous result when sources and options are unchanged"),
+        ("cache_dir", "dir", "Build cache directory (empty for the default)"),
+        ("cache_max_size_mb", "int", "Build cache size limit in MB"),
+    ]),
+    ("Compiler Output", [
+        ("output_max_lines", "int", "Lines kept in the Compiler Output pane, the full log is written to disk"),
+        ("log_dir", "dir", "Build log directory (empty for the default)"),
+    ]),
+    ("Build History", [
+        ("history_enabled", "bool", "Store every build's output, phase timings and warnings in the searchable build history"),
+        ("history_max_builds", "int", "Builds kept in the history, older ones are removed (empty for no limit)"),
+    ]),
+    ("Compiler Cache", [
+        ("ccache_enabled", "bool", "Pass ccache/clcache to Nuitka and report hit rates after each build"),
+        ("ccache_binary", "path", "ccache or clcache executable (empty to detect it)"),
+        ("ccache_dir", "dir", "Compiler cache directory (empty for the ccache default)"),
+        ("ccache_max_size", "str", "Compiler cache size limit, e.g. 5G"),
+    ]),
+    ("Preflight", [
+        ("preflight_enabled", "bool", "Check the C compiler, Nuitka, cores, free disk space and memory before each build"),
+    ]),
+    ("Benchmark", [
+        ("benchmark_enabled", "bool", "Compare the built executable with CPython after each successful build"),
+        ("benchmark_workloads", "path", "JSON file with the workloads (arguments/stdin) to run"),
+        ("benchmark_warmup", "int", "Warmup runs per workload"),
+        ("benchmark_repeats", "int", "Measured runs per workload"),
+        ("benchmark_timeout", "int", "Timeout of a single run in seconds"),
+    ]),
+    ("Onefile", [
+        ("onefile_startup_runs", "int", "Cold and warm launches measured by the onefile startup analysis"),
+    ]),
+    ("Dist Analysis", [
+        ("dist_analysis_enabled", "bool", "Report package sizes, duplicates and unused libraries of the .dist folder after each successful build"),
+        ("dist_analysis_workers", "int", "Threads hashing the .dist folder (empty for the default)"),
+    ]),
+    ("Remote Workers", [
+        ("remote_workers", "str", "Build workers to send builds to, e.g. 127.0.0.1:8765,unix:/tmp/worker.sock (empty builds locally)"),
+        ("remote_token", "str", "Token the workers were started with (--token, or the token file in their folder)"),
+    ]),
+    ("Watch Mode", [
+        ("watch_debounce", "str", "Seconds without further changes before a rebuild starts"),
+    ]),
+    ("Resource Profiler", [
+        ("profile_enabled", "bool", "Sample CPU, memory, I/O and compiler processes of the whole build"),
+        ("profile_interval", "str", "Sampling interval in seconds"),
+        ("profile_dir", "dir", "Directory for the JSON/CSV timelines (empty for the default)"),
+    ]),
+]
+
+TOOL_OPTION_TYPES = {option: option_type for category, options in TOOL_OPTIONS_DATA for option, option_type, description in options}
+
+TOOL_DEFAULTS = {
+    "history_enabled": True,
+    "history_max_builds": "5000",
+    "ccache_enabled": True,
+    "preflight_enabled": True,
+    "cache_max_size_mb": "2048",
+    "output_max_lines": "5000",
+    "profile_interval": "0.5",
+    "benchmark_warmup": "1",
+    "benchmark_repeats": "5",
+    "benchmark_timeout": "60",
+    "onefile_startup_runs": "20",
+    "watch_debounce": "0.5",
+}
+
+# Options that are picked from a fixed list, the first value is the default
+OPTION_CHOICES = {
+    "--windows-console-mode": ["disable", "attach", "force"],
+    "--lto": ["", "no", "auto", "yes"],
+}
+
+NUITKA_NOT_FOUND = "Error: Python or Nuitka not found. Please ensure they are installed and in your system PATH.\n"
+
+
+def default_options():
+    options = {}
+    for category, category_options in OPTIONS_DATA:
+        for option, option_type, description in category_options:
+            if option_type == "bool":
+                options[option] = False
+            else:
+                options[option] = OPTION_CHOICES.get(option, [""])[0]
+    return options
+
+
+def default_tool_options():
+    tool_options = {}
+    for category, category_options in TOOL_OPTIONS_DATA:
+        for option, option_type, description in category_options:
+            tool_options[option] = TOOL_DEFAULTS.get(option, False if option_type == "bool" else "")
+    return tool_options
+
+
+def app_data_dir():
+    # Per-user folder for caches and build history
+    path = os.environ.get("PY_NUITKA_GUI_HOME") or os.path.join(os.path.expanduser("~"), ".py_nuitka_gui")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def build_file_path(directory, file_path, suffix=""):
+    # <directory>/<script name>-<timestamp><suffix>, for per-build logs and reports
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return os.path.join(directory, f"{stem}-{time.strftime('%Y%m%d-%H%M%S')}{suffix}")
+
+
+def build_log_path(tool_options, file_path):
+    return build_file_path(tool_options.get("log_dir") or os.path.join(app_data_dir(), "logs"), file_path, ".log")
+
+
+def profile_base_path(tool_options, file_path):
+    return build_file_path(tool_options.get("profile_dir") or os.path.join(app_data_dir(), "profiles"), file_path)
+
+
+def build_command(file_path, output_dir, options):
+    command = [sys.executable, "-m", "nuitka"]
+
+    for opt, value in options.items():
+        if opt in OPTION_TYPES:
+            option_type = OPTION_TYPES[opt]
+        else:
+            # Options beyond OPTIONS_DATA come from the installed Nuitka's --help (see option_schema)
+            from option_schema import cached_option_types
+            option_type = cached_option_types().get(opt)
+        if value is True:
+            command.append(opt)
+        elif isinstance(value, str) and option_type == "list":
+            # Comma separated values become one option each
+            command.extend(f"{opt}={item.strip()}" for item in value.split(",") if item.strip())
+        elif isinstance(value, str) and value:
+            value = os.path.abspath(os.path.normpath(value.strip())) if opt.endswith(("-from-ico", "-dir")) else value
+            command.append(f"{opt}={value}")
+
+    command.append(f"--output-dir={output_dir}")
+    command.append(file_path)
+    return command
+
+
+def load_settings(settings_path):
+    # Read a saved project-settings.json and the files it extends (see settings_profiles),
+    # relative paths are resolved against the folder of the file that sets them
+    from settings_profiles import resolve_layers
+
+    settings, history = resolve_layers(settings_path)
+    options = default_options()
+    options.update(settings["options"])
+    settings["options"] = options
+
+    tool_options = default_tool_options()
+    tool_options.update(settings["tool_options"])
+    settings["tool_options"] = tool_options
+    return settings
+
+
+def save_settings(settings_path, settings):
+    # A file that extends others only stores what differs from them
+    import json
+
+    if settings.get("extends"):
+        from settings_profiles import layer_delta
+        settings = layer_delta(settings_path, settings)
+    else:
+        settings = {key: value for key, value in settings.items() if key != "layers"}
+    with open(settings_path, 'w') as f:
+        json.dump(settings, f, indent=4)
+
+
+def validate_settings(settings):
+    if not os.path.isfile(settings.get("file_path", "")):
+        raise ValueError(f"Invalid Python file path: {settings.get('file_path', '')}")
+    if not os.path.isdir(settings.get("output_dir", "")):
+        raise ValueError(f"Invalid output directory: {settings.get('output_dir', '')}")
+
+
+def settings_command(settings):
+    validate_settings(settings)
+    return build_command(settings["file_path"], settings["output_dir"], settings["options"])
+
+
+class BuildRunner:
+    # Runs one Nuitka command and hands every output line to on_line, on_start gets the Popen object
+    def __init__(self, command, env=None, cwd=None, on_start=None):
+        self.command = command
+        self.env = env
+        self.cwd = cwd
+        self.on_start = on_start
+        self.process = None
+        self.returncode = None
+        self.cancelled = False
+
+    def run(self, on_line):
+        # Raises FileNotFoundError when Python or Nuitka cannot be started
+        # The build gets its own process group/session, so cancel() reaches the C compilers Scons starts as well
+        import subprocess
+        if sys.platform == "win32":
+            group = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            group = {"start_new_session": True}
+        self.process = subprocess.Popen(self.command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1, universal_newlines=True,
+                                        env=self.env, cwd=self.cwd, **group)
+        if self.on_start:
+            self.on_start(self.process)
+        if self.cancelled:
+            kill_tree(self.process)
+        try:
+            for line in self.process.stdout:
+                on_line(line)
+            self.process.wait()
+        except KeyboardInterrupt:
+            # Ctrl+C no longer reaches the separate session, take the build down with this process
+            kill_tree(self.process)
+            raise
+        self.returncode = self.process.returncode
+        return self.returncode
+
+    def cancel(self):
+        # Safe to call from any thread, also before run() has started the process
+        self.cancelled = True
+        if self.process is not None and self.process.poll() is None:
+            kill_tree(self.process)
+
+
+def kill_tree(process, grace=3.0):
+    # Terminates a build started by BuildRunner and all its children, escalating to SIGKILL in the background
+    import signal
+    import subprocess
+    if sys.platform == "win32":
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+
+    def signal_group(signum):
+        try:
+            os.killpg(process.pid, signum)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def escalate():
+        try:
+            process.wait(grace)
+        except subprocess.TimeoutExpired:
+            pass
+        # Children may outlive the Nuitka process itself
+        signal_group(signal.SIGKILL)
+
+    signal_group(signal.SIGTERM)
+    threading.Thread(target=escalate, daemon=True).start()
+
+
+def create_runner(command, tool_options, phase_getter=None, env=None):
+    # A BuildRunner with a ResourceProfiler attached when profiling is enabled, a RemoteRunner when workers are configured
+    if tool_options.get("remote_workers"):
+        from remote_build import RemoteRunner, parse_workers
+        return RemoteRunner(command, parse_workers(tool_options["remote_workers"]), token=tool_options.get("remote_token")), None
+    profiler = None
+    if tool_options.get("profile_enabled"):
+        from build_profiler import ResourceProfiler, profiling_available
+        if profiling_available():
+            try:
+                interval = float(tool_options.get("profile_interval") or 0.5)
+            except ValueError:
+                interval = 0.5
+            profiler = ResourceProfiler(interval, phase_getter)
+    return BuildRunner(command, env=env, on_start=profiler.start if profiler else None), profiler
+
+
+def finish_profile(profiler, command, tool_options, write):
+    if profiler is None:
+        if tool_options.get("profile_enabled") and not tool_options.get("remote_workers"):
+            write("Resource profiling needs the psutil package on this platform (pip install psutil).\n")
+        return None
+    if profiler.pid is None:
+        return None
+    from build_profiler import format_summary
+
+    profiler.stop()
+    write(format_summary(profiler.summary()))
+    try:
+        # Runs in run_build's finally block, an unwritable profile_dir must not replace the build's own result
+        json_path, csv_path = profiler.save(profile_base_path(tool_options, command[-1]), command)
+    except OSError as e:
+        write(f"Could not write the resource timeline: {e}\n")
+        return None
+    write(f"Resource timeline written to {json_path} and {csv_path}\n")
+    return json_path
+
+
+def run_build(command, tool_options, on_line, progress=None, on_profiler=None, on_runner=None):
+    # One build with everything tool_options enables: build cache, compiler cache and resource profiler.
+    # Output lines go to on_line (and progress), on_profiler gets the ResourceProfiler for live display
+    # and on_runner the BuildRunner, whose cancel() stops the build.
+    # Raises FileNotFoundError when Nuitka cannot be started.
+    from build_cache import cached_build
+    from build_history import BuildRecorder
+    from compiler_cache import CompilerCacheMonitor
+
+    monitor = CompilerCacheMonitor({} if "--disable-ccache" in command else tool_options)
+    recorder = BuildRecorder(command, tool_options)
+
+    def record(line):
+        on_line(line)
+        recorder.feed(line)
+
+    def feed(line):
+        record(line)
+        monitor.feed(line)
+        if progress:
+            progress.feed(line)
+
+    runner, profiler = create_runner(command, tool_options, progress.phase_name if progress else None, env=monitor.env())
+    if profiler and on_profiler:
+        on_profiler(profiler)
+    if on_runner:
+        on_runner(runner)
+    monitor.start()
+    try:
+        returncode = cached_build(command, tool_options, feed, runner=runner)
+    finally:
+        finish_profile(profiler, command, tool_options, record)
+
+    if progress:
+        progress.finish(returncode == 0 and not runner.cancelled)
+    if runner.cancelled:
+        record("Build cancelled.\n")
+    else:
+        report = monitor.finish(command[-1], progress.durations.get("compilation") if progress else None)
+        if report:
+            record(report)
+        if returncode == 0 and tool_options.get("benchmark_enabled"):
+            benchmark_build(command, tool_options, record)
+        if returncode == 0 and tool_options.get("dist_analysis_enabled"):
+            analyze_build(command, tool_options, record)
+    recorder.finish(returncode, progress.durations if progress else None, runner.cancelled)
+    return returncode
+
+
+def benchmark_build(command, tool_options, on_line):
+    from benchmark import run_benchmark
+
+    try:
+        return run_benchmark(command, tool_options, on_line)
+    except (OSError, ValueError) as e:
+        on_line(f"Benchmark failed: {e}\n")
+        return None
+
+
+def analyze_build(command, tool_options, on_line, limit=10):
+    from dist_analyzer import analyze_dist, format_analysis
+    from onefile import dist_dir_for
+
+    dist_dir = dist_dir_for(command)
+    if not os.path.isdir(dist_dir):
+        on_line(f"No .dist folder found at {dist_dir}, build in standalone mode without --remove-output to analyze it.\n")
+        return None
+    try:
+        analysis = analyze_dist(dist_dir, int(tool_options.get("dist_analysis_workers") or 0) or None)
+    except OSError as e:
+        on_line(f"Dist analysis failed: {e}\n")
+        return None
+    on_line(format_analysis(analysis, limit))
+    return analysis
+
+
+def run_builds(settings_paths, concurrency=1, dry_run=False, out=None, skip_preflight=False):
+    from build_progress import BuildProgress
+
+    out = out or sys.stdout
+    commands = []
+    for settings_path in settings_paths:
+        try:
+            settings = load_settings(settings_path)
+            commands.append((settings_path, settings_command(settings), settings["tool_options"]))
+        except (OSError, ValueError) as e:
+            out.write(f"{settings_path}: {e}\n")
+            return 2
+
+    if dry_run:
+        for settings_path, command, tool_options in commands:
+            out.write(' '.join(command) + "\n")
+        return 0
+
+    if not skip_preflight:
+        from preflight import format_issues, has_errors, preflight
+
+        failed = False
+        for settings_path, command, tool_options in commands:
+            issues = preflight(command, tool_options)
+            if issues:
+                out.write(f"{settings_path}:\n{format_issues(issues)}")
+            failed = failed or has_errors(issues)
+        if failed:
+            out.write("Preflight check failed, use --skip-preflight to build anyway.\n")
+            return 1
+
+    if len(commands) == 1:
+        settings_path, command, tool_options = commands[0]
+        out.write(f"Executing command: {' '.join(command)}\n\n")
+        try:
+            returncode = run_build(command, tool_options, out.write, BuildProgress(command))
+        except FileNotFoundError:
+            out.write(NUITKA_NOT_FOUND)
+            return 1
+        out.write("Compilation successful.\n" if returncode == 0 else "Compilation failed.\n")
+        return 0 if returncode == 0 else 1
+
+    from build_queue import BuildJob, BuildQueue
+
+    build_queue = BuildQueue(max_workers=concurrency)
+    for settings_path, command, tool_options in commands:
+        build_queue.add(BuildJob(settings_path, command, tool_options))
+    build_queue.start()
+
+    finished = 0
+    while finished < len(build_queue.jobs):
+        kind, job, data = build_queue.events.get()
+        if kind == "start":
+            out.write(f"[{job.name}] Executing command: {' '.join(data)}\n")
+        elif kind == "line":
+            out.write(f"[{job.name}] {data}")
+        elif kind == "finish":
+            finished += 1
+            out.write(f"[{job.name}] {job.status} (exit {job.returncode}) in {job.duration:.1f}s\n")
+
+    return 0 if all(job.status == "succeeded" for job in build_queue.jobs) else 1
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="py_nuitka_gui", description="Py Nuitka GUI headless mode")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    build_parser = subparsers.add_parser("build", help="compile one or more saved project settings files")
+    build_parser.add_argument("settings", nargs="+", help="project-settings.json file(s)")
+    build_parser.add_argument("--concurrency", type=int, default=1, help="number of builds to run at once")
+    build_parser.add_argument("--dry-run", action="store_true", help="only print the Nuitka commands")
+    build_parser.add_argument("--skip-preflight", action="store_true", help="build even when the preflight check finds errors")
+
+    preflight_parser = subparsers.add_parser("preflight", help="check the toolchain, disk space and memory for a build without starting it")
+    preflight_parser.add_argument("settings", help="project-settings.json file")
+    preflight_parser.add_argument("--refresh", action="store_true", help="probe the toolchain again instead of using the cached result")
+
+    benchmark_parser = subparsers.add_parser("benchmark", help="benchmark an existing build against CPython")
+    benchmark_parser.add_argument("settings", help="project-settings.json file")
+
+    history_parser = subparsers.add_parser("history", help="list, search and compare stored builds")
+    history_parser.add_argument("--search", help="words that must all appear in an output line")
+    history_parser.add_argument("--level", choices=["info", "warning", "error", "output"], help="only lines of this level")
+    history_parser.add_argument("--compare", nargs=2, type=int, metavar="ID", help="compare the timings and warnings of two builds")
+    history_parser.add_argument("--limit", type=int, default=20, help="number of builds or lines to show")
+
+    worker_parser = subparsers.add_parser("worker", help="run a build worker that compiles builds sent by other machines")
+    worker_parser.add_argument("--listen", default="127.0.0.1:8765", help="host:port or unix:/path to listen on (default: 127.0.0.1:8765)")
+    worker_parser.add_argument("--dir", help="folder for received sources and workspaces (default: worker/ in the app data folder)")
+    worker_parser.add_argument("--slots", type=int, default=1, help="number of builds to run at once")
+    worker_parser.add_argument("--token", help="shared secret coordinators must know (default: $PY_NUITKA_GUI_WORKER_TOKEN or a generated token file)")
+
+    watch_parser = subparsers.add_parser("watch", help="rebuild whenever a source file below the script's folder changes")
+    watch_parser.add_argument("settings", help="project-settings.json file")
+    watch_parser.add_argument("--debounce", type=float, help="seconds of quiet before rebuilding (default: the watch_debounce setting)")
+
+    onefile_parser = subparsers.add_parser("onefile", help="measure cold/warm startup and the payload of an existing build")
+    onefile_parser.add_argument("settings", help="project-settings.json file")
+    onefile_parser.add_argument("--runs", type=int, help="launches per measurement (default: the onefile_startup_runs setting)")
+
+    dist_parser = subparsers.add_parser("dist", help="analyze the .dist folder of an existing standalone build")
+    dist_parser.add_argument("settings", help="project-settings.json file")
+    dist_parser.add_argument("--limit", type=int, default=25, help="entries shown per section")
+
+    profiles_parser = subparsers.add_parser("profiles", help="show, compare and bulk edit layered settings files")
+    profiles_commands = profiles_parser.add_subparsers(dest="profiles_command")
+    profiles_commands.required = True
+    show_parser = profiles_commands.add_parser("show", help="effective settings and the layer that set each value")
+    show_parser.add_argument("settings", help="project-settings.json file")
+    diff_parser = profiles_commands.add_parser("diff", help="effective values two settings files disagree on")
+    diff_parser.add_argument("settings", nargs=2, help="two project-settings.json files")
+    set_parser = profiles_commands.add_parser("set", help="set or remove values in many settings files at once")
+    set_parser.add_argument("settings", nargs="+", help="project-settings.json files to edit (only their own layer is changed)")
+    set_parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                            help="value to set, e.g. --set=--jobs=8, --set=--standalone or --set=ccache_enabled=false (repeatable)")
+    set_parser.add_argument("--unset", action="append", default=[], metavar="KEY",
+                            help="value to remove so it is inherited again, e.g. --unset=--jobs (repeatable)")
+
+    bench_parser = subparsers.add_parser("bench", help="build the benchmark fixtures and compare build time, memory and size with a baseline")
+    bench_parser.add_argument("--fixture", action="append", metavar="NAME", help="fixture to build: hello, modules, packages or standalone (repeatable, default: all)")
+    bench_parser.add_argument("--repeats", type=int, default=1, help="clean builds per fixture, the median is compared")
+    bench_parser.add_argument("--baseline", help="baseline JSON file (default: build-baseline.json in the app data folder)")
+    bench_parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline instead of comparing")
+    bench_parser.add_argument("--time-threshold", type=float, default=10.0, metavar="PERCENT", help="allowed build time growth (default: 10)")
+    bench_parser.add_argument("--memory-threshold", type=float, default=15.0, metavar="PERCENT", help="allowed peak memory growth (default: 15)")
+    bench_parser.add_argument("--size-threshold", type=float, default=5.0, metavar="PERCENT", help="allowed artifact size growth (default: 5)")
+    bench_parser.add_argument("--work-dir", help="folder for the fixture sources and builds (default: bench/ in the app data folder)")
+    bench_parser.add_argument("--verbose", action="store_true", help="show the Nuitka output of every build")
+
+    sweep_parser = subparsers.add_parser("sweep", help="build every combination of the given options and rank the results")
+    sweep_parser.add_argument("settings", help="project-settings.json file")
+    sweep_parser.add_argument("--axis", action="append", required=True, metavar="OPTION[=V1,V2]",
+                              help="option to sweep, e.g. --axis=--lto=no,auto,yes or --axis=--static-libpython (repeatable)")
+    sweep_parser.add_argument("--concurrency", type=int, default=1, help="number of builds to run at once")
+    sweep_parser.add_argument("--rank-by", default="runtime", choices=["runtime", "startup", "size", "build_time"])
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        return run_builds(args.settings, concurrency=args.concurrency, dry_run=args.dry_run, skip_preflight=args.skip_preflight)
+    if args.command == "preflight":
+        from preflight import format_issues, has_errors, preflight, probe_environment
+
+        try:
+            settings = load_settings(args.settings)
+            command = settings_command(settings)
+        except (OSError, ValueError) as e:
+            sys.stdout.write(f"{args.settings}: {e}\n")
+            return 2
+        probe = probe_environment(command[0], refresh=args.refresh)
+        sys.stdout.write(f"Python {probe['python_version']} ({probe['python']}), Nuitka {probe.get('nuitka_version', 'not usable')}, "
+                         f"C compilers: {', '.join(probe['compilers']) or 'none'}\n")
+        issues = preflight(command, dict(settings["tool_options"], preflight_enabled=True))
+        sys.stdout.write(format_issues(issues))
+        return 1 if has_errors(issues) else 0
+    if args.command == "benchmark":
+        try:
+            settings = load_settings(args.settings)
+            command = settings_command(settings)
+        except (OSError, ValueError) as e:
+            sys.stdout.write(f"{args.settings}: {e}\n")
+            return 2
+        return 0 if benchmark_build(command, settings["tool_options"], sys.stdout.write) else 1
+    if args.command == "history":
+        from build_history import BuildHistory, format_build, format_comparison
+
+        history = BuildHistory()
+        if args.compare:
+            try:
+                sys.stdout.write(format_comparison(history.compare(*args.compare)))
+            except ValueError as e:
+                sys.stdout.write(f"{e}\n")
+                return 2
+        elif args.search:
+            for row in history.search(args.search, args.level, args.limit):
+                sys.stdout.write(f"#{row['build_id']} {time.strftime('%Y-%m-%d %H:%M', time.localtime(row['started']))} "
+                                 f"{os.path.basename(row['script'])}:{row['line']} [{row['level']}] {row['text']}\n")
+        else:
+            for build in history.builds(args.limit):
+                sys.stdout.write(format_build(build) + "\n")
+        return 0
+    if args.command == "worker":
+        from remote_build import serve_worker
+
+        return serve_worker(args.listen, args.dir or os.path.join(app_data_dir(), "worker"), args.slots, args.token)
+    if args.command == "watch":
+        from watcher import watch_build
+
+        try:
+            settings = load_settings(args.settings)
+            command = settings_command(settings)
+        except (OSError, ValueError) as e:
+            sys.stdout.write(f"{args.settings}: {e}\n")
+            return 2
+        debounce = args.debounce if args.debounce is not None else float(settings["tool_options"].get("watch_debounce") or 0.5)
+        return watch_build(settings, command, debounce)
+    if args.command == "onefile":
+        from onefile import dist_dir_for, format_breakdown, format_startup, measure_startup, payload_breakdown
+
+        try:
+            settings = load_settings(args.settings)
+            command = settings_command(settings)
+            runs = args.runs or int(settings["tool_options"].get("onefile_startup_runs") or 20)
+            sys.stdout.write(format_startup(measure_startup(command, settings["tool_options"], runs, sys.stdout.write)))
+        except (OSError, ValueError) as e:
+            sys.stdout.write(f"{args.settings}: {e}\n")
+            return 2
+        dist_dir = dist_dir_for(command)
+        if os.path.isdir(dist_dir):
+            from benchmark import find_binary
+
+            sys.stdout.write(format_breakdown(payload_breakdown(dist_dir), find_binary(command)))
+        else:
+            sys.stdout.write(f"No payload folder found at {dist_dir}, build without --remove-output to analyze it.\n")
+        return 0
+    if args.command == "dist":
+        try:
+            settings = load_settings(args.settings)
+            command = settings_command(settings)
+        except (OSError, ValueError) as e:
+            sys.stdout.write(f"{args.settings}: {e}\n")
+            return 2
+        return 0 if analyze_build(command, settings["tool_options"], sys.stdout.write, args.limit) else 1
+    if args.command == "profiles":
+        from settings_profiles import bulk_edit, diff_settings, explain, format_diff, format_explain
+
+        try:
+            if args.profiles_command == "show":
+                sys.stdout.write(format_explain(*explain(args.settings)))
+            elif args.profiles_command == "diff":
+                sys.stdout.write(format_diff(*args.settings, diff_settings(*args.settings)))
+            else:
+                changed = bulk_edit(args.settings, args.set, args.unset)
+                sys.stdout.write("".join(f"Updated {path}\n" for path in changed))
+                sys.stdout.write(f"{len(changed)} of {len(args.settings)} file(s) changed.\n")
+        except (OSError, ValueError) as e:
+            sys.stdout.write(f"{e}\n")
+            return 2
+        return 0
+    if args.command == "bench":
+        from build_bench import run_bench
+
+        thresholds = {"time": args.time_threshold, "memory": args.memory_threshold, "size": args.size_threshold}
+        return run_bench(args.fixture, max(args.repeats, 1), args.baseline, args.save_baseline, thresholds, args.work_dir, args.verbose)
+    if args.command == "sweep":
+        from option_sweep import parse_axis, run_sweep
+
+        try:
+            settings = load_settings(args.settings)
+            validate_settings(settings)
+        except (OSError, ValueError) as e:
+            sys.stdout.write(f"{args.settings}: {e}\n")
+            return 2
+        try:
+            axes = dict(parse_axis(axis) for axis in args.axis)
+        except ValueError as e:
+            sys.stdout.write(f"{e}\n")
+            return 2
+        ranked = run_sweep(settings, axes, concurrency=args.concurrency, key=args.rank_by)
+        return 0 if ranked and ranked[0].job.status == "succeeded" else 1
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+from benchmark import find_binary, load_workloads, run_once, summarize
+from build_profiler import format_bytes
+
+# Variables in --onefile-tempdir-spec that give every launch a new folder, nothing is reused between runs then
+PER_RUN_VARIABLES = ("{PID}", "{TIME}")
+
+# Extension modules and shared libraries are listed one by one, everything else per top level folder
+EXTENSION_PATTERN = re.compile(r"(\.cpython-[^.]+|\.abi3)?\.(pyd|so)$")
+LIBRARY_PATTERN = re.compile(r"\.(dll|dylib|so(\.\d+)*)$", re.IGNORECASE)
+
+
+def cache_dir():
+    # What Nuitka's {CACHE_DIR} expands to on this platform
+    if sys.platform == "win32":
+        return os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Caches")
+    return os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+
+
+def extraction_dir(spec, binary, cwd):
+    # The folder a onefile binary started in cwd unpacks into, None when it changes on every launch or cannot be resolved here
+    if not spec or any(variable in spec for variable in PER_RUN_VARIABLES):
+        return None
+    values = {
+        "{TEMP}": tempfile.gettempdir(),
+        "{CACHE_DIR}": cache_dir(),
+        "{HOME}": os.path.expanduser("~"),
+        "{PROGRAM}": os.path.abspath(binary),
+        "{PROGRAM_BASE}": os.path.splitext(os.path.abspath(binary))[0],
+        "{PROGRAM_DIR}": os.path.dirname(os.path.abspath(binary)),
+    }
+    for variable, value in values.items():
+        spec = spec.replace(variable, value)
+    if "{" in spec:
+        # {COMPANY}, {PRODUCT}, {VERSION} and the like come from options this tool does not manage
+        return None
+    return os.path.normpath(os.path.join(cwd, spec))
+
+
+def clearable(target, protected):
+    # Cold starts need the extraction folder out of the way, only when it is a folder of its own and not e.g. {TEMP},
+    # {HOME}, the program's folder or one of their parents
+    target = os.path.realpath(target)
+    if os.path.dirname(target) == target:
+        return False
+    for path in protected:
+        path = os.path.realpath(path)
+        if path == target or path.startswith(target.rstrip(os.sep) + os.sep):
+            return False
+    return True
+
+
+def measure_startup(command, tool_options, runs=20, on_line=None):
+    # Cold (nothing unpacked yet) and warm (payload already extracted) startup times of a onefile binary
+    binary = find_binary(command)
+    if binary is None:
+        raise ValueError("No executable was found for this build, compile it first.")
+    workloads, startup = load_workloads(tool_options.get("benchmark_workloads"))
+    workload = startup or workloads[0]
+    argv = [binary] + workload.get("args", [])
+    stdin_data = workload.get("stdin", "")
+    timeout = float(tool_options.get("benchmark_timeout") or 60)
+    cwd = os.path.dirname(command[-1])
+    spec = next((arg.split("=", 1)[1] for arg in command if arg.startswith("--onefile-tempdir-spec=")), "")
+    target = extraction_dir(spec, binary, cwd)
+    shared_dir = None
+    if target and not clearable(target, [tempfile.gettempdir(), cache_dir(), os.path.expanduser("~"), os.path.dirname(os.path.abspath(binary)),
+                                         cwd, os.getcwd()]):
+        shared_dir, target = target, None
+    # Whatever is in the extraction folder already is moved aside and put back afterwards, cold starts only ever delete
+    # what the binary unpacked during the measurement
+    backup = None
+    if target and os.path.lexists(target):
+        backup = f"{target}.startup-measurement-{os.getpid()}"
+        os.rename(target, backup)
+
+    def run(clear):
+        if clear and target:
+            shutil.rmtree(target, ignore_errors=True)
+        return run_once(argv, stdin_data, timeout, cwd)["wall"]
+
+    if on_line:
+        on_line(f"Measuring {runs} cold and {runs} warm starts of {binary}...\n")
+    try:
+        cold = [run(True) for _ in range(runs)]
+        warm = None
+        if target:
+            run(True)
+            warm = [run(False) for _ in range(runs)]
+    finally:
+        if target:
+            shutil.rmtree(target, ignore_errors=True)
+        if backup:
+            os.rename(backup, target)
+    return {"binary": binary, "extraction_dir": target, "shared_dir": shared_dir, "cold": summarize(cold), "warm": summarize(warm) if warm else None}
+
+
+def format_startup(result):
+    cold, warm = result["cold"], result["warm"]
+    text = f"Cold start: median {cold['median'] * 1000:.1f} ms (p95 {cold['p95'] * 1000:.1f} ms, {cold['runs']} runs)\n"
+    if warm:
+        text += f"Warm start: median {warm['median'] * 1000:.1f} ms (p95 {warm['p95'] * 1000:.1f} ms), payload reused from {result['extraction_dir']}\n"
+        if warm["median"] > 0:
+            text += f"Reusing the extracted payload makes starts {cold['median'] / warm['median']:.1f}x faster.\n"
+    elif result.get("shared_dir"):
+        text += (f"Warm starts not measured: the payload unpacks into {result['shared_dir']}, which is not a folder of its own "
+                 "and is never deleted for a cold start. Add a subfolder to --onefile-tempdir-spec, e.g. {CACHE_DIR}/<name>/<version>.\n")
+    else:
+        text += ("Every start unpacks the payload again, set --onefile-tempdir-spec to a fixed folder "
+                 "(e.g. {CACHE_DIR}/<name>/<version>) so later starts reuse it.\n")
+    return text
+
+
+def payload_group(relative_path):
+    # (group, kind) that a file in the .dist folder is counted under
+    name = os.path.basename(relative_path)
+    top = relative_path.replace(os.sep, "/").split("/")[0]
+    match = EXTENSION_PATTERN.search(name)
+    if match and (match.group(1) or name.endswith(".pyd")):
+        module = relative_path.replace(os.sep, "/").split(".", 1)[0].replace("/", ".")
+        return module, "extension module"
+    if LIBRARY_PATTERN.search(name):
+        return name, "shared library"
+    if top != relative_path:
+        return top, "package data"
+    return name, "file"
+
+
+def payload_breakdown(dist_dir):
+    # Size of the onefile payload per extension module, shared library and top level folder, largest first
+    groups = {}
+    for root, dirs, files in os.walk(dist_dir):
+        for name in files:
+            file_path = os.path.join(root, name)
+            if os.path.islink(file_path):
+                continue
+            group, kind = payload_group(os.path.relpath(file_path, dist_dir))
+            entry = groups.setdefault(group, {"name": group, "kind": kind, "size": 0, "files": 0})
+            entry["size"] += os.path.getsize(file_path)
+            entry["files"] += 1
+    return sorted(groups.values(), key=lambda entry: entry["size"], reverse=True)
+
+
+def dist_dir_for(command):
+    output_dir = next(arg.split("=", 1)[1] for arg in command if arg.startswith("--output-dir="))
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(command[-1]))[0] + ".dist")
+
+
+def format_breakdown(entries, binary=None, limit=25):
+    total = sum(entry["size"] for entry in entries)
+    text = f"Payload: {format_bytes(total)} in {sum(entry['files'] for entry in entries)} files"
+    if binary and os.path.isfile(binary) and total:
+        text += f", {format_bytes(os.path.getsize(binary))} packed ({os.path.getsize(binary) * 100.0 / total:.0f}%)"
+    text += "\n"
+    for entry in entries[:limit]:
+        share = entry["size"] * 100.0 / total if total else 0.0
+        text += f"  {format_bytes(entry['size']):>10} {share:5.1f}%  {entry['name']} ({entry['kind']})\n"
+    return text
@@ -0,0 +1,179 @@
+import os
+import re
+import sys
+
+from nuitka_core import OPTION_TYPES, app_data_dir
+
+# "  Control the inclusion of modules and packages in result:" starts a group of options
+CATEGORY_PATTERN = re.compile(r"^  (\S[^:]*):$")
+# "    --include-module=MODULE   Include a single module." or "  -h, --help    show this help"
+OPTION_PATTERN = re.compile(r"^ {2,4}((?:-{1,2}[\w-]+(?:=\S+)?)(?:, -{1,2}[\w-]+(?:=\S+)?)*)(?: {2,}(\S.*))?$")
+CONTINUATION_PATTERN = re.compile(r"^ {10,}(\S.*)$")
+ALLOWED_VALUES_PATTERN = re.compile(r'allowed values are:?\s*((?:"[^"]+"(?:\s*,\s*(?:and\s+|or\s+)?|\s+(?:and|or)\s+)?)+)', re.IGNORECASE)
+# "Can be given multiple times", "can be specified multiple times"
+MULTIPLE_PATTERN = re.compile(r"(?:given|specified)\s+multiple\s+times", re.IGNORECASE)
+
+# Options this tool sets itself, or that only print information and exit
+SKIPPED_OPTIONS = ("--help", "--version", "--main", "--output-dir", "--project")
+SKIPPED_PREFIXES = ("--help-", "--list-")
+
+
+def option_type(metavar, description):
+    # bool, int, path, dir, list or str, from the metavar and the help text
+    if not metavar:
+        return "bool"
+    if MULTIPLE_PATTERN.search(description):
+        return "list"
+    if metavar == "N":
+        return "int"
+    if "DIR" in metavar:
+        return "dir"
+    if any(word in metavar for word in ("PATH", "FILENAME", "ICON", "FILE")):
+        return "path"
+    return "str"
+
+
+def parse_help(text):
+    # [(category, [(option, type, description)])] and {option: [allowed values]} from "nuitka --help"
+    schema = []
+    choices = {}
+    category = ("General", [])
+    current = None
+
+    def finish_option():
+        if current is None:
+            return
+        option, metavar, lines = current
+        description = " ".join(lines)
+        if option in SKIPPED_OPTIONS or option.startswith(SKIPPED_PREFIXES):
+            return
+        kind = option_type(metavar, description)
+        match = ALLOWED_VALUES_PATTERN.search(description)
+        if match and kind in ("str", "int"):
+            choices[option] = [""] + re.findall(r'"([^"]+)"', match.group(1))
+        category[1].append((option, kind, description))
+
+    for line in text.splitlines():
+        continuation = CONTINUATION_PATTERN.match(line)
+        if continuation and current is not None:
+            current[2].append(continuation.group(1))
+            continue
+        match = OPTION_PATTERN.match(line)
+        if match:
+            finish_option()
+            # The long spelling, e.g. "--help" of "-h, --help"
+            spelling = [name for name in match.group(1).split(", ") if name.startswith("--")] or match.group(1).split(", ")
+            option, _, metavar = spelling[-1].partition("=")
+            current = (option, metavar, [match.group(2)] if match.group(2) else [])
+            continue
+        match = CATEGORY_PATTERN.match(line)
+        if match:
+            finish_option()
+            current = None
+            if category[1]:
+                schema.append(category)
+            category = (match.group(1)[0].upper() + match.group(1)[1:], [])
+    finish_option()
+    if category[1]:
+        schema.append(category)
+    return schema, choices
+
+
+def nuitka_version(python=None):
+    # Installed Nuitka version without importing it, None when Nuitka is not available
+    import subprocess
+
+    python = python or sys.executable
+    if python == sys.executable:
+        try:
+            from importlib.metadata import PackageNotFoundError, version
+            try:
+                return version("Nuitka")
+            except PackageNotFoundError:
+                pass
+        except ImportError:
+            pass
+    try:
+        output = subprocess.run([python, "-m", "nuitka", "--version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                universal_newlines=True, timeout=60)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    first_line = output.stdout.strip().splitlines()[:1]
+    return first_line[0].strip() if output.returncode == 0 and first_line else None
+
+
+def schema_path(version):
+    safe_version = re.sub(r"[^\w.-]+", "_", version)
+    return os.path.join(app_data_dir(), f"option-schema-{safe_version}.json")
+
+
+def load_schema(python=None):
+    # Schema of the installed Nuitka, parsed from --help once per Nuitka version; None when Nuitka is missing
+    import json
+    import subprocess
+
+    python = python or sys.executable
+    version = nuitka_version(python)
+    if version is None:
+        return None
+    try:
+        with open(schema_path(version), 'r') as f:
+            data = json.load(f)
+        return version, [(category, [tuple(option) for option in options]) for category, options in data["schema"]], data["choices"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    try:
+        output = subprocess.run([python, "-m", "nuitka", "--help"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                universal_newlines=True, timeout=120)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if output.returncode != 0:
+        return None
+    schema, choices = parse_help(output.stdout)
+    # Written to a temporary file of its own first, the GUI and a build may parse the same version at once
+    import tempfile
+    try:
+        path = schema_path(version)
+        handle, temporary_path = tempfile.mkstemp(prefix="option-schema.", suffix=".tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(handle, 'w') as f:
+                json.dump({"version": version, "schema": schema, "choices": choices}, f, indent=1)
+            os.replace(temporary_path, path)
+        except OSError:
+            os.remove(temporary_path)
+            raise
+    except OSError:
+        # An unwritable app data folder only means parsing --help again next time
+        pass
+    return version, schema, choices
+
+
+def extra_categories(schema, known=OPTION_TYPES):
+    # The schema without the options already in OPTIONS_DATA
+    categories = []
+    for category, options in schema:
+        options = [option for option in options if option[0] not in known]
+        if options:
+            categories.append((category, options))
+    return categories
+
+
+cached_types = None
+
+
+def cached_option_types():
+    # Option types from the schema of the installed Nuitka, parsed here when the GUI has not done it yet,
+    # so headless builds of a settings file get the same command as the GUI
+    global cached_types
+    if cached_types is None:
+        schema = load_schema()
+        # Without Nuitka there is nothing to build, do not start Python again for every command
+        cached_types = {option: kind for category, options in schema[1] for option, kind, description in options} if schema else {}
+    return cached_types
+
+
+def summary(description, width=90):
+    # First sentence of an option's help, short enough for a label
+    sentence = re.split(r"(?<=[a-z0-9)])\.\s", description, maxsplit=1)[0].rstrip(".")
+    return sentence if len(sentence) <= width else sentence[:width - 3].rstrip() + "..."
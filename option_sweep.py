@@ -0,0 +1,176 @@
+import copy
+import itertools
+import os
+import re
+import sys
+
+from benchmark import find_binary, load_workloads, measure
+from build_cache import dir_size
+from build_profiler import format_bytes
+from build_queue import BuildJob, BuildQueue
+from nuitka_core import NUITKA_NOT_FOUND, OPTION_TYPES, settings_command
+
+# Metrics a sweep can be ranked by, smaller is better for all of them
+RANK_KEYS = {
+    "runtime": "Runtime (median)",
+    "startup": "Startup time",
+    "size": "Binary size",
+    "build_time": "Build time",
+}
+
+# Options the build queue sets on every build itself (see build_queue.with_jobs), sweeping them would build identical variants
+QUEUE_OPTIONS = ("--jobs",)
+
+
+def parse_axis(text):
+    # "--lto=no,auto,yes" -> ("--lto", ["no", "auto", "yes"]), a bare bool option sweeps off/on
+    option, _, values = text.partition("=")
+    if option in QUEUE_OPTIONS:
+        raise ValueError(f"{option} cannot be swept, the build queue sets it for every build from --concurrency")
+    if OPTION_TYPES.get(option) == "bool" or not values:
+        return option, [False, True]
+    return option, [value.strip() for value in values.split(",")]
+
+
+def variant_name(values):
+    parts = []
+    for option, value in values:
+        if value is True:
+            parts.append(option)
+        elif value:
+            parts.append(f"{option}={value}")
+    return " ".join(parts) or "(baseline)"
+
+
+class Variant:
+    def __init__(self, index, values, settings):
+        self.index = index
+        self.name = variant_name(values)
+        self.values = dict(values)
+        self.settings = settings
+        self.command = settings_command(settings)
+        self.job = None
+        self.metrics = {}
+
+
+def sweep_variants(settings, axes):
+    # One variant per combination of the axis values, each built into its own output folder
+    base_output = os.path.join(settings["output_dir"], "sweep")
+    variants = []
+    options = list(axes)
+    for index, combination in enumerate(itertools.product(*(axes[option] for option in options))):
+        values = list(zip(options, combination))
+        variant_settings = copy.deepcopy(settings)
+        variant_settings["options"].update(values)
+        slug = re.sub(r"[^\w.=-]+", "_", variant_name(values)).strip("_")[:60]
+        variant_settings["output_dir"] = os.path.join(base_output, f"{index:02d}-{slug}")
+        os.makedirs(variant_settings["output_dir"], exist_ok=True)
+        # The sweep benchmarks every variant itself once all builds are done
+        variant_settings["tool_options"]["benchmark_enabled"] = False
+        variants.append(Variant(index, values, variant_settings))
+    return variants
+
+
+def build_variants(variants, concurrency, events=None):
+    # Starts the builds on a BuildQueue, so at most concurrency variants compile at once
+    build_queue = BuildQueue(max_workers=concurrency, events=events)
+    for variant in variants:
+        variant.job = build_queue.add(BuildJob(variant.name, variant.command, variant.settings["tool_options"]))
+    build_queue.start()
+    return build_queue
+
+
+def measure_variant(variant, on_line):
+    # Run after all builds are finished, so concurrent builds do not disturb the timings
+    tool_options = variant.settings["tool_options"]
+    variant.metrics = {"build_time": variant.job.duration}
+    if variant.job.status != "succeeded":
+        return variant.metrics
+    try:
+        measure_binary(variant, tool_options)
+    except (OSError, ValueError) as e:
+        # A missing binary or an invalid benchmark setting only loses this variant's measurements
+        variant.metrics["error"] = str(e)
+        on_line(f"{variant.name}: measuring failed: {e}\n")
+        return variant.metrics
+    on_line(f"{variant.name}: {format_metrics(variant.metrics)}\n")
+    return variant.metrics
+
+
+def measure_binary(variant, tool_options):
+    binary = find_binary(variant.job.command)
+    if binary is None:
+        return
+
+    dist_dir = os.path.join(variant.settings["output_dir"], os.path.splitext(os.path.basename(variant.settings["file_path"]))[0] + ".dist")
+    is_standalone = "--standalone" in variant.command and "--onefile" not in variant.command
+    variant.metrics["size"] = dir_size(dist_dir) if is_standalone and os.path.isdir(dist_dir) else os.path.getsize(binary)
+
+    workloads, startup = load_workloads(tool_options.get("benchmark_workloads"))
+    warmup = int(tool_options.get("benchmark_warmup") or 1)
+    repeats = max(int(tool_options.get("benchmark_repeats") or 5), 1)
+    timeout = float(tool_options.get("benchmark_timeout") or 60)
+    cwd = os.path.dirname(variant.settings["file_path"])
+
+    runtime = 0.0
+    first_output = None
+    for workload in workloads:
+        result = measure([binary], workload, warmup, repeats, timeout, cwd)
+        if result["wall"]:
+            runtime += result["wall"]["median"]
+        if first_output is None and result["first_output"]:
+            first_output = result["first_output"]["median"]
+    variant.metrics["runtime"] = runtime
+    if startup:
+        startup_result = measure([binary], startup, warmup, repeats, timeout, cwd)["wall"]
+        variant.metrics["startup"] = startup_result["median"] if startup_result else None
+    else:
+        variant.metrics["startup"] = first_output
+
+
+def rank(variants, key="runtime"):
+    # Successful variants first, ordered by key and then by the other metrics in RANK_KEYS order
+    def sort_key(variant):
+        metrics = variant.metrics
+        order = [key] + [other for other in RANK_KEYS if other != key]
+        return [variant.job is None or variant.job.status != "succeeded"] + [
+            metrics.get(name) if metrics.get(name) is not None else float("inf") for name in order]
+    return sorted(variants, key=sort_key)
+
+
+def format_metrics(metrics):
+    parts = [f"build {metrics['build_time']:.1f}s"]
+    if metrics.get("size") is not None:
+        parts.append(f"size {format_bytes(metrics['size'])}")
+    if metrics.get("startup") is not None:
+        parts.append(f"startup {metrics['startup'] * 1000:.1f} ms")
+    if metrics.get("runtime") is not None:
+        parts.append(f"runtime {metrics['runtime'] * 1000:.1f} ms")
+    return ", ".join(parts)
+
+
+def run_sweep(settings, axes, concurrency=1, key="runtime", out=None):
+    # Headless sweep: build every variant, measure the successful ones and print the ranking
+    out = out or sys.stdout
+    variants = sweep_variants(settings, axes)
+    out.write(f"Sweeping {len(variants)} variant(s), {concurrency} at a time.\n")
+    build_queue = build_variants(variants, concurrency)
+    finished = 0
+    while finished < len(variants):
+        kind, job, data = build_queue.events.get()
+        if kind == "line" and data == NUITKA_NOT_FOUND:
+            out.write(f"[{job.name}] {data}")
+        elif kind == "finish":
+            finished += 1
+            out.write(f"[{job.name}] {job.status} (exit {job.returncode}) in {job.duration:.1f}s\n")
+
+    for variant in variants:
+        measure_variant(variant, out.write)
+    ranked = rank(variants, key)
+    out.write(f"\nRanking by {RANK_KEYS[key].lower()}:\n")
+    for position, variant in enumerate(ranked, 1):
+        status = format_metrics(variant.metrics) if variant.job.status == "succeeded" else variant.job.status
+        if variant.metrics.get("error"):
+            status += f" (measuring failed: {variant.metrics['error']})"
+        out.write(f"  {position}. {variant.name}: {status}\n")
+    return ranked
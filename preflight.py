@@ -0,0 +1,217 @@
+import json
+import os
+import shutil
+import sys
+import time
+
+from nuitka_core import app_data_dir
+
+# Free space in the output folder below which a build is expected to fail, and below which a standalone build may
+MIN_FREE_DISK = 256 * 1024 * 1024
+LOW_FREE_DISK = 2 * 1024 * 1024 * 1024
+# Available memory below which Nuitka's --low-memory mode is worth it, and what each parallel LTO link needs
+LOW_MEMORY = 2 * 1024 * 1024 * 1024
+LTO_MEMORY_PER_JOB = 1024 * 1024 * 1024
+# Interpreters remembered in preflight-cache.json
+MAX_CACHED_PROBES = 20
+
+COMPILER_NAMES = ["cl", "gcc", "clang"] if sys.platform == "win32" else ["cc", "gcc", "clang"]
+VSWHERE_PATH = os.path.join(os.environ.get("ProgramFiles(x86)", r"C:\Program Files (x86)"), "Microsoft Visual Studio", "Installer", "vswhere.exe")
+
+
+def cache_path():
+    return os.path.join(app_data_dir(), "preflight-cache.json")
+
+
+def installed_nuitka():
+    # Version from the package metadata, so an upgraded Nuitka is probed again although the interpreter is unchanged
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:
+        return ""
+    try:
+        return version("Nuitka")
+    except PackageNotFoundError:
+        return ""
+
+
+def probe_key(python):
+    path = os.path.realpath(python)
+    return f"{path}|{os.path.getmtime(path)}|{installed_nuitka()}"
+
+
+def find_compilers():
+    # C compilers Nuitka can use: $CC, then the usual names on PATH, MSVC through vswhere on Windows
+    names = [os.environ["CC"]] if os.environ.get("CC") else COMPILER_NAMES
+    compilers = [shutil.which(name) for name in names]
+    compilers = [compiler for compiler in compilers if compiler]
+    if sys.platform == "win32" and os.path.isfile(VSWHERE_PATH):
+        compilers.append(VSWHERE_PATH)
+    return compilers
+
+
+def run_probe(python):
+    # The slow part of the preflight check: starting Nuitka once and looking for the toolchain
+    import importlib.util
+    import subprocess
+
+    probe = {"python": python, "python_version": "unknown", "probed": time.time()}
+    try:
+        # The version of the probed interpreter, which is not necessarily the one running this tool
+        output = subprocess.run([python, "-c", "import platform; print(platform.python_version())"], stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, stdin=subprocess.DEVNULL, universal_newlines=True, timeout=30)
+        if output.returncode == 0 and output.stdout.strip():
+            probe["python_version"] = output.stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        pass
+    try:
+        output = subprocess.run([python, "-m", "nuitka", "--version"], stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                stdin=subprocess.DEVNULL, universal_newlines=True, timeout=120)
+        lines = [line.strip() for line in output.stdout.splitlines() if line.strip()]
+        if output.returncode == 0 and lines:
+            probe["nuitka_version"] = lines[0]
+        else:
+            # e.g. "Error, the Python version '3.12' is not supported by Nuitka '1.5.4'"
+            probe["nuitka_error"] = lines[-1] if lines else f"exit code {output.returncode}"
+    except (OSError, subprocess.SubprocessError) as e:
+        probe["nuitka_error"] = str(e)
+    probe["compilers"] = find_compilers()
+    probe["patchelf"] = shutil.which("patchelf")
+    probe["zstandard"] = importlib.util.find_spec("zstandard") is not None
+    return probe
+
+
+def probe_environment(python=None, refresh=False):
+    # Toolchain probe of python, cached by interpreter path and modification time
+    python = python or sys.executable
+    key = probe_key(python)
+    try:
+        with open(cache_path(), 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    if key in cache and not refresh:
+        return cache[key]
+    cache[key] = run_probe(python)
+    keys = sorted(cache, key=lambda item: cache[item].get("probed", 0))[-MAX_CACHED_PROBES:]
+    # Written to a temporary file of its own first, the GUI may probe in the background while a build checks as well
+    import tempfile
+    try:
+        handle, temporary_path = tempfile.mkstemp(prefix="preflight-cache.", suffix=".tmp", dir=os.path.dirname(cache_path()))
+        try:
+            with os.fdopen(handle, 'w') as f:
+                json.dump({item: cache[item] for item in keys}, f, indent=1)
+            os.replace(temporary_path, cache_path())
+        except OSError:
+            os.remove(temporary_path)
+            raise
+    except OSError:
+        # An unwritable app data folder only costs the next build another probe
+        pass
+    return cache[key]
+
+
+def available_memory():
+    # Bytes of memory available to new processes, None when it cannot be determined
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+    try:
+        with open("/proc/meminfo", 'r') as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus():
+    # Cores this process may run on, fewer than the machine has in containers or with CPU affinity
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def command_value(command, option):
+    return next((arg.split("=", 1)[1] for arg in command if arg.startswith(option + "=")), None)
+
+
+def format_size(size):
+    return f"{size / (1024 * 1024 * 1024):.1f} GB"
+
+
+def check_command(command, probe, cpus, disk_free, memory):
+    # [(level, message)] for a command, level "error" when the build will most likely fail
+    issues = []
+    standalone = "--standalone" in command or "--onefile" in command
+    assume_yes = "--assume-yes-for-downloads" in command
+
+    if "nuitka_error" in probe:
+        issues.append(("error", f"Nuitka does not run with {probe['python']} (Python {probe['python_version']}): {probe['nuitka_error']}"))
+    if not probe["compilers"]:
+        if sys.platform != "win32":
+            issues.append(("error", "No C compiler found (cc, gcc or clang). Install one, e.g. build-essential or the Xcode Command Line Tools."))
+        elif not assume_yes:
+            issues.append(("warning", "No C compiler found. Nuitka will ask to download MinGW64 and wait for an answer, "
+                                      "add --assume-yes-for-downloads to allow it."))
+    if standalone and sys.platform == "win32" and not assume_yes:
+        issues.append(("warning", "Standalone builds may ask to download Dependency Walker and wait for an answer, "
+                                  "add --assume-yes-for-downloads to allow it."))
+    if standalone and sys.platform.startswith("linux") and not probe["patchelf"]:
+        issues.append(("error", "Standalone builds on Linux need patchelf, install it with your package manager."))
+    if "--onefile" in command and "--onefile-no-compression" not in command and not probe["zstandard"]:
+        issues.append(("warning", "The zstandard package is missing, the onefile payload will not be compressed (pip install zstandard)."))
+
+    if disk_free is not None:
+        if disk_free < MIN_FREE_DISK:
+            issues.append(("error", f"Only {format_size(disk_free)} free in the output folder."))
+        elif standalone and disk_free < LOW_FREE_DISK:
+            issues.append(("warning", f"Only {format_size(disk_free)} free in the output folder, standalone builds can need more."))
+
+    try:
+        jobs = int(command_value(command, "--jobs") or cpus)
+    except ValueError:
+        jobs = cpus
+    if jobs <= 0:
+        # Negative values are the number of cores to leave free
+        jobs = max(cpus + jobs, 1)
+    if cpus == 1:
+        issues.append(("warning", "Only one CPU core is available, the C compilation will run one file at a time."))
+    if jobs > cpus:
+        issues.append(("warning", f"--jobs={jobs} is more than the {cpus} available cores, compilers will compete for them."))
+
+    if memory is not None:
+        lto = command_value(command, "--lto")
+        if lto in ("yes", "full") and memory < jobs * LTO_MEMORY_PER_JOB:
+            fitting_jobs = max(int(memory // LTO_MEMORY_PER_JOB), 1)
+            issues.append(("warning", f"--lto={lto} with {jobs} jobs needs about {format_size(jobs * LTO_MEMORY_PER_JOB)} of memory, "
+                                      f"{format_size(memory)} is available. Expect swapping, use --lto=no or --jobs={fitting_jobs}."))
+        if memory < LOW_MEMORY and "--low-memory" not in command:
+            issues.append(("warning", f"Only {format_size(memory)} of memory is available, consider --low-memory."))
+    return issues
+
+
+def preflight(command, tool_options):
+    # Checks the toolchain, free disk space and memory for a build command before it starts.
+    # Remote builds use the worker's toolchain, so they are not checked here.
+    if tool_options.get("remote_workers") or not tool_options.get("preflight_enabled"):
+        return []
+    output_dir = command_value(command, "--output-dir") or os.getcwd()
+    try:
+        disk_free = shutil.disk_usage(output_dir).free
+    except OSError:
+        disk_free = None
+    return check_command(command, probe_environment(command[0]), available_cpus(), disk_free, available_memory())
+
+
+def has_errors(issues):
+    return any(level == "error" for level, message in issues)
+
+
+def format_issues(issues):
+    if not issues:
+        return "Preflight check passed.\n"
+    return "".join(f"Preflight {level}: {message}\n" for level, message in issues)
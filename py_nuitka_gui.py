@@ -1,13 +1,38 @@
 import os
-import subprocess
 import sys
-import tkinter as tk
-from tkinter import filedialog, scrolledtext, ttk, messagebox
-import threading
-import queue
-import re
-import webbrowser
-import json
+import time
+
+STARTED = time.perf_counter()
+
+if __name__ == "__main__" and len(sys.argv) > 1 and not sys.argv[1].startswith("-"):
+    # Headless mode (python -m py_nuitka_gui build settings.json), dispatched before tkinter is imported
+    from nuitka_core import main
+    sys.exit(main())
+
+# Startup stages are timed from here, "--profile-startup" prints them (see startup_profile)
+from startup_profile import StartupProfile
+startup_profile = StartupProfile(STARTED)
+
+# Only what the main window needs is imported up front, dialogs and analysis windows import their modules when first opened
+with startup_profile.stage("import tkinter"):
+    import tkinter as tk
+    from tkinter import scrolledtext, ttk, messagebox
+with startup_profile.stage("import stdlib"):
+    import threading
+    import queue
+with startup_profile.stage("import nuitka_core"):
+    from nuitka_core import (NUITKA_NOT_FOUND, OPTIONS_DATA, OPTION_CHOICES, OPTION_TYPES, TOOL_OPTIONS_DATA, TOOL_OPTION_TYPES, build_command,
+                             build_log_path, default_options, default_tool_options, load_settings, run_build, save_settings,
+                             settings_command, validate_settings)
+
+# Output rendering: the queue is drained every QUEUE_POLL_MS, at most QUEUE_BATCH_SIZE lines per insert
+QUEUE_POLL_MS = 50
+QUEUE_BATCH_SIZE = 2000
+# Samples shown in the resource sparklines
+SPARKLINE_SAMPLES = 120
+# Option search: typing pauses this long before filtering, at most this many option rows are shown
+SEARCH_DELAY_MS = 150
+MAX_SEARCH_RESULTS = 60
 
 class ScrollableLabelFrame(ttk.LabelFrame):
     def __init__(self, container, *args, **kwargs):
@@ -16,9 +41,10 @@ class ScrollableLabelFrame(ttk.LabelFrame):
         self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
         self.scrollable_frame = ttk.Frame(self.canvas)
 
+        # The frame is the only canvas item, its new size is the scroll region (no bbox walk per resize)
         self.scrollable_frame.bind(
             "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+            lambda e: self.canvas.configure(scrollregion=(0, 0, e.width, e.height))
         )
 
         self.canvas_frame = self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
@@ -38,13 +64,145 @@ class ScrollableLabelFrame(ttk.LabelFrame):
         self.canvas.update_idletasks()
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
 
+class OutputRenderer:
+    # Writes output into a ScrolledText with one insert per batch, keeping at most max_lines lines
+    def __init__(self, text_widget, max_lines=5000):
+        self.text_widget = text_widget
+        self.max_lines = max_lines
+        self.trimmed = False
+
+    def write(self, text):
+        if not text:
+            return
+        self.text_widget.config(state=tk.NORMAL)
+        self.text_widget.insert(tk.END, text)
+        line_count = int(self.text_widget.index("end-1c").split(".")[0])
+        if self.max_lines and line_count > self.max_lines:
+            self.text_widget.delete("1.0", f"{line_count - self.max_lines + 1}.0")
+            self.trimmed = True
+        self.text_widget.see(tk.END)
+        self.text_widget.config(state=tk.DISABLED)
+
+    def clear(self):
+        self.text_widget.config(state=tk.NORMAL)
+        self.text_widget.delete(1.0, tk.END)
+        self.text_widget.config(state=tk.DISABLED)
+        self.trimmed = False
+
+class OptionVariables:
+    # Option -> Tk variable, created on first use, so options whose widgets were never shown only cost their value
+    def __init__(self, types, defaults):
+        self.types = dict(types)
+        self.values = dict(defaults)
+        self.variables = {}
+
+    def add(self, types):
+        for option, option_type in types.items():
+            self.types.setdefault(option, option_type)
+            self.values.setdefault(option, False if option_type == "bool" else "")
+
+    def __contains__(self, option):
+        return option in self.types
+
+    def __getitem__(self, option):
+        variable = self.variables.get(option)
+        if variable is None:
+            if self.types.get(option) == "bool":
+                variable = tk.BooleanVar(value=bool(self.values.get(option, False)))
+            else:
+                variable = tk.StringVar(value=self.values.get(option, ""))
+            self.variables[option] = variable
+        return variable
+
+    def set(self, option, value):
+        if option in self.variables:
+            if self.variables[option].get() != value:
+                self.variables[option].set(value)
+        else:
+            self.values[option] = value
+
+    def get_values(self):
+        values = dict(self.values)
+        values.update((option, variable.get()) for option, variable in self.variables.items())
+        return values
+
+class OptionCategory:
+    # A collapsible category heading, its option widgets are created the first time they are shown
+    def __init__(self, gui, parent, category, options, variables, expanded=False):
+        self.gui = gui
+        self.category = category
+        self.options = options
+        self.variables = variables
+        self.expanded = expanded
+        self.rows = {}
+
+        self.frame = ttk.Frame(parent)
+        self.frame.columnconfigure(0, weight=1)
+        self.heading = ttk.Label(self.frame, font=("TkDefaultFont", 12, "bold"), cursor="hand2")
+        self.heading.grid(row=0, column=0, sticky="w", padx=5, pady=10)
+        self.heading.bind("<Button-1>", lambda e: self.toggle())
+        if category == "Onefile Options":
+            onefile_button = ttk.Button(self.frame, text="Startup & Payload...", command=gui.show_onefile)
+            onefile_button.grid(row=0, column=1, sticky="e", padx=5, pady=10)
+        self.body = ttk.Frame(self.frame)
+        self.body.columnconfigure(0, weight=1)
+        self.update_heading()
+        if expanded:
+            self.show()
+
+    def update_heading(self):
+        self.heading.config(text=f"{'▾' if self.expanded else '▸'} {self.category} ({len(self.options)})")
+
+    def toggle(self):
+        self.expanded = not self.expanded
+        self.update_heading()
+        if self.expanded:
+            self.show()
+        else:
+            self.body.grid_remove()
+
+    def matches(self, query):
+        return [option for option in self.options if query in option[0].lower() or query in option[2].lower()]
+
+    def show(self, options=None):
+        # Shows the given options (all by default), creating the rows that do not exist yet
+        options = self.options if options is None else options
+        for row in self.rows.values():
+            row.pack_forget()
+        for option in options:
+            if option[0] not in self.rows:
+                self.rows[option[0]] = self.create_row(*option)
+            self.rows[option[0]].pack(fill=tk.X)
+        self.body.grid(row=1, column=0, columnspan=2, sticky="ew")
+
+    def create_row(self, option, option_type, description):
+        row = ttk.Frame(self.body)
+        row.columnconfigure(0, weight=1)
+        variable = self.variables[option]
+        from option_schema import summary
+        text = f"{option} ({summary(description)})"
+        if option_type == "bool":
+            ttk.Checkbutton(row, text=text, variable=variable).grid(row=0, column=0, columnspan=2, sticky="w", padx=5, pady=2)
+            return row
+        ttk.Label(row, text=text).grid(row=0, column=0, columnspan=2, sticky="w", padx=5, pady=(5, 0))
+        choices = self.gui.option_choices.get(option)
+        if choices and option_type != "list":
+            ttk.Combobox(row, textvariable=variable, values=choices).grid(row=1, column=0, padx=5, pady=(0, 5), sticky="ew")
+        else:
+            ttk.Entry(row, textvariable=variable).grid(row=1, column=0, padx=5, pady=(0, 5), sticky="ew")
+        if option_type in ["path", "dir"]:
+            browse_button = ttk.Button(row, text="Browse", command=lambda: self.gui.browse_option(variable, option_type == "dir"))
+            browse_button.grid(row=1, column=1, padx=5, pady=(0, 5))
+        return row
+
 class NuitkaGUI:
-    def __init__(self, root):
+    def __init__(self, root, startup_target=None):
         self.root = root
         self.root.title("Py Nuitka GUI v0.1")
 
         # Create menu bar
-        self.create_menu_bar()
+        with startup_profile.stage("menu bar"):
+            self.create_menu_bar()
 
         # Center the window on the screen
         self.center_window()
@@ -57,17 +215,79 @@ class NuitkaGUI:
         self.scrollable_frame = ScrollableLabelFrame(self.main_frame, text="Options")
         self.scrollable_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
 
-        # Nuitka Options
-        self.options = {}
-        self.create_options()
+        # Nuitka Options, widgets are created per category when it is first expanded or searched
+        self.options = OptionVariables(OPTION_TYPES, default_options())
+        self.tool_options = OptionVariables(TOOL_OPTION_TYPES, default_tool_options())
+        self.option_choices = dict(OPTION_CHOICES)
+        self.categories = []
+        self.search_job = None
+        with startup_profile.stage("options panel"):
+            self.create_options()
+
+        with startup_profile.stage("build controls & output"):
+            self.create_controls()
+
+        # Queue for thread-safe communication
+        self.queue = queue.Queue()
+
+        # Start the queue processor
+        self.root.after(100, self.process_queue)
+
+        # Progress tracking, fed by the compile thread and shown by process_queue
+        self.build_progress = None
+        self.compilation_finished = False
 
+        # The running build's BuildRunner (set by the compile thread) and the watch mode state
+        self.runner = None
+        self.build_running = False
+        self.cancel_requested = False
+        self.watcher = None
+        self.watch_events = queue.Queue()
+        self.rebuild_pending = False
+        self.log_path = None
+
+        # The loaded settings file and the files it extends, saving keeps the inheritance
+        self.settings_path = None
+        self.settings_extends = None
+
+        # The installed Nuitka's options are loaded once the window is on screen
+        self.startup_target = startup_target
+        self.painted = False
+        self.root.bind("<Expose>", self.on_expose, add="+")
+
+    def on_expose(self, event):
+        if not self.painted:
+            self.painted = True
+            # Idle callbacks run in order, so this runs after the redraws the first Expose scheduled
+            self.root.after_idle(self.after_first_paint)
+
+    def after_first_paint(self):
+        startup_profile.mark_first_paint()
+        if self.startup_target is not None:
+            print(startup_profile.report(self.startup_target), end="")
+            print(f"Recorded in {startup_profile.record()}")
+            self.root.destroy()
+            return
+        self.load_option_schema()
+        if self.get_tool_option_values().get("preflight_enabled"):
+            # Fills the preflight cache, so the first Compile does not wait for Nuitka to start
+            from preflight import probe_environment
+            threading.Thread(target=probe_environment, daemon=True).start()
+
+    def create_controls(self):
         # Horizontal separator
         self.separator = ttk.Separator(self.main_frame, orient='horizontal')
         self.separator.pack(fill=tk.X, padx=10, pady=10)
 
-        # Compile button
-        self.compile_button = ttk.Button(self.main_frame, text="Compile", command=self.confirm_compilation)
-        self.compile_button.pack(pady=(0, 5))
+        # Compile, cancel and watch controls
+        build_controls = ttk.Frame(self.main_frame)
+        build_controls.pack(pady=(0, 5))
+        self.compile_button = ttk.Button(build_controls, text="Compile", command=self.confirm_compilation)
+        self.compile_button.pack(side=tk.LEFT)
+        self.cancel_button = ttk.Button(build_controls, text="Cancel", command=self.cancel_compilation, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=(5, 0))
+        self.watch_var = tk.BooleanVar()
+        ttk.Checkbutton(build_controls, text="Watch (rebuild on save)", variable=self.watch_var, command=self.toggle_watch).pack(side=tk.LEFT, padx=(10, 0))
 
         # Display Commands button
         self.display_commands_button = ttk.Button(self.main_frame, text="Display Commands", command=self.display_commands)
@@ -76,7 +296,14 @@ class NuitkaGUI:
         # Progress bar
         self.progress_var = tk.DoubleVar()
         self.progress_bar = ttk.Progressbar(self.main_frame, variable=self.progress_var, maximum=100)
-        self.progress_bar.pack(fill=tk.X, padx=10, pady=(0, 10))
+        self.progress_bar.pack(fill=tk.X, padx=10, pady=(0, 2))
+        self.progress_status_var = tk.StringVar()
+        self.progress_status = ttk.Label(self.main_frame, textvariable=self.progress_status_var)
+        self.progress_status.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        # Live resource sparklines, shown while a profiled build runs
+        self.sparklines = tk.Canvas(self.main_frame, height=40, highlightthickness=0)
+        self.profiler = None
 
         # Compiler Output Frame
         self.output_frame = ttk.LabelFrame(self.main_frame, text="Compiler Output:")
@@ -84,20 +311,7 @@ class NuitkaGUI:
 
         self.output_text = scrolledtext.ScrolledText(self.output_frame, wrap=tk.WORD, height=10)
         self.output_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-
-        # Queue for thread-safe communication
-        self.queue = queue.Queue()
-
-        # Start the queue processor
-        self.root.after(100, self.process_queue)
-
-        # Progress tracking variables
-        self.total_steps = 20
-        self.current_step = 0
-        self.compilation_finished = False
-        
-        # Compile the regex pattern once for efficiency
-        self.nuitka_pattern = re.compile(r'Nuitka.*:')
+        self.output_renderer = OutputRenderer(self.output_text)
 
     def create_menu_bar(self):
         menubar = tk.Menu(self.root)
@@ -108,9 +322,21 @@ class NuitkaGUI:
         menubar.add_cascade(label="File", menu=file_menu)
         file_menu.add_command(label="Save Settings", command=self.save_settings)
         file_menu.add_command(label="Load Settings", command=self.load_settings)
+        file_menu.add_command(label="Settings Layers...", command=self.show_settings_layers)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
 
+        # Build menu
+        build_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Build", menu=build_menu)
+        build_menu.add_command(label="Batch Build Queue...", command=self.show_batch_builds)
+        build_menu.add_command(label="Analyze Imports...", command=self.show_import_graph)
+        build_menu.add_command(label="Analyze Dist Folder...", command=self.show_dist_analysis)
+        build_menu.add_command(label="Compiler Cache...", command=self.show_compiler_cache)
+        build_menu.add_command(label="Benchmark Results...", command=self.show_benchmarks)
+        build_menu.add_command(label="Option Sweep...", command=self.show_option_sweep)
+        build_menu.add_command(label="Build History...", command=self.show_build_history)
+
         # Help menu
         help_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Help", menu=help_menu)
@@ -118,6 +344,7 @@ class NuitkaGUI:
         help_menu.add_command(label="About", command=self.show_about)
 
     def save_settings(self):
+        from tkinter import filedialog
         default_filename = 'project-settings.json'
         file_path = filedialog.asksaveasfilename(
             defaultextension=".json",
@@ -125,24 +352,29 @@ class NuitkaGUI:
             initialfile=default_filename
         )
         if file_path:
-            settings = {
-                "file_path": self.file_path_entry.get(),
-                "output_dir": self.output_dir_entry.get(),
-                "options": {opt: var.get() for opt, var in self.options.items()}
-            }
-            with open(file_path, 'w') as f:
-                json.dump(settings, f, indent=4)
+            try:
+                save_settings(file_path, self.get_settings())
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Save Settings", str(e))
+                return
+            self.settings_path = file_path
             messagebox.showinfo("Save Settings", "Settings saved successfully!")
 
     def load_settings(self):
+        from tkinter import filedialog
         default_filename = 'project-settings.json'
         file_path = filedialog.askopenfilename(
             filetypes=[("JSON files", "*.json")],
             initialfile=default_filename
         )
         if file_path:
-            with open(file_path, 'r') as f:
-                settings = json.load(f)
+            try:
+                settings = load_settings(file_path)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Load Settings", str(e))
+                return
+            self.settings_path = file_path
+            self.settings_extends = settings.get("extends")
             
             self.file_path_entry.delete(0, tk.END)
             self.file_path_entry.insert(0, settings.get("file_path", ""))
@@ -150,15 +382,31 @@ class NuitkaGUI:
             self.output_dir_entry.delete(0, tk.END)
             self.output_dir_entry.insert(0, settings.get("output_dir", ""))
             
-            for opt, value in settings.get("options", {}).items():
-                if opt in self.options:
-                    if isinstance(self.options[opt], tk.BooleanVar):
-                        self.options[opt].set(value)
-                    elif isinstance(self.options[opt], tk.StringVar):
-                        self.options[opt].set(value)
+            # Only values that differ from what is shown touch their Tk variable
+            for variables, values in ((self.options, settings["options"]), (self.tool_options, settings["tool_options"])):
+                for opt, value in values.items():
+                    variables.set(opt, value)
             
             messagebox.showinfo("Load Settings", "Settings loaded successfully!")
 
+    def get_settings(self):
+        settings = {
+            "file_path": self.file_path_entry.get(),
+            "output_dir": self.output_dir_entry.get(),
+            "options": self.get_option_values(),
+            "tool_options": self.get_tool_option_values()
+        }
+        if self.settings_extends:
+            settings["extends"] = self.settings_extends
+        return settings
+
+    def get_option_values(self):
+        # Options of the installed Nuitka's schema are only saved when set
+        return {opt: value for opt, value in self.options.get_values().items() if opt in OPTION_TYPES or value}
+
+    def get_tool_option_values(self):
+        return self.tool_options.get_values()
+
     def show_help(self):
         help_window = tk.Toplevel(self.root)
         help_window.title("Help")
@@ -183,6 +431,7 @@ For more detailed information about Nuitka options, please refer to the official
         text_widget.config(state=tk.DISABLED)
 
     def show_about(self):
+        import webbrowser
         about_window = tk.Toplevel(self.root)
         about_window.title("About")
         about_window.geometry("300x150")
@@ -211,6 +460,68 @@ Created by: non-npc"""
         style.configure("Link.TButton", foreground="blue", borderwidth=0)
         style.map("Link.TButton", foreground=[('hover', 'darkblue')])
 
+    def show_settings_layers(self):
+        from tkinter import filedialog
+        file_path = self.settings_path or filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
+        if file_path:
+            SettingsLayersWindow(self.root, file_path)
+
+    def show_batch_builds(self):
+        BatchBuildWindow(self.root)
+
+    def show_import_graph(self):
+        file_path = os.path.abspath(os.path.normpath(self.file_path_entry.get().strip()))
+        if not os.path.isfile(file_path):
+            messagebox.showerror("Error", "Invalid Python file path.")
+            return
+        ImportGraphWindow(self.root, file_path, self.options)
+
+    def show_compiler_cache(self):
+        CompilerCacheWindow(self.root, self.get_tool_option_values())
+
+    def show_benchmarks(self):
+        BenchmarkWindow(self.root)
+
+    def show_build_history(self):
+        import sqlite3
+        try:
+            BuildHistoryWindow(self.root)
+        except sqlite3.Error as e:
+            messagebox.showerror("Build History", f"The build history cannot be opened: {e}")
+
+    def show_dist_analysis(self):
+        settings = self.get_settings()
+        settings["file_path"] = os.path.abspath(os.path.normpath(settings["file_path"].strip()))
+        settings["output_dir"] = os.path.abspath(os.path.normpath(settings["output_dir"].strip()))
+        try:
+            command = settings_command(settings)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        DistAnalysisWindow(self.root, command, settings["tool_options"])
+
+    def show_onefile(self):
+        settings = self.get_settings()
+        settings["file_path"] = os.path.abspath(os.path.normpath(settings["file_path"].strip()))
+        settings["output_dir"] = os.path.abspath(os.path.normpath(settings["output_dir"].strip()))
+        try:
+            command = settings_command(settings)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        OnefileWindow(self.root, command, settings["tool_options"])
+
+    def show_option_sweep(self):
+        settings = self.get_settings()
+        settings["file_path"] = os.path.abspath(os.path.normpath(settings["file_path"].strip()))
+        settings["output_dir"] = os.path.abspath(os.path.normpath(settings["output_dir"].strip()))
+        try:
+            validate_settings(settings)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        OptionSweepWindow(self.root, settings, self.options)
+
     def create_options(self):
         frame = self.scrollable_frame.scrollable_frame
 
@@ -234,72 +545,104 @@ Created by: non-npc"""
         self.browse_output_button = ttk.Button(frame, text="Browse", command=self.browse_output_dir)
         self.browse_output_button.grid(row=4, column=2, padx=10, pady=(0, 5))
 
-        options_data = [
-            ("General Options", [
-                ("--show-memory", "bool", "Output memory information"),
-                ("--remove-output", "bool", "Remove output directory before compilation"),
-                ("--enable-plugin=tk-inter", "bool", "Enable Tkinter plugin (recommended for Tkinter applications)"),
-            ]),
-            ("Basic Options", [
-                ("--output-filename", "str", "Specify output filename"),
-                ("--module", "bool", "Create an extension module"),
-                ("--standalone", "bool", "Create a standalone executable"),
-                ("--onefile", "bool", "Create a onefile executable"),
-            ]),
-            ("Control Options", [
-                ("--jobs", "int", "Specify number of parallel jobs"),
-                ("--lto", "str", "Use link time optimizations (off/auto/full)"),
-                ("--python-flag", "str", "Python flags to use"),
-                ("--python-debug", "bool", "Use debug version of Python"),
-                ("--experimental", "str", "Use experimental features"),
-            ]),
-            ("Optimization Options", [
-                ("--run", "bool", "Run immediately"),
-                ("--debugger", "bool", "Run in debugger"),
-                ("--trace-execution", "bool", "Trace execution"),
-                ("--profile", "bool", "Profile execution"),
-                ("--unstripped", "bool", "Keep debug info in result"),
-                ("--static-libpython", "bool", "Use static link library for Python"),
-            ]),
-            ("Windows Specific", [
-                ("--windows-console-mode", "str", "Set console mode (disable/attach/force)"),
-                ("--windows-icon-from-ico", "path", "Use this icon file"),
-                ("--windows-uac-admin", "bool", "Request Windows User Account Control elevation"),
-                ("--windows-uac-uiaccess", "bool", "Request Windows User Account Control UI Access"),
-            ]),
-        ]
-
-        row = 5  # Start after the file path and output directory inputs
+        # Option search, matching option names and help texts
+        ttk.Label(frame, text="Search options:").grid(row=5, column=0, sticky="w", padx=10, pady=(10, 0))
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.schedule_search())
+        ttk.Entry(frame, textvariable=self.search_var).grid(row=6, column=0, columnspan=2, padx=10, pady=(0, 5), sticky="ew")
+        self.search_status_var = tk.StringVar()
+        ttk.Label(frame, textvariable=self.search_status_var).grid(row=6, column=2, sticky="w", padx=10, pady=(0, 5))
+
+        # Curated Nuitka options (expanded), the rest of the installed Nuitka's options and this tool's options (collapsed)
+        self.sections = []
+        for row in (7, 8, 9):
+            section = ttk.Frame(frame)
+            section.grid(row=row, column=0, columnspan=3, sticky="ew")
+            self.sections.append(section)
+        frame.columnconfigure(0, weight=1)
+        self.add_categories(self.sections[0], OPTIONS_DATA, self.options, expanded=True)
+        self.add_categories(self.sections[2], TOOL_OPTIONS_DATA, self.tool_options)
+
+    def add_categories(self, section, options_data, variables, expanded=False):
         for category, options in options_data:
-            # Add category heading
-            heading = ttk.Label(frame, text=category, font=("TkDefaultFont", 12, "bold"))
-            heading.grid(row=row, column=0, columnspan=3, sticky="w", padx=5, pady=10)
-            row += 1
+            option_category = OptionCategory(self, section, category, options, variables, expanded)
+            option_category.frame.pack(fill=tk.X)
+            self.categories.append(option_category)
 
-            for option, option_type, description in options:
-                if option_type == "bool":
-                    self.options[option] = tk.BooleanVar()
-                    widget = ttk.Checkbutton(frame, text=f"{option} ({description})", variable=self.options[option])
-                    widget.grid(row=row, column=0, columnspan=3, sticky="w", padx=5, pady=2)
-                elif option_type in ["str", "int", "path"]:
-                    self.options[option] = tk.StringVar()
-                    label = ttk.Label(frame, text=f"{option} ({description})")
-                    label.grid(row=row, column=0, columnspan=3, sticky="w", padx=5, pady=(5, 0))
-                    row += 1
-                    if option == "--windows-console-mode":
-                        combobox = ttk.Combobox(frame, textvariable=self.options[option], values=["disable", "attach", "force"])
-                        combobox.grid(row=row, column=0, columnspan=2, padx=5, pady=(0, 5), sticky="ew")
-                        combobox.set("disable")
-                    else:
-                        entry = ttk.Entry(frame, textvariable=self.options[option])
-                        entry.grid(row=row, column=0, columnspan=2, padx=5, pady=(0, 5), sticky="ew")
-                    if option_type == "path":
-                        browse_button = ttk.Button(frame, text="Browse", command=lambda opt=option: self.browse_option(opt))
-                        browse_button.grid(row=row, column=2, padx=5, pady=(0, 5))
-                row += 1
+    def load_option_schema(self):
+        # Parsing "nuitka --help" takes a moment on first use (then it is cached per Nuitka version), so it runs in a thread
+        from option_schema import load_schema
+        result = queue.Queue()
+
+        def worker():
+            schema = None
+            try:
+                schema = load_schema()
+            finally:
+                # check_result polls until something arrives
+                result.put(schema)
+
+        threading.Thread(target=worker, daemon=True).start()
+
+        def check_result():
+            try:
+                schema = result.get_nowait()
+            except queue.Empty:
+                self.root.after(200, check_result)
+                return
+            if schema is not None:
+                self.add_schema_options(*schema)
 
-        # Update scrollregion after adding all widgets
-        self.scrollable_frame.update_scrollregion()
+        self.root.after(200, check_result)
+
+    def add_schema_options(self, version, schema, choices):
+        from option_schema import extra_categories
+        categories = extra_categories(schema)
+        if not categories:
+            return
+        self.options.add({option: option_type for category, options in categories for option, option_type, description in options})
+        for option, values in choices.items():
+            self.option_choices.setdefault(option, values)
+        heading = ttk.Label(self.sections[1], text=f"More Nuitka {version} Options", font=("TkDefaultFont", 12, "bold"))
+        heading.pack(anchor="w", padx=5, pady=(15, 0))
+        self.add_categories(self.sections[1], categories, self.options)
+        if self.search_var.get().strip():
+            self.filter_options()
+
+    def schedule_search(self):
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(SEARCH_DELAY_MS, self.filter_options)
+
+    def filter_options(self):
+        # Shows only the matching options of every category, at most MAX_SEARCH_RESULTS rows are created per search
+        self.search_job = None
+        query = self.search_var.get().strip().lower()
+        for option_category in self.categories:
+            option_category.frame.pack_forget()
+        shown = total = 0
+        for option_category in self.categories:
+            if not query:
+                if option_category.expanded:
+                    option_category.show()
+                else:
+                    option_category.body.grid_remove()
+                option_category.frame.pack(fill=tk.X)
+                continue
+            matches = option_category.matches(query)
+            total += len(matches)
+            matches = matches[:max(MAX_SEARCH_RESULTS - shown, 0)]
+            if matches:
+                shown += len(matches)
+                option_category.show(matches)
+                option_category.frame.pack(fill=tk.X)
+        if not query:
+            self.search_status_var.set("")
+        elif shown < total:
+            self.search_status_var.set(f"{total} matches, first {shown} shown")
+        else:
+            self.search_status_var.set(f"{total} match{'es' if total != 1 else ''}")
+        self.scrollable_frame.canvas.yview_moveto(0)
 
     def center_window(self):
         # Set the window size
@@ -318,6 +661,7 @@ Created by: non-npc"""
         self.root.geometry(f'{window_width}x{window_height}+{center_x}+{center_y}')
 
     def browse_file(self):
+        from tkinter import filedialog
         file_path = filedialog.askopenfilename(filetypes=[("Python Files", "*.py")])
         if file_path:
             normalized_path = os.path.normpath(file_path)
@@ -325,17 +669,19 @@ Created by: non-npc"""
             self.file_path_entry.insert(0, normalized_path)
 
     def browse_output_dir(self):
+        from tkinter import filedialog
         output_dir = filedialog.askdirectory()
         if output_dir:
             normalized_path = os.path.normpath(output_dir)
             self.output_dir_entry.delete(0, tk.END)
             self.output_dir_entry.insert(0, normalized_path)
 
-    def browse_option(self, opt):
-        file_path = filedialog.askopenfilename()
+    def browse_option(self, var, directory=False):
+        from tkinter import filedialog
+        file_path = filedialog.askdirectory() if directory else filedialog.askopenfilename()
         if file_path:
             normalized_path = os.path.normpath(file_path)
-            self.options[opt].set(normalized_path)
+            var.set(normalized_path)
 
     def confirm_compilation(self):
         file_path = os.path.abspath(os.path.normpath(self.file_path_entry.get().strip()))
@@ -349,31 +695,55 @@ Created by: non-npc"""
             messagebox.showerror("Error", "Invalid output directory.")
             return
 
-        command = [sys.executable, "-m", "nuitka"]
-
-        for opt, var in self.options.items():
-            if isinstance(var, tk.BooleanVar) and var.get():
-                command.append(opt)
-            elif isinstance(var, tk.StringVar) and var.get():
-                value = os.path.abspath(os.path.normpath(var.get().strip())) if opt.endswith(("-from-ico", "-dir")) else var.get()
-                command.append(f"{opt}={value}")
-
-        command.append(f"--output-dir={output_dir}")
-        command.append(file_path)
+        command = build_command(file_path, output_dir, self.get_option_values())
 
         command_str = ' '.join(command)
         self.command_str = command_str
-        
+
+        # Problems that would otherwise only show up minutes into the build. Probing starts Nuitka when nothing is
+        # cached yet, so it runs in a thread and the dialog opens once it is done.
+        from preflight import preflight
+        tool_options = self.get_tool_option_values()
+        result = queue.Queue()
+
+        def check():
+            issues = []
+            try:
+                issues = preflight(command, tool_options)
+            except (OSError, ValueError) as e:
+                issues = [("warning", f"The preflight check was skipped: {e}")]
+            finally:
+                result.put(issues)
+
+        def check_result():
+            try:
+                issues = result.get_nowait()
+            except queue.Empty:
+                self.root.after(100, check_result)
+                return
+            self.compile_button.config(state=tk.NORMAL, text="Compile")
+            self.ask_compilation(command, issues)
+
+        self.compile_button.config(state=tk.DISABLED, text="Checking the build environment...")
+        threading.Thread(target=check, daemon=True).start()
+        self.root.after(100, check_result)
+
+    def ask_compilation(self, command, issues):
+        from preflight import format_issues, has_errors
+        report = f"{format_issues(issues)}\n" if issues else ""
+        if issues:
+            self.output_renderer.write(format_issues(issues))
+
         confirm = messagebox.askokcancel("Confirm Compilation", 
-                                         f"Do you want to execute the following command?\n\n{command_str}\n\n"
-                                         "Click OK to proceed or Cancel to abort.")
+                                         f"{report}Do you want to execute the following command?\n\n{self.command_str}\n\n"
+                                         "Click OK to proceed or Cancel to abort.",
+                                         icon=messagebox.WARNING if issues else messagebox.QUESTION,
+                                         default=messagebox.CANCEL if has_errors(issues) else messagebox.OK)
         
         if confirm:
             self.start_compilation(command)
         else:
-            self.output_text.config(state=tk.NORMAL)
-            self.output_text.insert(tk.END, "Compilation cancelled by user.\n")
-            self.output_text.config(state=tk.DISABLED)
+            self.output_renderer.write("Compilation cancelled by user.\n")
 
     def display_commands(self):
         file_path = os.path.abspath(os.path.normpath(self.file_path_entry.get().strip()))
@@ -387,17 +757,7 @@ Created by: non-npc"""
             messagebox.showerror("Error", "Invalid output directory.")
             return
 
-        command = [sys.executable, "-m", "nuitka"]
-
-        for opt, var in self.options.items():
-            if isinstance(var, tk.BooleanVar) and var.get():
-                command.append(opt)
-            elif isinstance(var, tk.StringVar) and var.get():
-                value = os.path.abspath(os.path.normpath(var.get().strip())) if opt.endswith(("-from-ico", "-dir")) else var.get()
-                command.append(f"{opt}={value}")
-
-        command.append(f"--output-dir={output_dir}")
-        command.append(file_path)
+        command = build_command(file_path, output_dir, self.get_option_values())
 
         command_str = ' '.join(command)
         if not command_str:
@@ -423,83 +783,1120 @@ Created by: non-npc"""
         copy_button.pack(pady=10)
         
     def start_compilation(self, command):
+        from build_progress import BuildProgress
+        tool_options = self.get_tool_option_values()
         self.compile_button.config(state=tk.DISABLED, text="Compiling please wait...")
+        self.cancel_button.config(state=tk.NORMAL)
+        self.build_running = True
+        self.cancel_requested = False
+        self.runner = None
         self.clear_output()
         self.reset_compilation_state()
-        threading.Thread(target=self.compile, args=(command,), daemon=True).start()
-        self.root.after(100, self.process_queue)  # Start processing the queue immediately
+        try:
+            self.output_renderer.max_lines = int(tool_options.get("output_max_lines") or 0)
+        except ValueError:
+            self.output_renderer.max_lines = 0
+        self.log_path = build_log_path(tool_options, command[-1])
+        self.build_progress = BuildProgress(command)
+        threading.Thread(target=self.compile, args=(command, tool_options, self.log_path), daemon=True).start()
 
     def clear_output(self):
-        self.output_text.config(state=tk.NORMAL)
-        self.output_text.delete(1.0, tk.END)
-        self.output_text.config(state=tk.DISABLED)
+        self.output_renderer.clear()
 
     def reset_compilation_state(self):
         self.progress_var.set(0)
-        self.total_steps = 20
-        self.current_step = 0
+        self.progress_status_var.set("")
+        self.build_progress = None
+        self.profiler = None
+        self.sparklines.pack_forget()
         self.compilation_finished = False
         
-    def compile(self, command):
+    def compile(self, command, tool_options, log_path):
+        # Runs in a worker thread: no Tk calls here, everything goes through the queue
         # Clear the queue before starting a new compilation
         while not self.queue.empty():
             try:
                 self.queue.get_nowait()
             except queue.Empty:
                 break
-        
-        self.queue.put(f"Executing command: {' '.join(command)}\n\n")
 
         try:
-            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1, universal_newlines=True)
-            
-            for line in process.stdout:
-                self.queue.put(line)
-                self.update_progress(line)
-            
-            process.wait()
-            
-            if process.returncode == 0:
-                self.queue.put("Compilation successful.\n")
-                self.update_progress("Compilation successful.")
-            else:
-                self.queue.put("Compilation failed.\n")
-                self.update_progress("Compilation failed.")
-        except FileNotFoundError:
-            self.queue.put("Error: Python or Nuitka not found. Please ensure they are installed and in your system PATH.\n")
-        
-        self.queue.put(None)  # Signal that compilation is complete
-
-    def update_progress(self, line):
-        if self.nuitka_pattern.search(line):
-            self.current_step += 1
-            progress = min(self.current_step, self.total_steps)
-            self.progress_var.set((progress / self.total_steps) * 100)
-        elif 'Compilation successful.' in line:
-            self.progress_var.set(100)
-            self.compilation_finished = True
-        
-        # Update the progress bar
-        self.root.update_idletasks()
+            with open(log_path, 'w', encoding='utf-8') as log_file:
+                def put(message):
+                    self.queue.put(message)
+                    log_file.write(message)
+
+                put(f"Executing command: {' '.join(command)}\n\n")
+
+                try:
+                    returncode = run_build(command, tool_options, put, self.build_progress, self.set_profiler, self.set_runner)
+
+                    if returncode == 0:
+                        put("Compilation successful.\n")
+                        self.compilation_finished = True
+                    elif not self.cancel_requested:
+                        put("Compilation failed.\n")
+                except FileNotFoundError:
+                    put(NUITKA_NOT_FOUND)
+        except OSError as e:
+            self.queue.put(f"Compilation failed: {e}\n")
+        finally:
+            self.queue.put(None)  # Signal that compilation is complete, also when the build raised
+
+    def set_profiler(self, profiler):
+        # Called from the compile thread, process_queue reads the samples
+        self.profiler = profiler
+
+    def set_runner(self, runner):
+        # Called from the compile thread before the build starts, a cancel requested earlier is applied right away
+        self.runner = runner
+        if self.cancel_requested:
+            runner.cancel()
+
+    def cancel_compilation(self):
+        self.cancel_button.config(state=tk.DISABLED)
+        self.output_renderer.write("Cancelling the build...\n")
+        self.cancel_requested = True
+        if self.runner is not None:
+            self.runner.cancel()
+
+    def watch_settings(self):
+        file_path = os.path.abspath(os.path.normpath(self.file_path_entry.get().strip()))
+        output_dir = os.path.abspath(os.path.normpath(self.output_dir_entry.get().strip()))
+        if not os.path.isfile(file_path):
+            messagebox.showerror("Error", "Invalid Python file path.")
+            return None
+        if not os.path.isdir(output_dir):
+            messagebox.showerror("Error", "Invalid output directory.")
+            return None
+        return file_path, output_dir
+
+    def toggle_watch(self):
+        from watcher import SourceWatcher
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        if not self.watch_var.get():
+            self.progress_status_var.set("Watch mode stopped.")
+            return
+        paths = self.watch_settings()
+        if paths is None:
+            self.watch_var.set(False)
+            return
+        try:
+            debounce = float(self.get_tool_option_values().get("watch_debounce") or 0.5)
+        except ValueError:
+            debounce = 0.5
+        # The watcher thread only queues the change, process_queue starts the rebuild
+        self.watcher = SourceWatcher(os.path.dirname(paths[0]), self.watch_events.put, debounce, ignored_paths=[paths[1]]).start()
+        self.watch_events.put([])
+
+    def start_watch_build(self):
+        from watcher import watch_command
+        paths = self.watch_settings()
+        if paths is None:
+            self.watch_var.set(False)
+            self.toggle_watch()
+            return
+        self.start_compilation(watch_command(build_command(paths[0], paths[1], self.get_option_values())))
+
+    def draw_sparklines(self, samples):
+        from build_profiler import format_bytes
+        if not self.sparklines.winfo_ismapped():
+            self.sparklines.pack(fill=tk.X, padx=10, pady=(0, 10), after=self.progress_status)
+        canvas = self.sparklines
+        canvas.delete("all")
+        width = max(canvas.winfo_width(), 100)
+        height = int(canvas["height"])
+        samples = samples[-SPARKLINE_SAMPLES:]
+        last = samples[-1]
+
+        # CPU and RSS share the canvas, each scaled to its own maximum
+        for field, color in (("cpu_percent", "#1f6feb"), ("rss", "#2da44e")):
+            peak = max(sample[field] for sample in samples) or 1
+            step = (width - 1) / max(len(samples) - 1, 1)
+            points = []
+            for index, sample in enumerate(samples):
+                points.extend((index * step, height - 2 - (height - 14) * sample[field] / peak))
+            if len(points) >= 4:
+                canvas.create_line(*points, fill=color)
+        canvas.create_text(2, 0, anchor="nw", font=("TkDefaultFont", 8),
+                           text=f"CPU {last['cpu_percent']:.0f}%   RSS {format_bytes(last['rss'])}   "
+                                f"processes {last['processes']} ({last['compilers']} compilers)")
 
     def process_queue(self):
+        # Drain up to QUEUE_BATCH_SIZE messages per frame and render them with a single insert
+        messages = []
+        finished = False
         try:
-            while True:
+            while len(messages) < QUEUE_BATCH_SIZE:
                 message = self.queue.get_nowait()
                 if message is None:  # Compilation is complete
-                    self.compile_button.config(state=tk.NORMAL, text="Compile")
+                    finished = True
                     break
-                self.output_text.config(state=tk.NORMAL)
-                self.output_text.insert(tk.END, message)
-                self.output_text.see(tk.END)
-                self.output_text.config(state=tk.DISABLED)
-                self.output_text.update_idletasks()
+                messages.append(message)
         except queue.Empty:
             pass
-        finally:
-            self.root.after(100, self.process_queue)  # Always schedule the next call
+
+        self.output_renderer.write("".join(messages))
+        if self.build_progress:
+            if finished and not self.compilation_finished:
+                self.progress_status_var.set("Cancelled" if self.cancel_requested else "Failed")
+            else:
+                self.progress_var.set(self.build_progress.fraction() * 100)
+                self.progress_status_var.set(self.build_progress.status())
+        if self.profiler and self.profiler.samples:
+            self.draw_sparklines(self.profiler.samples)
+        if finished:
+            if self.output_renderer.trimmed:
+                self.output_renderer.write(f"Earlier output was trimmed, the full log is in {self.log_path}\n")
+            self.compile_button.config(state=tk.NORMAL, text="Compile")
+            self.cancel_button.config(state=tk.DISABLED)
+            self.build_running = False
+            if self.watcher is not None and not self.rebuild_pending:
+                self.output_renderer.write(f"Watching {self.watcher.root} for changes ({self.watcher.backend})...\n")
+
+        # Watch mode: a stale build is cancelled first, the rebuild starts once its thread has finished
+        changed = False
+        try:
+            while True:
+                self.watch_events.get_nowait()
+                changed = True
+        except queue.Empty:
+            pass
+        if changed and self.watcher is not None:
+            self.rebuild_pending = True
+            if self.build_running and not self.cancel_requested:
+                self.cancel_compilation()
+        if self.rebuild_pending and not self.build_running:
+            self.rebuild_pending = False
+            self.start_watch_build()
+
+        # Come back right away while there is a backlog, otherwise poll at the frame interval
+        self.root.after(1 if len(messages) == QUEUE_BATCH_SIZE else QUEUE_POLL_MS, self.process_queue)
+
+class ImportGraphWindow:
+    ACTIONS = ["", "exclude", "include"]
+
+    def __init__(self, root, file_path, options):
+        self.root = root
+        self.file_path = file_path
+        self.options = options
+        self.graph = None
+        self.result = queue.Queue()
+        self.items = {}  # Treeview item -> module node
+
+        # Start from what the options already exclude/include
+        self.actions = {}
+        for opt, action in (("--nofollow-import-to", "exclude"), ("--include-module", "include")):
+            for name in options[opt].get().split(","):
+                if name.strip():
+                    self.actions[name.strip()] = action
+
+        self.window = tk.Toplevel(root)
+        self.window.title(f"Import Graph - {os.path.basename(file_path)}")
+        self.window.geometry("700x600")
+
+        controls = ttk.Frame(self.window)
+        controls.pack(fill=tk.X, padx=10, pady=(10, 0))
+        self.follow_stdlib_var = tk.BooleanVar()
+        ttk.Checkbutton(controls, text="Follow standard library", variable=self.follow_stdlib_var).pack(side=tk.LEFT)
+        self.scan_button = ttk.Button(controls, text="Scan", command=self.scan)
+        self.scan_button.pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Button(controls, text="Apply to Options", command=self.apply).pack(side=tk.RIGHT)
+
+        self.status_var = tk.StringVar(value="Double-click a module to exclude it (--nofollow-import-to) or force its inclusion (--include-module).")
+        ttk.Label(self.window, textvariable=self.status_var, wraplength=680).pack(fill=tk.X, padx=10, pady=5)
+
+        tree_frame = ttk.Frame(self.window)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        self.tree = ttk.Treeview(tree_frame, columns=("kind", "size", "total", "action"))
+        self.tree.heading("#0", text="Module")
+        self.tree.heading("kind", text="Kind")
+        self.tree.heading("size", text="Size (est.)")
+        self.tree.heading("total", text="With imports (est.)")
+        self.tree.heading("action", text="Action")
+        self.tree.column("#0", width=260)
+        for column in ("kind", "size", "total", "action"):
+            self.tree.column(column, width=100, anchor="e" if column in ("size", "total") else "w")
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.bind("<<TreeviewOpen>>", self.on_open)
+        self.tree.bind("<Double-1>", self.toggle_action)
+
+        self.scan()
+
+    def scan(self):
+        from import_graph import ImportGraph
+        self.scan_button.config(state=tk.DISABLED)
+        self.status_var.set("Scanning imports...")
+        follow_stdlib = self.follow_stdlib_var.get()
+
+        def worker():
+            start = time.time()
+            try:
+                graph = ImportGraph(self.file_path, follow_stdlib=follow_stdlib).scan()
+            except (OSError, ValueError) as e:
+                self.result.put((None, f"Scan failed: {e}"))
+                return
+            self.result.put((graph, time.time() - start))
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.window.after(QUEUE_POLL_MS, self.check_result)
+
+    def check_result(self):
+        from build_profiler import format_bytes
+        if not self.window.winfo_exists():
+            return
+        try:
+            graph, elapsed = self.result.get_nowait()
+        except queue.Empty:
+            self.window.after(QUEUE_POLL_MS, self.check_result)
+            return
+
+        self.scan_button.config(state=tk.NORMAL)
+        if graph is None:
+            # elapsed is the error message then, the previous result stays on screen
+            self.status_var.set(elapsed)
+            return
+        self.graph = graph
+        self.tree.delete(*self.tree.get_children())
+        self.items = {}
+        self.insert_children("", self.graph.root)
+
+        heaviest = ", ".join(f"{node.name} ({format_bytes(node.total_size)})" for node in self.graph.heaviest(5))
+        status = (f"{len(self.graph.nodes)} modules in {elapsed:.1f}s "
+                  f"({self.graph.parsed_files} parsed, {self.graph.cached_files} unchanged).")
+        if heaviest:
+            status += f" Heaviest packages: {heaviest}."
+        dynamic = self.graph.dynamic_imports()
+        if dynamic:
+            status += f" Imported dynamically, consider --include-module: {', '.join(dynamic)}."
+        self.status_var.set(status)
+
+    def insert_children(self, parent_item, node):
+        # Only one level is inserted, deeper levels are added when a module is expanded
+        from build_profiler import format_bytes
+        for child in sorted(node.children, key=lambda child: child.total_size, reverse=True):
+            item = self.tree.insert(parent_item, tk.END, text=child.name,
+                                    values=(child.kind, format_bytes(child.size), format_bytes(child.total_size), self.actions.get(child.name, "")))
+            self.items[item] = child
+            if child.children:
+                self.tree.insert(item, tk.END, text="...")
+
+    def on_open(self, event):
+        item = self.tree.focus()
+        node = self.items.get(item)
+        children = self.tree.get_children(item)
+        if node is not None and len(children) == 1 and children[0] not in self.items:
+            self.tree.delete(children[0])
+            self.insert_children(item, node)
+
+    def toggle_action(self, event):
+        item = self.tree.identify_row(event.y)
+        node = self.items.get(item)
+        if node is None:
+            return
+        action = self.ACTIONS[(self.ACTIONS.index(self.actions.get(node.name, "")) + 1) % len(self.ACTIONS)]
+        self.actions[node.name] = action
+        self.tree.set(item, "action", action)
+        return "break"
+
+    def apply(self):
+        from import_graph import import_options
+        excluded = [name for name, action in self.actions.items() if action == "exclude"]
+        included = [name for name, action in self.actions.items() if action == "include"]
+        for opt, value in import_options(excluded, included).items():
+            self.options[opt].set(value)
+        messagebox.showinfo("Import Graph", f"{len(excluded)} module(s) excluded and {len(included)} included in the options.", parent=self.window)
+
+class CompilerCacheWindow:
+    def __init__(self, root, tool_options):
+        from build_progress import format_duration
+        from compiler_cache import cache_summary, detect_ccache, load_history as load_ccache_history
+        self.window = tk.Toplevel(root)
+        self.window.title("Compiler Cache")
+        self.window.geometry("600x500")
+        self.tool_options = tool_options
+
+        binary = detect_ccache(tool_options.get("ccache_binary", ""))
+        history = load_ccache_history()
+        builds = history["builds"]
+        hits = sum(build["hits"] for build in builds)
+        misses = sum(build["misses"] for build in builds)
+        saved = sum(build["saved"] or 0 for build in builds)
+        summary = f"Compiler cache: {binary or 'not found'}"
+        if hits + misses:
+            summary += (f"\nLast {len(builds)} builds: {hits} hits, {misses} misses "
+                        f"({hits * 100.0 / (hits + misses):.0f}% hit rate), about {format_duration(saved)} saved")
+        ttk.Label(self.window, text=summary, justify=tk.LEFT).pack(fill=tk.X, padx=10, pady=(10, 5))
+
+        # Recent builds, newest first
+        self.tree = ttk.Treeview(self.window, columns=("time", "project", "hits", "misses", "rate", "saved"), show="headings", height=8)
+        for column, heading, width in (("time", "Time", 120), ("project", "Project", 160), ("hits", "Hits", 60),
+                                       ("misses", "Misses", 60), ("rate", "Hit rate", 70), ("saved", "Saved", 70)):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        for build in reversed(builds):
+            total = build["hits"] + build["misses"]
+            self.tree.insert("", tk.END, values=(
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(build["time"])), os.path.basename(build["project"]),
+                build["hits"], build["misses"], f"{build['hits'] * 100.0 / total:.0f}%" if total else "-",
+                format_duration(build["saved"]) if build["saved"] is not None else "-"))
+
+        # Raw ccache statistics, read in the background as ccache can be slow on network shares
+        self.stats_text = scrolledtext.ScrolledText(self.window, wrap=tk.NONE, height=10)
+        self.stats_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 10))
+        self.stats_text.insert(tk.END, "Reading ccache statistics...")
+        self.stats_text.config(state=tk.DISABLED)
+        self.result = queue.Queue()
+        threading.Thread(target=lambda: self.result.put(cache_summary(tool_options)), daemon=True).start()
+        self.window.after(QUEUE_POLL_MS, self.show_stats)
+
+    def show_stats(self):
+        if not self.window.winfo_exists():
+            return
+        try:
+            stats = self.result.get_nowait()
+        except queue.Empty:
+            self.window.after(QUEUE_POLL_MS, self.show_stats)
+            return
+        self.stats_text.config(state=tk.NORMAL)
+        self.stats_text.delete(1.0, tk.END)
+        self.stats_text.insert(tk.END, stats)
+        self.stats_text.config(state=tk.DISABLED)
+
+class BenchmarkWindow:
+    COLUMNS = (("profile", "Settings", 200), ("workload", "Workload", 110), ("compiled", "Compiled", 80), ("cpython", "CPython", 80),
+               ("speedup", "Speedup", 65), ("p95", "p95", 70), ("stddev", "Std dev", 70), ("startup", "Startup", 70),
+               ("rss", "Peak RSS", 80), ("size", "Binary size", 85))
+
+    def __init__(self, root):
+        from benchmark import load_results as load_benchmark_results
+        from build_profiler import format_bytes
+        self.window = tk.Toplevel(root)
+        self.window.title("Benchmark Results")
+        self.window.geometry("900x400")
+
+        ttk.Label(self.window, text="Latest benchmark of each settings profile, times are medians of the measured runs.").pack(fill=tk.X, padx=10, pady=(10, 5))
+        tree_frame = ttk.Frame(self.window)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        self.tree = ttk.Treeview(tree_frame, columns=[column for column, heading, width in self.COLUMNS], show="headings")
+        for column, heading, width in self.COLUMNS:
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor="w" if column in ("profile", "workload") else "e")
+        scrollbar = ttk.Scrollbar(tree_frame, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=scrollbar.set)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        scrollbar.pack(fill=tk.X)
+
+        def ms(summary):
+            return f"{summary['median'] * 1000:.1f} ms" if summary else "-"
+
+        for entry in sorted(load_benchmark_results().values(), key=lambda entry: entry["label"]):
+            results = entry["results"]
+            startup = results["startup"].get("compiled")
+            for name, result in results["workloads"].items():
+                compiled, cpython = result["compiled"]["wall"], result["cpython"]["wall"]
+                speedup = f"{cpython['median'] / compiled['median']:.2f}x" if compiled and cpython and compiled["median"] else "-"
+                self.tree.insert("", tk.END, values=(
+                    entry["label"], name, ms(compiled), ms(cpython), speedup,
+                    f"{compiled['p95'] * 1000:.1f} ms" if compiled else "-",
+                    f"{compiled['stddev'] * 1000:.1f} ms" if compiled else "-",
+                    ms(startup), format_bytes(result["compiled"]["peak_rss"]) if result["compiled"]["peak_rss"] else "-",
+                    format_bytes(entry["binary_size"])))
+
+class BatchBuildWindow:
+    def __init__(self, root):
+        self.root = root
+        self.window = tk.Toplevel(root)
+        self.window.title("Batch Build Queue")
+        self.window.geometry("700x600")
+
+        self.events = queue.Queue()
+        self.build_queue = None
+        self.settings_files = []
+        self.rows = {}
+        self.panes = {}
+
+        # Controls
+        controls = ttk.Frame(self.window)
+        controls.pack(fill=tk.X, padx=10, pady=(10, 0))
+        ttk.Button(controls, text="Add Settings Files...", command=self.add_settings_files).pack(side=tk.LEFT)
+        ttk.Label(controls, text="Concurrent builds:").pack(side=tk.LEFT, padx=(10, 2))
+        self.concurrency_var = tk.StringVar(value=str(max(1, min(4, (os.cpu_count() or 1) // 2))))
+        ttk.Spinbox(controls, from_=1, to=os.cpu_count() or 1, width=4, textvariable=self.concurrency_var).pack(side=tk.LEFT)
+        self.start_button = ttk.Button(controls, text="Start", command=self.start)
+        self.start_button.pack(side=tk.LEFT, padx=(10, 0))
+        self.stop_button = ttk.Button(controls, text="Stop", command=self.stop, state=tk.DISABLED)
+        self.stop_button.pack(side=tk.LEFT, padx=(5, 0))
+
+        # Aggregate throughput and ETA
+        self.summary_var = tk.StringVar(value="No jobs queued.")
+        ttk.Label(self.window, textvariable=self.summary_var).pack(fill=tk.X, padx=10, pady=5)
+
+        # One row per job with its own progress bar and exit status
+        self.jobs_frame = ScrollableLabelFrame(self.window, text="Jobs")
+        self.jobs_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.jobs_frame.scrollable_frame.columnconfigure(1, weight=1)
+
+        # One output pane per job
+        self.notebook = ttk.Notebook(self.window)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 10))
+
+        self.window.after(100, self.process_events)
+
+    def add_settings_files(self):
+        from tkinter import filedialog
+        file_paths = filedialog.askopenfilenames(filetypes=[("JSON files", "*.json")], parent=self.window)
+        for file_path in file_paths:
+            self.add_job_row(os.path.normpath(file_path))
+        self.update_summary()
+
+    def add_job_row(self, settings_path):
+        frame = self.jobs_frame.scrollable_frame
+        row = len(self.settings_files)
+        self.settings_files.append(settings_path)
+
+        name = os.path.basename(os.path.dirname(settings_path)) or settings_path
+        name = f"{name}/{os.path.basename(settings_path)}"
+        ttk.Label(frame, text=name).grid(row=row, column=0, sticky="w", padx=5, pady=2)
+        progress_var = tk.DoubleVar()
+        ttk.Progressbar(frame, variable=progress_var, maximum=100).grid(row=row, column=1, sticky="ew", padx=5, pady=2)
+        status_var = tk.StringVar(value="queued")
+        ttk.Label(frame, textvariable=status_var, width=36).grid(row=row, column=2, sticky="w", padx=5, pady=2)
+
+        pane = scrolledtext.ScrolledText(self.notebook, wrap=tk.WORD, height=8, state=tk.DISABLED)
+        self.notebook.add(pane, text=os.path.basename(os.path.dirname(settings_path)) or name)
+
+        self.rows[settings_path] = {"progress": progress_var, "status": status_var, "job": None}
+        self.panes[settings_path] = OutputRenderer(pane)
+        self.jobs_frame.update_scrollregion()
+
+    def start(self):
+        from build_queue import BuildJob, BuildQueue
+        if not self.settings_files:
+            messagebox.showinfo("Batch Build Queue", "Add one or more settings files first.", parent=self.window)
+            return
+        try:
+            concurrency = int(self.concurrency_var.get())
+        except ValueError:
+            messagebox.showerror("Error", "Invalid number of concurrent builds.", parent=self.window)
+            return
+
+        self.build_queue = BuildQueue(max_workers=concurrency, events=self.events)
+        for settings_path in self.settings_files:
+            row = self.rows[settings_path]
+            row["job"] = None
+            row["progress"].set(0)
+            try:
+                settings = load_settings(settings_path)
+                command = settings_command(settings)
+            except (OSError, ValueError) as e:
+                row["status"].set("invalid settings")
+                self.append_output(settings_path, f"Error: {e}\n")
+                continue
+            row["status"].set("queued")
+            self.build_queue.add(BuildJob(settings_path, command, settings["tool_options"]))
+
+        if not self.build_queue.jobs:
+            return
+        self.build_queue.start()
+        self.start_button.config(state=tk.DISABLED)
+        self.stop_button.config(state=tk.NORMAL)
+        self.update_summary()
+
+    def stop(self):
+        if self.build_queue:
+            self.build_queue.stop()
+        self.stop_button.config(state=tk.DISABLED)
+
+    def append_output(self, settings_path, text):
+        self.panes[settings_path].write(text)
+
+    def process_events(self):
+        if not self.window.winfo_exists():
+            return
+        output = {}
+        count = 0
+        try:
+            while count < QUEUE_BATCH_SIZE:
+                count += 1
+                kind, job, data = self.events.get_nowait()
+                row = self.rows[job.name]
+                if kind == "start":
+                    row["status"].set("running")
+                    row["job"] = job
+                    output.setdefault(job.name, []).append(f"Executing command: {' '.join(data)}\n\n")
+                elif kind == "line":
+                    output.setdefault(job.name, []).append(data)
+                elif kind == "finish":
+                    if job.status == "succeeded":
+                        row["progress"].set(100)
+                        row["status"].set("succeeded (exit 0)")
+                    elif job.status == "failed":
+                        row["status"].set(f"failed (exit {job.returncode})")
+                    else:
+                        row["status"].set(job.status)
+        except queue.Empty:
+            pass
+
+        for settings_path, lines in output.items():
+            self.append_output(settings_path, "".join(lines))
+
+        for row in self.rows.values():
+            # The job's BuildProgress is fed by its worker thread
+            tracker = row["job"].progress if row["job"] else None
+            if tracker and not tracker.finished:
+                row["progress"].set(tracker.fraction() * 100)
+                row["status"].set(tracker.status())
+
+        if self.build_queue:
+            self.update_summary()
+            counts = self.build_queue.counts()
+            if not counts["queued"] and not counts["running"]:
+                self.start_button.config(state=tk.NORMAL)
+                self.stop_button.config(state=tk.DISABLED)
+        self.window.after(1 if count == QUEUE_BATCH_SIZE else QUEUE_POLL_MS, self.process_events)
+
+    def update_summary(self):
+        if not self.build_queue:
+            self.summary_var.set(f"{len(self.settings_files)} job(s) ready.")
+            return
+        counts = self.build_queue.counts()
+        finished = counts["succeeded"] + counts["failed"]
+        summary = (f"Finished {finished}/{len(self.build_queue.jobs)} "
+                   f"({counts['succeeded']} ok, {counts['failed']} failed), {counts['running']} running, "
+                   f"--jobs={self.build_queue.jobs_per_build()} per build, "
+                   f"{self.build_queue.throughput():.1f} builds/min")
+        eta = self.build_queue.eta()
+        if eta is not None and (counts["queued"] or counts["running"]):
+            summary += f", ETA {int(eta // 60)}m {int(eta % 60):02d}s"
+        self.summary_var.set(summary)
+
+class BuildHistoryWindow:
+    COLUMNS = (("time", "Time", 120), ("script", "Script", 140), ("status", "Status", 80), ("duration", "Duration", 70),
+               ("warnings", "Warnings", 70), ("errors", "Errors", 60))
+
+    def __init__(self, root):
+        import sqlite3
+        from build_history import LEVELS, BuildHistory
+        from build_progress import format_duration
+        self.history = BuildHistory()
+        self.window = tk.Toplevel(root)
+        self.window.title("Build History")
+        self.window.geometry("800x650")
+
+        controls = ttk.Frame(self.window)
+        controls.pack(fill=tk.X, padx=10, pady=(10, 0))
+        self.query_var = tk.StringVar()
+        search_entry = ttk.Entry(controls, textvariable=self.query_var)
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        search_entry.bind("<Return>", lambda event: self.search())
+        ttk.Label(controls, text="Level:").pack(side=tk.LEFT, padx=(10, 2))
+        self.level_var = tk.StringVar()
+        ttk.Combobox(controls, textvariable=self.level_var, values=("",) + LEVELS, state="readonly", width=8).pack(side=tk.LEFT)
+        ttk.Button(controls, text="Search", command=self.search).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Button(controls, text="Compare Selected", command=self.compare).pack(side=tk.LEFT, padx=(5, 0))
+
+        # Stored builds, newest first; double-click shows a build's warnings and errors
+        self.tree = ttk.Treeview(self.window, columns=[column for column, heading, width in self.COLUMNS], show="headings", height=10)
+        for column, heading, width in self.COLUMNS:
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor="w" if column in ("time", "script", "status") else "e")
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.tree.bind("<Double-1>", self.show_build)
+        self.details = scrolledtext.ScrolledText(self.window, wrap=tk.NONE, height=14, state=tk.DISABLED)
+        self.details.pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 10))
+        try:
+            builds = self.history.builds()
+        except sqlite3.Error as e:
+            self.show_text(f"The build history cannot be read: {e}")
+            return
+        for build in builds:
+            self.tree.insert("", tk.END, iid=str(build["id"]), values=(
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(build["started"])), os.path.basename(build["script"]), build["status"],
+                format_duration(build["finished"] - build["started"]), build["warnings"], build["errors"]))
+        self.show_text(f"{len(self.tree.get_children())} build(s) stored. Search their output, double-click a build for its warnings "
+                       "and errors, or select two builds and compare them.")
+
+    def show_text(self, text):
+        self.details.config(state=tk.NORMAL)
+        self.details.delete(1.0, tk.END)
+        self.details.insert(tk.END, text)
+        self.details.config(state=tk.DISABLED)
+
+    def search(self):
+        import sqlite3
+        start = time.perf_counter()
+        try:
+            rows = self.history.search(self.query_var.get(), self.level_var.get() or None)
+        except sqlite3.Error as e:
+            # A locked or damaged database, or a query the full-text index cannot parse
+            self.show_text(f"Search failed: {e}")
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        lines = [f"#{row['build_id']} {time.strftime('%Y-%m-%d %H:%M', time.localtime(row['started']))} {os.path.basename(row['script'])}:"
+                 f"{row['line']} [{row['level']}] {row['text']}" for row in rows]
+        self.show_text(f"{len(rows)} matching line(s) in {elapsed:.0f} ms\n\n" + "\n".join(lines))
+        self.tree.selection_set([str(build_id) for build_id in sorted({row["build_id"] for row in rows}) if self.tree.exists(str(build_id))])
+
+    def show_build(self, event):
+        import sqlite3
+        from build_history import format_build
+        item = self.tree.identify_row(event.y)
+        if not item:
+            return
+        try:
+            build = self.history.build(int(item))
+            messages = self.history.messages(build["id"])
+        except sqlite3.Error as e:
+            self.show_text(f"The build cannot be read: {e}")
+            return
+        text = format_build(build) + "\n" + " ".join(build["command"]) + "\n\n"
+        text += "".join(f"  {name:<14} {duration:.1f}s\n" for name, duration in build["phases"].items())
+        text += "\n" + "\n".join(f"{message['line']}: [{message['level']}] {message['source']} {message['text']}" for message in messages)
+        self.show_text(text)
+
+    def compare(self):
+        import sqlite3
+        from build_history import format_comparison
+        selection = self.tree.selection()
+        if len(selection) != 2:
+            messagebox.showinfo("Build History", "Select exactly two builds to compare (Ctrl+click).", parent=self.window)
+            return
+        first, second = sorted(int(item) for item in selection)
+        try:
+            self.show_text(format_comparison(self.history.compare(first, second)))
+        except (sqlite3.Error, ValueError) as e:
+            self.show_text(f"Comparison failed: {e}")
+
+class OnefileWindow:
+    def __init__(self, root, command, tool_options):
+        from build_profiler import format_bytes
+        from onefile import dist_dir_for, payload_breakdown
+        self.command = command
+        self.tool_options = tool_options
+        self.result = queue.Queue()
+
+        self.window = tk.Toplevel(root)
+        self.window.title(f"Onefile Startup & Payload - {os.path.basename(command[-1])}")
+        self.window.geometry("700x600")
+        if "--onefile" not in command:
+            ttk.Label(self.window, text="This build is not a onefile build, the figures below are for the standalone executable.",
+                      foreground="darkorange").pack(fill=tk.X, padx=10, pady=(10, 0))
+
+        # Startup latency, measured in the background
+        controls = ttk.Frame(self.window)
+        controls.pack(fill=tk.X, padx=10, pady=(10, 0))
+        ttk.Label(controls, text="Runs:").pack(side=tk.LEFT, padx=(0, 2))
+        self.runs_var = tk.StringVar(value=tool_options.get("onefile_startup_runs") or "20")
+        ttk.Spinbox(controls, from_=1, to=500, width=5, textvariable=self.runs_var).pack(side=tk.LEFT)
+        self.measure_button = ttk.Button(controls, text="Measure Cold/Warm Startup", command=self.measure)
+        self.measure_button.pack(side=tk.LEFT, padx=(10, 0))
+        self.startup_var = tk.StringVar(value="Cold starts unpack the payload first, warm starts reuse a payload extracted by an earlier run.")
+        ttk.Label(self.window, textvariable=self.startup_var, justify=tk.LEFT, wraplength=680).pack(fill=tk.X, padx=10, pady=5)
+
+        # Payload size per extension module, shared library and package folder
+        dist_dir = dist_dir_for(command)
+        entries = payload_breakdown(dist_dir) if os.path.isdir(dist_dir) else []
+        total = sum(entry["size"] for entry in entries)
+        summary = (f"Payload: {format_bytes(total)} in {sum(entry['files'] for entry in entries)} files ({dist_dir})" if entries else
+                   f"No payload folder found at {dist_dir}, build without --remove-output to analyze it.")
+        ttk.Label(self.window, text=summary, wraplength=680).pack(fill=tk.X, padx=10, pady=(5, 0))
+        tree_frame = ttk.Frame(self.window)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 10))
+        tree = ttk.Treeview(tree_frame, columns=("name", "kind", "size", "share", "files"), show="headings")
+        for column, heading, width in (("name", "Module / file", 280), ("kind", "Kind", 120), ("size", "Size", 90),
+                                       ("share", "Share", 60), ("files", "Files", 60)):
+            tree.heading(column, text=heading)
+            tree.column(column, width=width, anchor="w" if column in ("name", "kind") else "e")
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        for entry in entries:
+            tree.insert("", tk.END, values=(entry["name"], entry["kind"], format_bytes(entry["size"]),
+                                            f"{entry['size'] * 100.0 / total:.1f}%", entry["files"]))
+
+    def measure(self):
+        from onefile import format_startup, measure_startup
+        try:
+            runs = max(int(self.runs_var.get()), 1)
+        except ValueError:
+            messagebox.showerror("Error", "Invalid number of runs.", parent=self.window)
+            return
+        self.measure_button.config(state=tk.DISABLED)
+        self.startup_var.set(f"Measuring {runs} cold and {runs} warm starts...")
+
+        def worker():
+            try:
+                self.result.put(format_startup(measure_startup(self.command, self.tool_options, runs)))
+            except (OSError, ValueError) as e:
+                self.result.put(f"Startup measurement failed: {e}")
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.window.after(QUEUE_POLL_MS, self.check_result)
+
+    def check_result(self):
+        if not self.window.winfo_exists():
+            return
+        try:
+            text = self.result.get_nowait()
+        except queue.Empty:
+            self.window.after(QUEUE_POLL_MS, self.check_result)
+            return
+        self.measure_button.config(state=tk.NORMAL)
+        self.startup_var.set(text.strip())
+
+class SettingsLayersWindow:
+    # The effective values of a layered settings file, which layer set each one and what it overrides
+    def __init__(self, root, settings_path):
+        self.settings_path = settings_path
+        self.window = tk.Toplevel(root)
+        self.window.title(f"Settings Layers - {os.path.basename(settings_path)}")
+        self.window.geometry("760x560")
+
+        controls = ttk.Frame(self.window)
+        controls.pack(fill=tk.X, padx=10, pady=(10, 0))
+        self.layers_var = tk.StringVar()
+        ttk.Label(controls, textvariable=self.layers_var, wraplength=600).pack(side=tk.LEFT, fill=tk.X)
+        ttk.Button(controls, text="Compare With...", command=self.compare).pack(side=tk.RIGHT)
+
+        tree_frame = ttk.Frame(self.window)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 0))
+        self.tree = ttk.Treeview(tree_frame, columns=("option", "value", "layer", "overrides"), show="headings", height=12)
+        for column, heading, width in (("option", "Option", 200), ("value", "Value", 140), ("layer", "Set by", 140), ("overrides", "Overrides", 240)):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor="w")
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        self.details = scrolledtext.ScrolledText(self.window, wrap=tk.NONE, height=10, state=tk.DISABLED)
+        self.details.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.show_layers()
+
+    def show_layers(self):
+        from settings_profiles import explain, format_value
+        try:
+            settings, rows = explain(self.settings_path)
+        except (OSError, ValueError) as e:
+            self.layers_var.set(str(e))
+            return
+        self.layers_var.set("Layers: " + " -> ".join(os.path.basename(path) for path in settings["layers"]))
+        for name, value, layer_path, overridden in rows:
+            self.tree.insert("", tk.END, values=(name, format_value(value), os.path.relpath(layer_path, os.path.dirname(self.settings_path)),
+                                                 ", ".join(f"{format_value(old)} [{os.path.basename(old_layer)}]" for old_layer, old in overridden)))
+
+    def compare(self):
+        from tkinter import filedialog
+        from settings_profiles import diff_settings, format_diff
+        other_path = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")], parent=self.window)
+        if not other_path:
+            return
+        try:
+            text = format_diff(self.settings_path, other_path, diff_settings(self.settings_path, other_path))
+        except (OSError, ValueError) as e:
+            text = str(e)
+        self.details.config(state=tk.NORMAL)
+        self.details.delete(1.0, tk.END)
+        self.details.insert(tk.END, text)
+        self.details.config(state=tk.DISABLED)
+
+class DistAnalysisWindow:
+    # Size per package, duplicate files, shared libraries nothing links against and the change since the last analyzed build
+    def __init__(self, root, command, tool_options):
+        from onefile import dist_dir_for
+        self.dist_dir = dist_dir_for(command)
+        self.workers = int(tool_options.get("dist_analysis_workers") or 0) or None
+        self.result = queue.Queue()
+
+        self.window = tk.Toplevel(root)
+        self.window.title(f"Dist Analysis - {os.path.basename(self.dist_dir)}")
+        self.window.geometry("760x650")
+
+        controls = ttk.Frame(self.window)
+        controls.pack(fill=tk.X, padx=10, pady=(10, 0))
+        self.analyze_button = ttk.Button(controls, text="Analyze Again", command=self.analyze)
+        self.analyze_button.pack(side=tk.RIGHT)
+        self.status_var = tk.StringVar()
+        ttk.Label(controls, textvariable=self.status_var, wraplength=620).pack(side=tk.LEFT, fill=tk.X)
+
+        tree_frame = ttk.Frame(self.window)
+        tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 0))
+        self.tree = ttk.Treeview(tree_frame, columns=("package", "size", "share", "files", "change"), show="headings", height=10)
+        for column, heading, width in (("package", "Package", 280), ("size", "Size", 90), ("share", "Share", 60),
+                                       ("files", "Files", 60), ("change", "Since last build", 120)):
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor="w" if column == "package" else "e")
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        # Duplicates, unused libraries, file changes and the exclusion options that would reclaim space
+        self.details = scrolledtext.ScrolledText(self.window, wrap=tk.NONE, height=16, state=tk.DISABLED)
+        self.details.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.analyze()
+
+    def analyze(self):
+        from dist_analyzer import analyze_dist
+        if not os.path.isdir(self.dist_dir):
+            self.status_var.set(f"No .dist folder found at {self.dist_dir}, build in standalone mode without --remove-output to analyze it.")
+            return
+        self.analyze_button.config(state=tk.DISABLED)
+        self.status_var.set(f"Hashing and analyzing {self.dist_dir}...")
+
+        def worker():
+            try:
+                self.result.put(analyze_dist(self.dist_dir, self.workers))
+            except OSError as e:
+                self.result.put(f"Dist analysis failed: {e}")
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.window.after(QUEUE_POLL_MS, self.check_result)
+
+    def check_result(self):
+        from build_profiler import format_bytes
+        from dist_analyzer import format_analysis, format_delta
+        if not self.window.winfo_exists():
+            return
+        try:
+            analysis = self.result.get_nowait()
+        except queue.Empty:
+            self.window.after(QUEUE_POLL_MS, self.check_result)
+            return
+        self.analyze_button.config(state=tk.NORMAL)
+        if isinstance(analysis, str):
+            self.status_var.set(analysis)
+            return
+        total = analysis["total_size"]
+        suggestions = analysis["suggestions"]
+        self.status_var.set(f"{format_bytes(total)} in {len(analysis['files'])} files, "
+                            f"{len(suggestions)} exclusion option(s) could reclaim up to {format_bytes(sum(size for option, size, reason in suggestions))}.")
+        changes = {name: new_size - old_size for name, old_size, new_size in analysis["diff"]["packages"]} if analysis["diff"] else {}
+        self.tree.delete(*self.tree.get_children())
+        for package in analysis["packages"]:
+            change = changes.get(package["name"])
+            self.tree.insert("", tk.END, values=(package["name"], format_bytes(package["size"]),
+                                                 f"{package['size'] * 100.0 / total:.1f}%" if total else "-", package["files"],
+                                                 format_delta(change) if change else ""))
+        self.details.config(state=tk.NORMAL)
+        self.details.delete(1.0, tk.END)
+        self.details.insert(tk.END, format_analysis(analysis, limit=50))
+        self.details.config(state=tk.DISABLED)
+
+class OptionSweepWindow:
+    COLUMNS = (("rank", "#", 30), ("variant", "Variant", 260), ("status", "Status", 90), ("build_time", "Build time", 80),
+               ("size", "Binary size", 85), ("startup", "Startup", 75), ("runtime", "Runtime", 75))
+
+    def __init__(self, root, settings, options):
+        from option_sweep import QUEUE_OPTIONS, RANK_KEYS
+        self.root = root
+        self.settings = settings
+        self.options = options
+        self.events = queue.Queue()
+        self.measured = queue.Queue()
+        self.build_queue = None
+        self.variants = []
+        self.items = {}  # Treeview item -> variant
+
+        self.window = tk.Toplevel(root)
+        self.window.title(f"Option Sweep - {os.path.basename(settings['file_path'])}")
+        self.window.geometry("760x650")
+
+        # Axes: every checked option is swept, bool options over off/on, others over the listed values
+        axes_frame = ScrollableLabelFrame(self.window, text="Axes (the current settings are used for everything else)")
+        axes_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 5))
+        frame = axes_frame.scrollable_frame
+        frame.columnconfigure(1, weight=1)
+        self.axes = {}
+        row = 0
+        for category, category_options in OPTIONS_DATA:
+            for option, option_type, description in category_options:
+                if option_type not in ("bool", "str", "int") or option in QUEUE_OPTIONS:
+                    continue
+                enabled = tk.BooleanVar()
+                enabled.trace_add("write", lambda *args: self.update_count())
+                ttk.Checkbutton(frame, text=option, variable=enabled).grid(row=row, column=0, sticky="w", padx=5, pady=1)
+                values = None
+                if option_type == "bool":
+                    ttk.Label(frame, text="off, on").grid(row=row, column=1, sticky="w", padx=5, pady=1)
+                else:
+                    values = tk.StringVar(value=",".join(value for value in OPTION_CHOICES.get(option, []) if value))
+                    values.trace_add("write", lambda *args: self.update_count())
+                    ttk.Entry(frame, textvariable=values).grid(row=row, column=1, sticky="ew", padx=5, pady=1)
+                self.axes[option] = (enabled, values)
+                row += 1
+        axes_frame.update_scrollregion()
+
+        controls = ttk.Frame(self.window)
+        controls.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(controls, text="Concurrent builds:").pack(side=tk.LEFT, padx=(0, 2))
+        self.concurrency_var = tk.StringVar(value=str(max(1, min(4, (os.cpu_count() or 1) // 2))))
+        ttk.Spinbox(controls, from_=1, to=os.cpu_count() or 1, width=4, textvariable=self.concurrency_var).pack(side=tk.LEFT)
+        ttk.Label(controls, text="Rank by:").pack(side=tk.LEFT, padx=(10, 2))
+        self.rank_var = tk.StringVar(value=RANK_KEYS["runtime"])
+        rank_box = ttk.Combobox(controls, textvariable=self.rank_var, values=list(RANK_KEYS.values()), state="readonly", width=16)
+        rank_box.pack(side=tk.LEFT)
+        rank_box.bind("<<ComboboxSelected>>", lambda event: self.show_ranking())
+        self.start_button = ttk.Button(controls, text="Start", command=self.start)
+        self.start_button.pack(side=tk.LEFT, padx=(10, 0))
+        self.stop_button = ttk.Button(controls, text="Stop", command=self.stop, state=tk.DISABLED)
+        self.stop_button.pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Button(controls, text="Promote to Options", command=self.promote).pack(side=tk.RIGHT)
+
+        self.status_var = tk.StringVar()
+        ttk.Label(self.window, textvariable=self.status_var, wraplength=740).pack(fill=tk.X, padx=10)
+        self.update_count()
+
+        self.tree = ttk.Treeview(self.window, columns=[column for column, heading, width in self.COLUMNS], show="headings", height=10)
+        for column, heading, width in self.COLUMNS:
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor="w" if column in ("variant", "status") else "e")
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=(5, 10))
+
+    def get_axes(self):
+        axes = {}
+        for option, (enabled, values) in self.axes.items():
+            if not enabled.get():
+                continue
+            if values is None:
+                axes[option] = [False, True]
+            else:
+                axes[option] = [value.strip() for value in values.get().split(",")]
+        return axes
+
+    def update_count(self):
+        count = 1
+        for values in self.get_axes().values():
+            count *= len(values)
+        self.status_var.set(f"{count} variant(s) will be built." if count > 1 else "Check the options to sweep.")
+
+    def start(self):
+        from option_sweep import build_variants, sweep_variants
+        axes = self.get_axes()
+        if not axes:
+            messagebox.showinfo("Option Sweep", "Check at least one option to sweep.", parent=self.window)
+            return
+        try:
+            concurrency = int(self.concurrency_var.get())
+        except ValueError:
+            messagebox.showerror("Error", "Invalid number of concurrent builds.", parent=self.window)
+            return
+        self.variants = sweep_variants(self.settings, axes)
+        self.build_queue = build_variants(self.variants, concurrency, self.events)
+        self.start_button.config(state=tk.DISABLED)
+        self.stop_button.config(state=tk.NORMAL)
+        self.show_ranking()
+        self.window.after(QUEUE_POLL_MS, self.process_events)
+
+    def stop(self):
+        if self.build_queue:
+            self.build_queue.stop()
+        self.stop_button.config(state=tk.DISABLED)
+
+    def process_events(self):
+        from option_sweep import measure_variant
+        if not self.window.winfo_exists():
+            return
+        try:
+            while True:
+                kind, job, data = self.events.get_nowait()
+        except queue.Empty:
+            pass
+
+        counts = self.build_queue.counts()
+        if counts["queued"] or counts["running"]:
+            self.status_var.set(f"Building: {counts['succeeded'] + counts['failed']}/{len(self.variants)} finished, "
+                                f"{counts['running']} running, --jobs={self.build_queue.jobs_per_build()} per build.")
+            self.show_ranking()
+            self.window.after(QUEUE_POLL_MS, self.process_events)
+            return
+
+        # Measured one after another once every build is done, so the timings are not skewed by running builds
+        self.stop_button.config(state=tk.DISABLED)
+        self.status_var.set("Measuring binary size, startup and runtime...")
+        self.show_ranking()
+
+        def worker():
+            try:
+                for variant in self.variants:
+                    measure_variant(variant, lambda line: None)
+                    self.measured.put(variant)
+            finally:
+                # Start must come back even if measuring raised something unexpected
+                self.measured.put(None)
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.window.after(QUEUE_POLL_MS, self.check_measured)
+
+    def check_measured(self):
+        if not self.window.winfo_exists():
+            return
+        try:
+            while True:
+                variant = self.measured.get_nowait()
+                if variant is None:
+                    self.start_button.config(state=tk.NORMAL)
+                    self.status_var.set("Sweep finished, select a variant and promote it to the options.")
+                    self.show_ranking()
+                    return
+        except queue.Empty:
+            pass
+        self.show_ranking()
+        self.window.after(QUEUE_POLL_MS, self.check_measured)
+
+    def show_ranking(self):
+        from build_profiler import format_bytes
+        from build_progress import format_duration
+        from option_sweep import RANK_KEYS, rank
+        key = next(key for key, label in RANK_KEYS.items() if label == self.rank_var.get())
+        self.tree.delete(*self.tree.get_children())
+        self.items = {}
+        for position, variant in enumerate(rank(self.variants, key), 1):
+            metrics = variant.metrics
+            item = self.tree.insert("", tk.END, values=(
+                position if metrics else "", variant.name, "measuring failed" if metrics.get("error") else variant.job.status,
+                format_duration(variant.job.duration) if variant.job.started else "-",
+                format_bytes(metrics["size"]) if metrics.get("size") is not None else "-",
+                f"{metrics['startup'] * 1000:.1f} ms" if metrics.get("startup") is not None else "-",
+                f"{metrics['runtime'] * 1000:.1f} ms" if metrics.get("runtime") is not None else "-"))
+            self.items[item] = variant
+
+    def promote(self):
+        # The selected variant, or the best ranked one
+        from option_sweep import format_metrics
+        selection = self.tree.selection()
+        variant = self.items.get(selection[0]) if selection else None
+        if variant is None and self.items:
+            variant = self.items[self.tree.get_children()[0]]
+        if variant is None or variant.job.status != "succeeded":
+            messagebox.showinfo("Option Sweep", "Select a successfully built variant first.", parent=self.window)
+            return
+        for option, value in variant.values.items():
+            self.options[option].set(value)
+        messagebox.showinfo("Option Sweep", f"Promoted {variant.name} ({format_metrics(variant.metrics)}) to the options.", parent=self.window)
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = NuitkaGUI(root)
-    root.mainloop()
\ No newline at end of file
+    import multiprocessing
+    from startup_profile import STARTUP_TARGET_MS
+
+    # The import scanner uses worker processes, needed when this GUI is itself compiled
+    multiprocessing.freeze_support()
+    # "--profile-startup" or "--profile-startup=MS": print the startup stages and exit once the window is painted
+    startup_target = None
+    for arg in sys.argv[1:]:
+        if arg.split("=", 1)[0] == "--profile-startup":
+            startup_target = float(arg.split("=", 1)[1]) if "=" in arg else STARTUP_TARGET_MS
+    with startup_profile.stage("Tk root"):
+        root = tk.Tk()
+    app = NuitkaGUI(root, startup_target)
+    root.mainloop()
+    if startup_target is not None and not startup_profile.within_target(startup_target):
+        sys.exit(1)
\ No newline at end of file
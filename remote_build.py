@@ -0,0 +1,500 @@
+import hashlib
+import hmac
+import json
+import os
+import platform
+import re
+import secrets
+import shutil
+import socket
+import socketserver
+import struct
+import sys
+import tarfile
+import tempfile
+import threading
+
+from build_queue import with_jobs
+from nuitka_core import BuildRunner
+from watcher import source_files
+
+# Every message is a 4 byte big-endian header length, a JSON header and, when the header has "size", that many raw bytes
+PROTOCOL_VERSION = 2
+HEADER_FORMAT = "!I"
+CHUNK_SIZE = 1024 * 1024
+
+# Kept on the worker between builds so rebuilds of the same project are incremental
+ARTIFACT_EXCLUDED_SUFFIXES = (".build", ".onefile-build")
+
+# Shared secret of workers and coordinators when neither --token nor the remote_token setting gives one
+TOKEN_ENVIRONMENT = "PY_NUITKA_GUI_WORKER_TOKEN"
+# Options the worker sets itself and never takes from a coordinator
+WORKER_OPTIONS = ("--output-dir", "--main")
+# Options whose paths are used where the program runs, not read from the source tree
+RUNTIME_PATH_OPTIONS = ("--onefile-tempdir-spec",)
+ABSOLUTE_PATH_PATTERN = re.compile(r"^([/\\]|[A-Za-z]:[/\\])")
+
+in_flight = {}
+in_flight_lock = threading.Lock()
+
+
+def parse_address(address):
+    # "host:port" or "unix:/path/to/socket" -> (family, address)
+    address = address.strip()
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid worker address: {address} (expected host:port or unix:/path)")
+    return socket.AF_INET, (host, int(port))
+
+
+def parse_workers(value):
+    return [address.strip() for address in (value or "").split(",") if address.strip()]
+
+
+def send_message(sock, header, payload=None, payload_file=None):
+    # payload is bytes, payload_file an open binary file sent from its current position to the end
+    if payload is not None:
+        header = dict(header, size=len(payload))
+    elif payload_file is not None:
+        header = dict(header, size=os.fstat(payload_file.fileno()).st_size - payload_file.tell())
+    data = json.dumps(header).encode("utf-8")
+    sock.sendall(struct.pack(HEADER_FORMAT, len(data)) + data)
+    if payload is not None:
+        sock.sendall(payload)
+    elif payload_file is not None:
+        while True:
+            chunk = payload_file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            sock.sendall(chunk)
+
+
+def recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(min(size - len(data), CHUNK_SIZE))
+        if not chunk:
+            raise ConnectionError("Connection closed by the other side")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def recv_message(sock, sink=None):
+    # (header, payload), the payload is written to sink instead when one is given
+    length = struct.unpack(HEADER_FORMAT, recv_exact(sock, struct.calcsize(HEADER_FORMAT)))[0]
+    header = json.loads(recv_exact(sock, length).decode("utf-8"))
+    size = header.get("size", 0)
+    if sink is None:
+        return header, recv_exact(sock, size) if size else b""
+    while size:
+        chunk = recv_exact(sock, min(size, CHUNK_SIZE))
+        sink.write(chunk)
+        size -= len(chunk)
+    return header, None
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def safe_relative(path):
+    # Paths received over the wire must stay inside the folder they are written to
+    parts = path.replace("\\", "/").split("/")
+    if not path or path.startswith(("/", "\\")) or ":" in parts[0] or ".." in parts:
+        raise ValueError(f"Unsafe path: {path}")
+    return os.path.join(*parts)
+
+
+def outside_root(value):
+    # Absolute paths and ".." segments in option values received by a worker
+    return any(ABSOLUTE_PATH_PATTERN.match(part) or ".." in part.replace("\\", "/").split("/") for part in value.split("="))
+
+
+def check_arguments(arguments):
+    # Coordinators may only pass options whose paths stay inside the shipped source tree
+    for arg in arguments:
+        option, separator, value = arg.partition("=")
+        if not option.startswith("--") or option in WORKER_OPTIONS:
+            raise ValueError(f"Argument not accepted by the worker: {arg}")
+        if separator and option not in RUNTIME_PATH_OPTIONS and outside_root(value):
+            raise ValueError(f"Path outside the project folder not accepted by the worker: {arg}")
+
+
+def worker_token(work_dir, token=None):
+    # --token, then the environment, then a token generated once and kept in <work_dir>/token
+    token = token or os.environ.get(TOKEN_ENVIRONMENT)
+    if token:
+        return token, None
+    path = os.path.join(work_dir, "token")
+    try:
+        with open(path, 'r') as f:
+            token = f.read().strip()
+    except FileNotFoundError:
+        token = None
+    if not token:
+        token = secrets.token_hex(16)
+        with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+            f.write(token + "\n")
+    return token, path
+
+
+def auth_response(token, challenge):
+    # The token itself never goes over the wire, only an HMAC of the worker's random challenge
+    return hmac.new(token.encode("utf-8"), challenge.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def source_manifest(root, output_dir):
+    # relative path -> content hash of the source tree shipped to a worker
+    output_prefix = os.path.normcase(os.path.abspath(output_dir)) + os.sep
+    manifest = {}
+    for path in source_files(root, lambda path: (os.path.normcase(os.path.abspath(path)) + os.sep).startswith(output_prefix)):
+        manifest[os.path.relpath(path, root).replace(os.sep, "/")] = file_hash(path)
+    return manifest
+
+
+def remote_arguments(command, root):
+    # Nuitka arguments for the worker: no interpreter, output folder or script, paths inside the tree made relative.
+    # Raises ValueError for paths outside the tree, the worker only has the files below the script's folder.
+    arguments = []
+    for arg in command[3:-1]:
+        if arg.startswith(("--output-dir=", "--jobs=")):
+            continue
+        option, separator, value = arg.partition("=")
+        if separator and option not in RUNTIME_PATH_OPTIONS and os.path.isabs(value):
+            try:
+                relative = os.path.relpath(value, root)
+            except ValueError:
+                # Another drive on Windows
+                relative = value
+            if relative.startswith("..") or os.path.isabs(relative):
+                raise ValueError(f"{arg} is outside {root}, the only folder sent to the worker")
+            arg = f"{option}={relative.replace(os.sep, '/')}"
+        arguments.append(arg)
+    return arguments
+
+
+def pick_worker(addresses):
+    # The worker with the fewest builds sent from this process, the first one listed on a tie
+    with in_flight_lock:
+        address = min(addresses, key=lambda address: in_flight.get(address, 0))
+        in_flight[address] = in_flight.get(address, 0) + 1
+    return address
+
+
+def release_worker(address):
+    with in_flight_lock:
+        in_flight[address] -= 1
+
+
+def extract_artifacts(archive, output_dir):
+    with tarfile.open(fileobj=archive, mode="r:gz") as tar:
+        members = []
+        for member in tar.getmembers():
+            safe_relative(member.name)
+            if not (member.isfile() or member.isdir() or member.issym() or member.islnk()):
+                # Devices and fifos have no place in build results
+                continue
+            if member.issym() or member.islnk():
+                if os.path.isabs(member.linkname) or ".." in member.linkname.replace("\\", "/").split("/"):
+                    continue
+            members.append(member)
+        if hasattr(tarfile, "data_filter"):
+            # Python 3.12 and the security backports also refuse special permissions and links leaving output_dir
+            tar.extractall(output_dir, members=members, filter="data")
+        else:
+            tar.extractall(output_dir, members=members)
+        return len(members)
+
+
+class RemoteRunner:
+    # Same interface as BuildRunner, but the build runs on a worker started with "py_nuitka_gui worker"
+    def __init__(self, command, addresses, on_start=None, token=None):
+        self.command = command
+        self.addresses = addresses
+        self.on_start = on_start
+        self.token = token or os.environ.get(TOKEN_ENVIRONMENT)
+        self.sock = None
+        self.send_lock = threading.Lock()
+        self.returncode = None
+        self.cancelled = False
+
+    def run(self, on_line):
+        address = pick_worker(self.addresses)
+        try:
+            self.returncode = self.run_on(address, on_line)
+        except (OSError, ValueError) as e:
+            on_line(f"Remote build on {address} failed: {e}\n")
+            self.returncode = -1
+        finally:
+            release_worker(address)
+            if self.sock is not None:
+                self.sock.close()
+        return self.returncode
+
+    def send(self, header, payload=None):
+        # cancel() sends from another thread, a message must never be interleaved with another one
+        with self.send_lock:
+            send_message(self.sock, header, payload)
+
+    def run_on(self, address, on_line):
+        script = self.command[-1]
+        root = os.path.dirname(script)
+        output_dir = next(arg.split("=", 1)[1] for arg in self.command if arg.startswith("--output-dir="))
+        arguments = remote_arguments(self.command, root)
+        if not self.token:
+            raise ValueError(f"no token for the worker, set remote_token or {TOKEN_ENVIRONMENT} to the worker's token")
+
+        family, target = parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.connect(target)
+        self.send({"type": "hello", "version": PROTOCOL_VERSION})
+        hello = recv_message(self.sock)[0]
+        if hello["type"] == "error":
+            raise ValueError(hello["text"])
+        self.send({"type": "auth", "response": auth_response(self.token, hello["challenge"])})
+        reply = recv_message(self.sock)[0]
+        if reply["type"] != "welcome":
+            raise ValueError(reply.get("text", "authentication failed"))
+        on_line(f"Building on worker {address} ({hello['host']}, Python {hello['python']}, {hello['slots']} slot(s)).\n")
+        if hello["python"].split(".")[:2] != platform.python_version().split(".")[:2]:
+            on_line(f"Warning: the worker runs Python {hello['python']}, the result is built for that version.\n")
+
+        # Only files the worker has not seen before (by content hash) are sent
+        manifest = source_manifest(root, output_dir)
+        self.send({"type": "manifest", "project": hashlib.sha256(f"{socket.gethostname()}:{root}".encode()).hexdigest()[:16],
+                                 "files": manifest})
+        missing = set(recv_message(self.sock)[0]["hashes"])
+        paths = {digest: path for path, digest in manifest.items()}
+        sent = 0
+        for digest in missing:
+            with open(os.path.join(root, paths[digest]), 'rb') as f:
+                payload = f.read()
+            self.send({"type": "blob", "hash": digest}, payload)
+            sent += len(payload)
+        reused = sum(1 for digest in manifest.values() if digest not in missing)
+        on_line(f"Source tree: {len(manifest)} files, {len(missing)} sent ({sent} bytes), {reused} already on the worker.\n")
+
+        self.send({"type": "build", "arguments": arguments, "script": os.path.relpath(script, root).replace(os.sep, "/")})
+        if self.cancelled:
+            self.cancel()
+        with tempfile.TemporaryFile() as archive:
+            while True:
+                header = recv_message(self.sock, sink=archive)[0]
+                if header["type"] == "line":
+                    on_line(header["text"])
+                    continue
+                if header["type"] == "result":
+                    if header.get("size"):
+                        archive.seek(0)
+                        count = extract_artifacts(archive, output_dir)
+                        on_line(f"Collected {count} artifact(s) from {address} into {output_dir}.\n")
+                    return header["returncode"]
+                raise ValueError(f"Unexpected message from worker: {header['type']}")
+
+    def cancel(self):
+        # Asks the worker to kill the build, safe to call from any thread
+        self.cancelled = True
+        if self.sock is None:
+            return
+        try:
+            with self.send_lock:
+                send_message(self.sock, {"type": "cancel"})
+        except OSError:
+            pass
+
+
+class WorkerHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        sock = self.request
+        try:
+            header = recv_message(sock)[0]
+            if header.get("type") != "hello":
+                return
+            if header.get("version") != PROTOCOL_VERSION:
+                send_message(sock, {"type": "error", "text": f"protocol version {header.get('version')} is not supported, "
+                                                             f"the worker speaks version {PROTOCOL_VERSION}"})
+                return
+            challenge = secrets.token_hex(16)
+            send_message(sock, {"type": "hello", "host": socket.gethostname(), "python": platform.python_version(), "slots": server.slots,
+                                "challenge": challenge})
+            header = recv_message(sock)[0]
+            if header.get("type") != "auth" or not hmac.compare_digest(str(header.get("response", "")), auth_response(server.token, challenge)):
+                send_message(sock, {"type": "error", "text": "authentication failed, check the worker token"})
+                server.log(f"{self.client_address or 'client'}: authentication failed")
+                return
+            send_message(sock, {"type": "welcome"})
+
+            header = recv_message(sock)[0]
+            project = header["project"]
+            manifest = {safe_relative(path): file_hash for path, file_hash in header["files"].items()}
+            send_message(sock, {"type": "missing", "hashes": sorted({digest for digest in manifest.values() if not os.path.isfile(server.object_path(digest))})})
+
+            while True:
+                header, payload = recv_message(sock)
+                if header["type"] == "blob":
+                    server.store_object(header["hash"], payload)
+                elif header["type"] == "build":
+                    try:
+                        check_arguments(header["arguments"])
+                    except ValueError as e:
+                        send_message(sock, {"type": "line", "text": f"Error: {e}\n"})
+                        send_message(sock, {"type": "result", "returncode": -1})
+                        raise
+                    self.build(project, manifest, header)
+                    return
+                else:
+                    return
+        except (OSError, ValueError, KeyError) as e:
+            server.log(f"{self.client_address or 'client'}: {e}")
+
+    def build(self, project, manifest, header):
+        server = self.server
+        sock = self.request
+        send_lock = threading.Lock()
+
+        def send(header, payload_file=None):
+            with send_lock:
+                send_message(sock, header, payload_file=payload_file)
+
+        if not server.slot_semaphore.acquire(blocking=False):
+            send({"type": "line", "text": "Waiting for a free build slot on the worker...\n"})
+            server.slot_semaphore.acquire()
+        try:
+            with server.workspace_lock(project):
+                workspace = server.sync_workspace(project, manifest)
+                output_dir = os.path.join(workspace, "_output")
+                os.makedirs(output_dir, exist_ok=True)
+                command = [sys.executable, "-m", "nuitka"] + header["arguments"] + [f"--output-dir={output_dir}", safe_relative(header["script"])]
+                command = with_jobs(command, server.jobs)
+                runner = BuildRunner(command, cwd=workspace)
+
+                # A cancel message, or the coordinator going away, stops the build
+                def watch_cancel():
+                    try:
+                        while recv_message(sock)[0].get("type") != "cancel":
+                            pass
+                    except (OSError, ValueError):
+                        pass
+                    runner.cancel()
+
+                threading.Thread(target=watch_cancel, daemon=True).start()
+                server.log(f"Building {header['script']} for {project}")
+                try:
+                    returncode = runner.run(lambda line: send({"type": "line", "text": line}))
+                except FileNotFoundError:
+                    send({"type": "line", "text": f"Error: {sys.executable} could not be started on the worker.\n"})
+                    returncode = -1
+
+                with tempfile.TemporaryFile() as archive:
+                    if returncode == 0:
+                        with tarfile.open(fileobj=archive, mode="w:gz") as tar:
+                            for name in sorted(os.listdir(output_dir)):
+                                if not name.endswith(ARTIFACT_EXCLUDED_SUFFIXES):
+                                    tar.add(os.path.join(output_dir, name), arcname=name)
+                        archive.seek(0)
+                    send({"type": "result", "returncode": returncode}, payload_file=archive if returncode == 0 else None)
+        finally:
+            server.slot_semaphore.release()
+
+
+class WorkerServerMixin:
+    # Content addressed object store plus one persistent workspace per project
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def setup_worker(self, work_dir, slots, token=None):
+        self.work_dir = os.path.abspath(work_dir)
+        os.makedirs(self.work_dir, exist_ok=True)
+        self.token, self.token_path = worker_token(self.work_dir, token)
+        self.slots = max(1, int(slots))
+        self.jobs = max(1, (os.cpu_count() or 1) // self.slots)
+        self.slot_semaphore = threading.Semaphore(self.slots)
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+        os.makedirs(os.path.join(self.work_dir, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(self.work_dir, "workspaces"), exist_ok=True)
+
+    def log(self, message):
+        sys.stdout.write(message + "\n")
+        sys.stdout.flush()
+
+    def object_path(self, file_hash):
+        if len(file_hash) != 64 or not all(c in "0123456789abcdef" for c in file_hash):
+            raise ValueError(f"Invalid object hash: {file_hash}")
+        return os.path.join(self.work_dir, "objects", file_hash[:2], file_hash)
+
+    def store_object(self, file_hash, payload):
+        if hashlib.sha256(payload).hexdigest() != file_hash:
+            raise ValueError(f"Corrupted object {file_hash}")
+        path = self.object_path(file_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(temp_path, path)
+
+    def workspace_lock(self, project):
+        with self.locks_lock:
+            return self.locks.setdefault(project, threading.Lock())
+
+    def sync_workspace(self, project, manifest):
+        # Brings the project's workspace to the manifest, files that did not change keep their mtime
+        workspace = os.path.join(self.work_dir, "workspaces", safe_relative(project))
+        state_path = os.path.join(workspace, ".manifest.json")
+        try:
+            with open(state_path, 'r') as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = {}
+        for path in set(previous) - set(manifest):
+            try:
+                os.remove(os.path.join(workspace, path))
+            except OSError:
+                pass
+        for path, file_hash in manifest.items():
+            target = os.path.join(workspace, path)
+            if previous.get(path) == file_hash and os.path.isfile(target):
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(self.object_path(file_hash), target)
+        with open(state_path, 'w') as f:
+            json.dump(manifest, f)
+        return workspace
+
+
+class TCPWorkerServer(WorkerServerMixin, socketserver.ThreadingTCPServer):
+    pass
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class UnixWorkerServer(WorkerServerMixin, socketserver.ThreadingUnixStreamServer):
+        pass
+
+
+def serve_worker(address, work_dir, slots=1, token=None):
+    # Runs a build worker until interrupted
+    family, target = parse_address(address)
+    if family == socket.AF_UNIX:
+        if os.path.exists(target):
+            os.remove(target)
+        server = UnixWorkerServer(target, WorkerHandler)
+    else:
+        server = TCPWorkerServer(target, WorkerHandler)
+    server.setup_worker(work_dir, slots, token)
+    server.log(f"Build worker listening on {address}, {server.slots} slot(s) with --jobs={server.jobs}, files in {server.work_dir}")
+    if server.token_path:
+        server.log(f"Coordinators need the token in {server.token_path} as their remote_token setting")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
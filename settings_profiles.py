@@ -0,0 +1,256 @@
+import copy
+import hashlib
+import json
+import os
+
+# Settings files can extend others ("extends": "../base.json" or a list), e.g. company base -> platform -> project.
+# Later layers override earlier ones key by key, paths are relative to the file that sets them.
+SECTIONS = ("options", "tool_options")
+PATH_KEYS = ("file_path", "output_dir")
+DEFAULT_LAYER = "(default)"
+
+# Parsed layers by the hash of their content, resolved chains by the hashes of all their layers
+layer_cache = {}
+resolved_cache = {}
+
+
+def read_layer(path):
+    # (content hash, parsed settings) of one settings file, parsed once per content
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    layer = layer_cache.get(digest)
+    if layer is None:
+        layer = json.loads(data.decode("utf-8"))
+        if not isinstance(layer, dict):
+            raise ValueError(f"{path}: settings must be a JSON object")
+        # Checked here, so a hand edited file is reported like invalid JSON instead of failing while it is merged
+        for section in SECTIONS:
+            if not isinstance(layer.get(section, {}), dict):
+                raise ValueError(f"{path}: \"{section}\" must be a JSON object")
+        for key in PATH_KEYS:
+            if not isinstance(layer.get(key) or "", str):
+                raise ValueError(f"{path}: \"{key}\" must be a string")
+        extends = layer.get("extends") or []
+        if not isinstance(extends, (str, list)) or isinstance(extends, list) and not all(isinstance(item, str) for item in extends):
+            raise ValueError(f"{path}: \"extends\" must be a path or a list of paths")
+        layer_cache[digest] = layer
+    return digest, layer
+
+
+def parent_paths(path, layer):
+    extends = layer.get("extends") or []
+    if isinstance(extends, str):
+        extends = [extends]
+    base_dir = os.path.dirname(os.path.abspath(path))
+    return [os.path.abspath(os.path.join(base_dir, os.path.normpath(parent))) for parent in extends]
+
+
+def layer_chain(path, seen=()):
+    # [(path, hash, layer)] from the most general layer to path itself, a layer shared by several parents comes once
+    path = os.path.abspath(path)
+    if path in seen:
+        raise ValueError("Settings extend themselves: " + " -> ".join(os.path.basename(item) for item in seen + (path,)))
+    digest, layer = read_layer(path)
+    chain = []
+    for parent in parent_paths(path, layer):
+        for item in layer_chain(parent, seen + (path,)):
+            if all(item[0] != existing[0] for existing in chain):
+                chain.append(item)
+    chain.append((path, digest, layer))
+    return chain
+
+
+def merge_chain(chain):
+    # Effective settings of a chain and, per key, every (layer, value) that set it
+    settings = {key: "" for key in PATH_KEYS}
+    settings.update({section: {} for section in SECTIONS})
+    history = {}
+    for layer_path, digest, layer in chain:
+        base_dir = os.path.dirname(layer_path)
+        for key in PATH_KEYS:
+            value = (layer.get(key) or "").strip()
+            if value:
+                settings[key] = os.path.abspath(os.path.join(base_dir, os.path.normpath(value)))
+                history.setdefault(key, []).append((layer_path, settings[key]))
+        for section in SECTIONS:
+            for option, value in layer.get(section, {}).items():
+                settings[section][option] = value
+                history.setdefault((section, option), []).append((layer_path, value))
+    return settings, history
+
+
+def resolve_layers(path):
+    # (settings, history) of path with everything it extends; settings["extends"] lists its direct parents as absolute paths
+    chain = layer_chain(path)
+    key = tuple((layer_path, digest) for layer_path, digest, layer in chain)
+    if key not in resolved_cache:
+        resolved_cache[key] = merge_chain(chain)
+    settings, history = copy.deepcopy(resolved_cache[key])
+    parents = parent_paths(chain[-1][0], chain[-1][2])
+    if parents:
+        settings["extends"] = parents
+    settings["layers"] = [layer_path for layer_path, digest, layer in chain]
+    return settings, history
+
+
+def parent_settings(parents):
+    # Effective settings of a list of parent files, defaults filled in
+    chain = []
+    for parent in parents:
+        for item in layer_chain(parent):
+            if all(item[0] != existing[0] for existing in chain):
+                chain.append(item)
+    return with_defaults(merge_chain(chain)[0])
+
+
+def relative_parent(parent, directory):
+    try:
+        return os.path.relpath(parent, directory).replace(os.sep, "/")
+    except ValueError:
+        # Another drive on Windows
+        return parent
+
+
+def layer_delta(settings_path, settings):
+    # What a settings file that extends others has to store: only the values its parents do not already give
+    parents = settings["extends"]
+    inherited = parent_settings(parents)
+    directory = os.path.dirname(os.path.abspath(settings_path))
+    delta = {"extends": [relative_parent(parent, directory) for parent in parents]}
+    if len(delta["extends"]) == 1:
+        delta["extends"] = delta["extends"][0]
+    for key in PATH_KEYS:
+        value = (settings.get(key) or "").strip()
+        if value and os.path.abspath(value) != inherited[key]:
+            delta[key] = value
+    for section in SECTIONS:
+        values = {option: value for option, value in settings.get(section, {}).items() if inherited[section].get(option) != value}
+        if values:
+            delta[section] = values
+    return delta
+
+
+def with_defaults(settings):
+    from nuitka_core import default_options, default_tool_options
+
+    settings["options"] = dict(default_options(), **settings["options"])
+    settings["tool_options"] = dict(default_tool_options(), **settings["tool_options"])
+    return settings
+
+
+def effective_value(settings, key):
+    return settings[key[0]].get(key[1]) if isinstance(key, tuple) else settings.get(key, "")
+
+
+def key_name(key):
+    return key[1] if isinstance(key, tuple) else key
+
+
+def explain(path):
+    # (key, effective value, layer that set it, [(overridden layer, value)]) of every value a layer sets
+    # that is not a default, or that overrides another layer
+    settings, history = resolve_layers(path)
+    defaults = with_defaults({"options": {}, "tool_options": {}, "file_path": "", "output_dir": ""})
+    rows = []
+    for key, values in history.items():
+        layer_path, value = values[-1]
+        if values[:-1] or value != effective_value(defaults, key):
+            rows.append((key_name(key), value, layer_path, values[:-1]))
+    return settings, sorted(rows, key=lambda row: (row[0].startswith("--"), row[0]))
+
+
+def diff_settings(first_path, second_path):
+    # (key, first value, its layer, second value, its layer) of every effective value the two files disagree on
+    first, first_history = resolve_layers(first_path)
+    second, second_history = resolve_layers(second_path)
+    with_defaults(first)
+    with_defaults(second)
+    keys = list(PATH_KEYS) + sorted({(section, option) for settings in (first, second) for section in SECTIONS for option in settings[section]},
+                                    key=lambda key: (key[1].startswith("--"), key[1]))
+    rows = []
+    for key in keys:
+        first_value, second_value = effective_value(first, key), effective_value(second, key)
+        if first_value != second_value:
+            rows.append((key_name(key), first_value, first_history.get(key, [(DEFAULT_LAYER, None)])[-1][0],
+                         second_value, second_history.get(key, [(DEFAULT_LAYER, None)])[-1][0]))
+    return rows
+
+
+def option_kind(option):
+    from nuitka_core import OPTION_TYPES, TOOL_OPTION_TYPES
+
+    if option in OPTION_TYPES or option in TOOL_OPTION_TYPES:
+        return OPTION_TYPES.get(option) or TOOL_OPTION_TYPES[option]
+    if option.startswith("--"):
+        from option_schema import cached_option_types
+        return cached_option_types().get(option)
+    return None
+
+
+def parse_assignment(assignment):
+    # "--jobs=8" -> ("options", "--jobs", "8"), "--standalone" -> ("options", "--standalone", True),
+    # "ccache_enabled=no" -> ("tool_options", "ccache_enabled", False), "output_dir=build" -> (None, "output_dir", "build")
+    if option_kind(assignment) == "bool":
+        # Options like "--enable-plugin=tk-inter" are checkboxes themselves
+        option, separator, value = assignment, "", ""
+    else:
+        option, separator, value = assignment.partition("=")
+    if option in PATH_KEYS:
+        return None, option, value
+    section = "options" if option.startswith("-") else "tool_options"
+    if not separator:
+        return section, option, True
+    if option_kind(option) == "bool":
+        if value.lower() not in ("true", "false", "yes", "no", "on", "off", "1", "0"):
+            raise ValueError(f"{option} is a checkbox option, use true or false instead of {value!r}")
+        return section, option, value.lower() in ("true", "yes", "on", "1")
+    return section, option, value
+
+
+def bulk_edit(paths, assignments=(), removals=()):
+    # Sets and removes values in each file's own layer (what it extends is not touched), returns the files changed
+    edits = [parse_assignment(assignment) for assignment in assignments]
+    changed = []
+    for path in paths:
+        digest, layer = read_layer(path)
+        updated = copy.deepcopy(layer)
+        for section, option, value in edits:
+            if section is None:
+                updated[option] = value
+            else:
+                updated.setdefault(section, {})[option] = value
+        for option in removals:
+            if option in PATH_KEYS:
+                updated.pop(option, None)
+            for section in SECTIONS:
+                updated.get(section, {}).pop(option, None)
+        if updated != layer:
+            with open(path, 'w') as f:
+                json.dump(updated, f, indent=4)
+            changed.append(path)
+    return changed
+
+
+def format_value(value):
+    return json.dumps(value) if not isinstance(value, str) else value or '""'
+
+
+def format_explain(settings, rows):
+    text = "Layers: " + " -> ".join(settings["layers"]) + "\n"
+    for name, value, layer_path, overridden in rows:
+        text += f"  {name} = {format_value(value)}  [{os.path.basename(layer_path)}]"
+        if overridden:
+            text += "  overrides " + ", ".join(f"{format_value(old)} [{os.path.basename(old_layer)}]" for old_layer, old in overridden)
+        text += "\n"
+    return text
+
+
+def format_diff(first_path, second_path, rows):
+    text = f"A: {first_path}\nB: {second_path}\n"
+    if not rows:
+        return text + "The effective settings are identical.\n"
+    for name, first_value, first_layer, second_value, second_layer in rows:
+        text += (f"  {name}: {format_value(first_value) if first_value is not None else '-'} [{os.path.basename(first_layer)}]"
+                 f" | {format_value(second_value) if second_value is not None else '-'} [{os.path.basename(second_layer)}]\n")
+    return text
@@ -0,0 +1,83 @@
+import os
+import time
+
+# Time to first paint the GUI should stay under, "--profile-startup=MS" overrides it
+STARTUP_TARGET_MS = 500
+# Profiles kept in startup-times.json
+MAX_RECORDED_PROFILES = 200
+
+
+class StartupStage:
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.stages.append((self.name, self.start - self.profile.started, time.perf_counter() - self.start))
+        return False
+
+
+class StartupProfile:
+    # Wall time of each GUI startup stage (imports, widget construction) up to the first paint of the main window.
+    # Kept free of imports beyond os/time, it is loaded before everything it measures.
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.stages = []
+        self.first_paint = None
+
+    def stage(self, name):
+        return StartupStage(self, name)
+
+    def mark_first_paint(self):
+        if self.first_paint is None:
+            self.first_paint = time.perf_counter() - self.started
+
+    def interpreter_startup(self):
+        # Seconds from process creation to the GUI module starting, None without psutil
+        try:
+            import psutil
+        except ImportError:
+            return None
+        elapsed = time.perf_counter() - self.started
+        return max(time.time() - elapsed - psutil.Process().create_time(), 0.0)
+
+    def report(self, target_ms=STARTUP_TARGET_MS):
+        lines = []
+        interpreter = self.interpreter_startup()
+        if interpreter is not None:
+            lines.append(f"  {'python interpreter':<28} {interpreter * 1000:8.1f} ms")
+        for name, offset, duration in self.stages:
+            lines.append(f"  {name:<28} {duration * 1000:8.1f} ms  (at {offset * 1000:.1f} ms)")
+        if self.first_paint is not None:
+            last = max((offset + duration for name, offset, duration in self.stages), default=0.0)
+            lines.append(f"  {'layout & first paint':<28} {(self.first_paint - last) * 1000:8.1f} ms")
+            verdict = "within" if self.first_paint * 1000 <= target_ms else "OVER"
+            lines.append(f"Time to first paint: {self.first_paint * 1000:.1f} ms ({verdict} the {target_ms:.0f} ms target)")
+        return "Startup profile:\n" + "\n".join(lines) + "\n"
+
+    def within_target(self, target_ms=STARTUP_TARGET_MS):
+        return self.first_paint is not None and self.first_paint * 1000 <= target_ms
+
+    def record(self):
+        # Appends this profile to startup-times.json, to track time to first paint across versions and machines
+        import json
+        from nuitka_core import app_data_dir
+        path = os.path.join(app_data_dir(), "startup-times.json")
+        try:
+            with open(path, 'r') as f:
+                profiles = json.load(f)
+        except (OSError, ValueError):
+            profiles = []
+        profiles.append({
+            "time": time.time(),
+            "first_paint": self.first_paint,
+            "stages": {name: duration for name, offset, duration in self.stages},
+        })
+        with open(path, 'w') as f:
+            json.dump(profiles[-MAX_RECORDED_PROFILES:], f, indent=1)
+        return path
@@ -0,0 +1,209 @@
+import os
+import sys
+import threading
+import time
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object
+    Observer = None
+
+from build_progress import BuildProgress
+from nuitka_core import NUITKA_NOT_FOUND, run_build
+
+# Folders never watched: Nuitka's own output and caches would retrigger every build
+IGNORED_DIRS = ("__pycache__", ".git", ".hg", ".svn", ".tox", ".venv", "venv", "node_modules")
+IGNORED_DIR_SUFFIXES = (".build", ".dist", ".onefile-build")
+# Editor swap/backup files and compiled leftovers
+IGNORED_FILE_SUFFIXES = (".pyc", ".pyo", ".swp", ".swx", ".tmp", "~", ".log")
+
+# Options that throw away what an incremental rebuild reuses
+WATCH_REMOVED_OPTIONS = ("--remove-output",)
+
+
+def watch_command(command):
+    # Keeps the .build folder between rebuilds, so Scons and ccache only recompile what changed
+    return [arg for arg in command if arg not in WATCH_REMOVED_OPTIONS]
+
+
+def source_files(root, is_ignored=None):
+    # Every file of a source tree, pruning ignored folders while walking
+    for current, dirs, names in os.walk(root):
+        dirs[:] = [name for name in dirs if name not in IGNORED_DIRS and not name.endswith(IGNORED_DIR_SUFFIXES)
+                   and not name.startswith(".") and not (is_ignored and is_ignored(os.path.join(current, name, "")))]
+        for name in names:
+            path = os.path.join(current, name)
+            if not (is_ignored and is_ignored(path)) and not name.endswith(IGNORED_FILE_SUFFIXES):
+                yield path
+
+
+class SourceWatcher:
+    # Calls on_change(paths) once a burst of changes below root has been quiet for debounce seconds.
+    # Uses watchdog (inotify, FSEvents, ReadDirectoryChangesW) when installed, polls otherwise.
+    def __init__(self, root, on_change, debounce=0.5, interval=1.0, ignored_paths=()):
+        self.root = os.path.abspath(root)
+        self.on_change = on_change
+        self.debounce = debounce
+        self.interval = interval
+        self.ignored_paths = tuple(os.path.normcase(os.path.abspath(path)) + os.sep for path in ignored_paths)
+        self.condition = threading.Condition()
+        self.pending = set()
+        self.last_event = 0.0
+        self.stopped = False
+        self.observer = None
+        self.threads = []
+
+    @property
+    def backend(self):
+        return "watchdog" if Observer is not None else "polling"
+
+    def start(self):
+        self.stopped = False
+        if Observer is not None:
+            self.observer = Observer()
+            self.observer.schedule(WatchdogHandler(self), self.root, recursive=True)
+            self.observer.daemon = True
+            self.observer.start()
+        else:
+            self.threads.append(threading.Thread(target=self.poll_loop, args=(self.snapshot(),), daemon=True))
+        self.threads.append(threading.Thread(target=self.debounce_loop, daemon=True))
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer = None
+        self.threads = []
+
+    def is_ignored(self, path):
+        path = os.path.abspath(path)
+        if path.endswith(IGNORED_FILE_SUFFIXES) or (os.path.normcase(path) + os.sep).startswith(self.ignored_paths):
+            return True
+        for part in os.path.relpath(path, self.root).split(os.sep)[:-1]:
+            if part in IGNORED_DIRS or part.endswith(IGNORED_DIR_SUFFIXES) or part.startswith("."):
+                return True
+        return False
+
+    def notify(self, path):
+        if self.is_ignored(path):
+            return
+        with self.condition:
+            self.pending.add(path)
+            self.last_event = time.time()
+            self.condition.notify_all()
+
+    def debounce_loop(self):
+        while True:
+            with self.condition:
+                while not self.stopped:
+                    if not self.pending:
+                        self.condition.wait()
+                        continue
+                    remaining = self.last_event + self.debounce - time.time()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                if self.stopped:
+                    return
+                changed, self.pending = sorted(self.pending), set()
+            self.on_change(changed)
+
+    def snapshot(self):
+        # path -> (mtime, size) of every watched file
+        files = {}
+        for path in source_files(self.root, self.is_ignored):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def poll_loop(self, previous):
+        while True:
+            with self.condition:
+                if self.condition.wait_for(lambda: self.stopped, self.interval):
+                    return
+            current = self.snapshot()
+            for path in set(previous) | set(current):
+                if previous.get(path) != current.get(path):
+                    self.notify(path)
+            previous = current
+
+
+class WatchdogHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        self.watcher.notify(event.src_path)
+        if getattr(event, "dest_path", None):
+            self.watcher.notify(event.dest_path)
+
+
+def watch_build(settings, command, debounce=0.5, out=None):
+    # Headless watch loop: build once, then rebuild after every burst of changes, cancelling a stale build
+    out = out or sys.stdout
+    command = watch_command(command)
+    tool_options = settings["tool_options"]
+    state = {"build": None}
+    lock = threading.Lock()
+
+    def build(current):
+        def set_runner(runner):
+            current["runner"] = runner
+            if current["cancelled"]:
+                runner.cancel()
+
+        out.write(f"Executing command: {' '.join(command)}\n\n")
+        try:
+            returncode = run_build(command, tool_options, out.write, BuildProgress(command), on_runner=set_runner)
+        except FileNotFoundError:
+            out.write(NUITKA_NOT_FOUND)
+            return
+        if not current["cancelled"]:
+            out.write("Compilation successful.\n" if returncode == 0 else "Compilation failed.\n")
+            out.write("Watching for changes...\n")
+
+    def cancel(current):
+        current["cancelled"] = True
+        if current["runner"] is not None:
+            current["runner"].cancel()
+
+    def rebuild(changed):
+        with lock:
+            if changed:
+                shown = ", ".join(os.path.relpath(path, os.path.dirname(settings["file_path"])) for path in changed[:5])
+                out.write(f"\nChanged: {shown}{' ...' if len(changed) > 5 else ''}\n")
+            previous = state["build"]
+            if previous is not None and previous["thread"].is_alive():
+                out.write("Cancelling the running build...\n")
+                cancel(previous)
+                previous["thread"].join()
+            current = {"runner": None, "cancelled": False}
+            current["thread"] = threading.Thread(target=build, args=(current,), daemon=True)
+            state["build"] = current
+            current["thread"].start()
+
+    watcher = SourceWatcher(os.path.dirname(settings["file_path"]), rebuild, debounce, ignored_paths=[settings["output_dir"]])
+    out.write(f"Watching {watcher.root} ({watcher.backend}), press Ctrl+C to stop.\n")
+    watcher.start()
+    rebuild([])
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()
+        if state["build"] is not None:
+            cancel(state["build"])
+            state["build"]["thread"].join()
+    return 0